@@ -1,15 +1,19 @@
 from django.urls import include, path
 from rest_framework import routers
 
-from .v1.views import (CategoryViewSet, CommentViewSet, GenreViewSet,
-                       ReviewViewSet, TitleViewSet, UserViewSet, signup, token)
+from .v1.views import (APIRootView, CategoryViewSet, CommentViewSet,
+                       GenreViewSet, ImportJobViewSet, ReviewViewSet,
+                       TitleViewSet, UserViewSet, export_table, import_table,
+                       signup, token)
 
 
 v1_router = routers.DefaultRouter()
+v1_router.APIRootView = APIRootView
 v1_router.register('titles', TitleViewSet, basename='titles')
 v1_router.register('genres', GenreViewSet)
 v1_router.register('categories', CategoryViewSet)
 v1_router.register('users', UserViewSet, basename='user')
+v1_router.register('import-jobs', ImportJobViewSet, basename='import-jobs')
 
 
 v1_router.register(
@@ -28,7 +32,13 @@ auth_patterns = [
     path('auth/signup/', signup, name='signup')
 ]
 
+data_patterns = [
+    path('export/<str:table>/', export_table, name='export'),
+    path('import/<str:table>/', import_table, name='import'),
+]
+
 urlpatterns = [
     path('v1/', include(v1_router.urls)),
-    path('v1/', include(auth_patterns))
+    path('v1/', include(auth_patterns)),
+    path('v1/', include(data_patterns)),
 ]
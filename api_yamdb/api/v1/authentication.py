@@ -0,0 +1,95 @@
+from django.contrib.auth import get_user_model
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (AuthenticationFailed,
+                                                 InvalidToken)
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .revocation import get_denylist
+
+User = get_user_model()
+
+# Утверждения токена, которых достаточно для проверки прав.
+CLAIMS = ('username', 'role', 'is_superuser')
+
+
+class RoleAccessToken(AccessToken):
+    """Токен доступа с ролью пользователя"""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim in CLAIMS:
+            token[claim] = getattr(user, claim)
+        return token
+
+
+class ClaimsUser(TokenUser):
+    """Пользователь из утверждений токена.
+
+    Права проверяются без запроса к базе, полная запись User читается
+    при первом обращении к user или к полю, которого нет в токене.
+    Удаленный или неактивный пользователь тогда получает 401.
+    """
+
+    @cached_property
+    def role(self):
+        return self.token['role']
+
+    @property
+    def is_user(self):
+        return self.role == User.Role.USER
+
+    @property
+    def is_admin(self):
+        return self.role == User.Role.ADMIN or self.is_superuser
+
+    @property
+    def is_moderator(self):
+        return self.role == User.Role.MODERATOR
+
+    @cached_property
+    def user(self):
+        # Те же проверки, что JWTAuthentication.get_user делает сразу.
+        try:
+            user = User.objects.get(pk=self.pk)
+        except User.DoesNotExist:
+            raise AuthenticationFailed(
+                'Пользователь не найден', code='user_not_found')
+        if not user.is_active:
+            raise AuthenticationFailed(
+                'Пользователь неактивен', code='user_inactive')
+        return user
+
+    def __getattr__(self, attr):
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        return getattr(self.user, attr)
+
+
+def full_user(user):
+    """Запись User для пользователя запроса"""
+    return user.user if isinstance(user, ClaimsUser) else user
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """JWT без запроса пользователя к базе.
+
+    Токены без роли, выданные до ее появления в утверждениях,
+    проверяются как раньше, с загрузкой пользователя. Отозванные токены
+    отсекаются по списку отзыва в памяти процесса.
+    """
+
+    def get_validated_token(self, raw_token):
+        validated_token = super().get_validated_token(raw_token)
+        if get_denylist().is_revoked(validated_token):
+            raise InvalidToken('Токен отозван')
+        return validated_token
+
+    def get_user(self, validated_token):
+        required = (api_settings.USER_ID_CLAIM, *CLAIMS)
+        if any(claim not in validated_token for claim in required):
+            return super().get_user(validated_token)
+        return ClaimsUser(validated_token)
@@ -0,0 +1,200 @@
+from collections import Counter, defaultdict
+
+from django.db import connection, transaction
+from rest_framework import serializers, status
+from rest_framework.response import Response
+from rest_framework.validators import UniqueValidator
+
+from reviews.importing import batched
+from .signals import bump_collections
+
+BULK_MAX_ITEMS = 1000
+# Значений в одном запросе IN: меньше ограничения SQLite на параметры.
+LOOKUP_BATCH_SIZE = 900
+LOOKUPS = 'bulk_lookups'
+
+
+def lookup_key(queryset, field_name):
+    return queryset.model, field_name
+
+
+def fetch(queryset, field_name, values):
+    """Объекты по значениям поля одним запросом IN"""
+    found = {}
+    for batch in batched(sorted(values), LOOKUP_BATCH_SIZE):
+        found.update(
+            (getattr(obj, field_name), obj)
+            for obj in queryset.filter(**{f'{field_name}__in': batch}))
+    return found
+
+
+class BulkSlugRelatedField(serializers.SlugRelatedField):
+    """SlugRelatedField, который при создании списка берет объекты,
+    прочитанные BulkListSerializer заранее"""
+
+    def to_internal_value(self, data):
+        lookups = self.context.get(LOOKUPS)
+        key = lookup_key(self.get_queryset(), self.slug_field)
+        if lookups is None or key not in lookups:
+            return super().to_internal_value(data)
+        try:
+            return lookups[key][str(data)]
+        except KeyError:
+            self.fail('does_not_exist', slug_name=self.slug_field,
+                      value=str(data))
+
+
+class BulkUniqueValidator(UniqueValidator):
+    """UniqueValidator, который при создании списка проверяет значения
+    по прочитанным заранее"""
+
+    def __call__(self, value, serializer_field):
+        lookups = serializer_field.context.get(LOOKUPS)
+        key = lookup_key(self.queryset, serializer_field.source_attrs[-1])
+        if lookups is None or key not in lookups:
+            return super().__call__(value, serializer_field)
+        if value in lookups[key]:
+            raise serializers.ValidationError(self.message, code='unique')
+
+
+def bulk_insert(model, objects):
+    """bulk_create, после которого у объектов есть первичные ключи.
+
+    SQLite в Django 3.2 ключи из bulk_create не возвращает. После вставки
+    транзакция держит блокировку записи, а AUTOINCREMENT выдает ключи по
+    возрастанию, поэтому вставленным строкам принадлежат последние ключи
+    таблицы. Остальные базы без RETURNING сохраняют объекты по одному.
+    """
+    if connection.features.can_return_rows_from_bulk_insert:
+        model.objects.bulk_create(objects)
+    elif connection.vendor == 'sqlite':
+        model.objects.bulk_create(objects)
+        pks = model.objects.order_by('-pk').values_list(
+            'pk', flat=True)[:len(objects)]
+        for obj, pk in zip(objects, reversed(pks)):
+            obj.pk = pk
+    else:
+        for obj in objects:
+            obj.save(force_insert=True)
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """Создание списка объектов.
+
+    Ссылки по slug и уникальные поля проверяются по объектам, прочитанным
+    одним запросом IN на модель, объекты и строки связей многие-ко-многим
+    вставляются через bulk_create.
+    """
+
+    def unique_fields(self):
+        for name, field in self.child.fields.items():
+            for validator in field.validators:
+                if isinstance(validator, BulkUniqueValidator):
+                    yield name, validator.queryset, field.source
+
+    def lookup_fields(self):
+        """Поля со ссылками по slug и с проверкой уникальности"""
+        for name, field in self.child.fields.items():
+            relation = getattr(field, 'child_relation', field)
+            if isinstance(relation, BulkSlugRelatedField):
+                yield name, relation.get_queryset(), relation.slug_field
+        yield from self.unique_fields()
+
+    def prefetch(self, data):
+        values = defaultdict(set)
+        querysets = {}
+        for name, queryset, field_name in self.lookup_fields():
+            key = lookup_key(queryset, field_name)
+            querysets[key] = queryset
+            for item in data:
+                value = item.get(name) if isinstance(item, dict) else None
+                if isinstance(value, list):
+                    values[key].update(map(str, value))
+                elif value is not None:
+                    values[key].add(str(value))
+        return {
+            key: fetch(querysets[key], key[1], values[key])
+            for key in querysets
+        }
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            self.context[LOOKUPS] = self.prefetch(data)
+        try:
+            validated = super().to_internal_value(data)
+        finally:
+            self.context.pop(LOOKUPS, None)
+        self.check_duplicates(validated)
+        return validated
+
+    def check_duplicates(self, validated):
+        """Уникальные поля не должны повторяться внутри списка"""
+        errors = [{} for _ in validated]
+        for name, _, _ in self.unique_fields():
+            counts = Counter(item.get(name) for item in validated)
+            for item, item_errors in zip(validated, errors):
+                if counts[item.get(name)] > 1:
+                    item_errors[name] = ['Значение повторяется в списке.']
+        if any(errors):
+            raise serializers.ValidationError(errors)
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        many = {
+            field.name: field for field in model._meta.many_to_many
+        }
+        related = []
+        objects = []
+        for attrs in validated_data:
+            attrs = dict(attrs)
+            related.append({
+                name: attrs.pop(name) for name in list(attrs) if name in many
+            })
+            objects.append(model(**attrs))
+        with transaction.atomic():
+            bulk_insert(model, objects)
+            for field in many.values():
+                self.create_links(field, objects, related)
+            bump_collections(model)
+        return objects
+
+    @staticmethod
+    def create_links(field, objects, related):
+        through = field.remote_field.through
+        source = field.m2m_field_name()
+        target = field.m2m_reverse_field_name()
+        links = []
+        for obj, values in zip(objects, related):
+            targets = values.get(field.name, [])
+            links.extend(
+                through(**{f'{source}_id': obj.pk, f'{target}_id': item.pk})
+                for item in targets)
+            # Связи уже известны, ответ не читает их из базы.
+            queryset = getattr(obj, field.name).all()
+            queryset._result_cache = list(targets)
+            queryset._prefetch_done = True
+            obj.__dict__.setdefault(
+                '_prefetched_objects_cache', {})[field.name] = queryset
+        through.objects.bulk_create(links)
+        bump_collections(through)
+
+
+class BulkCreateMixin:
+    """POST со списком объектов создает их все в одной транзакции.
+
+    Ответ содержит список созданных объектов, а при ошибках список
+    ошибок по каждому элементу в том же порядке; тогда ничего
+    не создается.
+    """
+    bulk_max_items = BULK_MAX_ITEMS
+
+    def create(self, request, *args, **kwargs):
+        if not isinstance(request.data, list):
+            return super().create(request, *args, **kwargs)
+        if len(request.data) > self.bulk_max_items:
+            raise serializers.ValidationError(
+                f'Не больше {self.bulk_max_items} объектов за запрос')
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
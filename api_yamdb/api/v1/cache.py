@@ -0,0 +1,170 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework import status
+from rest_framework.response import Response
+
+from reviews.models import CollectionVersion
+
+
+class LRUCacheBackend:
+    """Кэш в памяти процесса с вытеснением давно не читанных записей.
+
+    Записи живут не дольше timeout секунд.
+    """
+
+    def __init__(self, max_entries=1024, timeout=None):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self.lock:
+            if key not in self.entries:
+                return default
+            expires, value = self.entries[key]
+            if expires is not None and expires <= time.monotonic():
+                del self.entries[key]
+                return default
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        expires = None
+        if self.timeout is not None:
+            expires = time.monotonic() + self.timeout
+        with self.lock:
+            self.entries[key] = expires, value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class DjangoCacheBackend:
+    """Обертка над кэшем Django, общая для всех процессов"""
+
+    def __init__(self, alias='default', timeout=None):
+        self.cache = caches[alias]
+        self.timeout = timeout
+
+    def get(self, key, default=None):
+        return self.cache.get(key, default)
+
+    def set(self, key, value):
+        self.cache.set(key, value, self.timeout)
+
+    def clear(self):
+        self.cache.clear()
+
+
+class ResponseCache:
+    """Кэш ответов с версиями коллекций.
+
+    Ключ ответа содержит текущие версии коллекций, от которых он зависит,
+    поэтому запись в коллекцию делает старые ответы недостижимыми.
+    Версии хранятся в базе и общие для всех процессов.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def versions(collections):
+        return ','.join(
+            map(str, CollectionVersion.objects.current(collections)))
+
+    @staticmethod
+    def bump(*collections):
+        CollectionVersion.objects.bump(*collections)
+
+    def key(self, request, collections):
+        # Ссылки next/previous в ответе абсолютные: схема и хост
+        # запроса входят в ключ.
+        url = request.build_absolute_uri(request.path)
+        query = request.query_params.urlencode()
+        return (
+            f'response:{url}?{query}'
+            f':{auth_state(request.user)}:{self.versions(collections)}'
+        )
+
+    def get(self, key):
+        value = self.backend.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self.backend.set(key, value)
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses}
+
+    def clear(self):
+        self.backend.clear()
+
+
+def auth_state(user):
+    if not user.is_authenticated:
+        return 'anon'
+    if user.is_admin:
+        return 'admin'
+    return user.role
+
+
+_response_cache = None
+
+
+def get_response_cache():
+    global _response_cache
+    if _response_cache is None:
+        config = getattr(settings, 'RESPONSE_CACHE', {})
+        backend_class = import_string(config.get(
+            'BACKEND', 'api.v1.cache.LRUCacheBackend'))
+        _response_cache = ResponseCache(
+            backend_class(**config.get('OPTIONS', {})))
+    return _response_cache
+
+
+class CachedResponseMixin:
+    """Кэширует ответы на GET-запросы для коллекций cache_collections"""
+    cache_collections = ()
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        cache = get_response_cache()
+        key = cache.key(request, self.cache_collections)
+        data = cache.get(key)
+        if data is not None:
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data)
+        response['X-Cache'] = 'MISS'
+        return response
+
+
+class CachedListMixin(CachedResponseMixin):
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+
+class CachedRetrieveMixin(CachedResponseMixin):
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs)
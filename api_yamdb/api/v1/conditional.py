@@ -0,0 +1,100 @@
+import hashlib
+
+from django.utils.http import (http_date, parse_etags, parse_http_date_safe,
+                               quote_etag)
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = 'Ресурс изменен с момента последнего запроса'
+    default_code = 'precondition_failed'
+
+
+def make_etag(path, stamp):
+    digest = hashlib.md5(f'{path}:{stamp.isoformat()}'.encode()).hexdigest()
+    return quote_etag(digest)
+
+
+def strip_weak(etags):
+    return [etag[2:] if etag.startswith('W/') else etag for etag in etags]
+
+
+class ConditionalMixin:
+    """ETag и Last-Modified по меткам изменения, без сериализации ответа.
+
+    Для объекта меткой служит поле `modified`, для списка - значение
+    get_list_modified(). Изменение и удаление учитывают If-Match.
+    """
+
+    def get_list_modified(self):
+        return None
+
+    def get_object(self):
+        if not hasattr(self, '_object'):
+            self._object = super().get_object()
+        return self._object
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_get(
+            self.get_list_modified(), request.get_full_path(),
+            super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_get(
+            self.get_object().modified, request.path,
+            super().retrieve, request, *args, **kwargs)
+
+    def update(self, request, *args, **kwargs):
+        self.check_if_match(request)
+        response = super().update(request, *args, **kwargs)
+        # Сигналы после save() могут обновить метку запросом update(),
+        # мимо загруженного объекта: перечитываем ее.
+        instance = self.get_object()
+        instance.refresh_from_db(fields=['modified'])
+        self.set_validators(response, request.path, instance.modified)
+        return response
+
+    def destroy(self, request, *args, **kwargs):
+        self.check_if_match(request)
+        return super().destroy(request, *args, **kwargs)
+
+    def conditional_get(self, stamp, path, handler, request, *args,
+                        **kwargs):
+        if stamp is None:
+            return handler(request, *args, **kwargs)
+        if self.not_modified(request, make_etag(path, stamp), stamp):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = handler(request, *args, **kwargs)
+        self.set_validators(response, path, stamp)
+        return response
+
+    @staticmethod
+    def not_modified(request, etag, stamp):
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match:
+            etags = strip_weak(parse_etags(if_none_match))
+            return '*' in etags or etag in etags
+        since = parse_http_date_safe(
+            request.META.get('HTTP_IF_MODIFIED_SINCE'))
+        return since is not None and int(stamp.timestamp()) <= since
+
+    def check_if_match(self, request):
+        if_match = request.META.get('HTTP_IF_MATCH')
+        if not if_match:
+            return
+        etags = parse_etags(if_match)
+        etag = make_etag(request.path, self.get_object().modified)
+        if '*' not in etags and etag not in etags:
+            raise PreconditionFailed()
+
+    @staticmethod
+    def set_validators(response, path, stamp):
+        if response.status_code not in (status.HTTP_200_OK,
+                                        status.HTTP_304_NOT_MODIFIED):
+            return
+        response['ETag'] = make_etag(path, stamp)
+        response['Last-Modified'] = http_date(stamp.timestamp())
@@ -0,0 +1,56 @@
+from django.db.models import Count
+
+from reviews.models import GenreTitle
+
+
+def slug_counts(rows, prefix):
+    return [
+        {
+            'slug': row[f'{prefix}__slug'],
+            'name': row[f'{prefix}__name'],
+            'count': row['count'],
+        }
+        for row in rows
+    ]
+
+
+def genre_facet(titles):
+    return slug_counts(
+        GenreTitle.objects.filter(title__in=titles.values('id'))
+        .values('genre__slug', 'genre__name')
+        .annotate(count=Count('title', distinct=True))
+        .order_by('genre__slug'),
+        'genre'
+    )
+
+
+def category_facet(titles):
+    return slug_counts(
+        titles.exclude(category=None)
+        .values('category__slug', 'category__name')
+        .annotate(count=Count('id'))
+        .order_by('category__slug'),
+        'category'
+    )
+
+
+def year_facet(titles):
+    return list(
+        titles.values('year').annotate(count=Count('id')).order_by('year')
+    )
+
+
+FACETS = {
+    'genre': genre_facet,
+    'category': category_facet,
+    'year': year_facet,
+}
+
+
+def count_facets(titles, names):
+    """Считаем количество произведений для каждого значения фасетов"""
+    titles = titles.order_by()
+    facets = {'count': titles.count()}
+    for name in names:
+        facets[name] = FACETS[name](titles)
+    return facets
@@ -1,13 +1,50 @@
+from django.db.models import CharField, Q, Value
+from django.db.models.functions import Concat, Lower
 from django_filters.rest_framework import CharFilter, FilterSet
+from rest_framework.filters import BaseFilterBackend
 
 from reviews.models import Title
+from reviews.search import search_titles
+
+# Больше любого символа, которым может продолжаться префикс.
+MAX_CHAR = '\U0010ffff'
 
 
 class TitleFilter(FilterSet):
     genre = CharFilter(field_name='genre__slug')
     category = CharFilter(field_name='category__slug')
-    name = CharFilter(field_name='name', lookup_expr='icontains')
+    name = CharFilter(method='filter_name')
+    q = CharFilter(method='filter_q')
 
     class Meta:
         model = Title
-        fields = ('genre', 'category', 'year', 'name',)
+        fields = ('genre', 'category', 'year', 'name', 'q')
+
+    def filter_name(self, queryset, name, value):
+        return search_titles(queryset, value, columns=('name',))
+
+    def filter_q(self, queryset, name, value):
+        return search_titles(queryset, value)
+
+
+class PrefixSearchFilter(BaseFilterBackend):
+    """?search= ищет по началу полей search_fields без учета регистра.
+
+    Условие записано диапазоном по lower(поле), поэтому его обслуживает
+    индекс по выражению, а не просмотр таблицы, как у icontains. Префикс
+    приводится к нижнему регистру той же функцией базы, что и поле.
+    """
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        prefix = request.query_params.get(self.search_param, '').strip()
+        if not prefix:
+            return queryset
+        start = Lower(Value(prefix))
+        end = Concat(start, Value(MAX_CHAR), output_field=CharField())
+        conditions = Q()
+        for field in getattr(view, 'search_fields', ()):
+            alias = f'{field}_lower'
+            queryset = queryset.alias(**{alias: Lower(field)})
+            conditions |= Q(**{f'{alias}__gte': start, f'{alias}__lt': end})
+        return queryset.filter(conditions)
@@ -0,0 +1,36 @@
+from django.shortcuts import get_object_or_404
+
+from reviews.models import Review, Title
+
+
+class NestedParentsMixin:
+    """Родители вложенного маршрута titles/{title_id}/reviews/{review_id}.
+
+    Отзыв проверяется вместе с произведением одним запросом с JOIN.
+    Найденные объекты запоминаются на представлении до конца запроса
+    и передаются сериализатору в контексте как title и review.
+    """
+
+    def get_title(self):
+        if not hasattr(self, '_title'):
+            if 'review_id' in self.kwargs:
+                self._title = self.get_review().title
+            else:
+                self._title = get_object_or_404(
+                    Title, pk=self.kwargs['title_id'])
+        return self._title
+
+    def get_review(self):
+        if not hasattr(self, '_review'):
+            self._review = get_object_or_404(
+                Review.objects.select_related('title'),
+                pk=self.kwargs['review_id'],
+                title_id=self.kwargs['title_id'])
+        return self._review
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['title'] = self.get_title()
+        if 'review_id' in self.kwargs:
+            context['review'] = self.get_review()
+        return context
@@ -0,0 +1,204 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as B64Error
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (BasePagination, LimitOffsetPagination,
+                                       PageNumberPagination)
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Пагинация по ключу (курсору) без OFFSET и COUNT(*).
+
+    Курсор хранит значения полей `ordering` граничной записи, следующая
+    страница выбирается условием "строго после" по этим полям, поэтому
+    последнее поле должно быть уникальным.
+    """
+    ordering = ('-id',)
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    invalid_cursor_message = 'Неверный курсор'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.cursor = self.decode_cursor(request, queryset.model)
+        reverse = bool(self.cursor and self.cursor['reverse'])
+        ordering = self.ordering
+        if reverse:
+            ordering = tuple(self.invert(field) for field in ordering)
+        queryset = queryset.order_by(*ordering)
+        if self.cursor:
+            queryset = queryset.filter(
+                self.after(ordering, self.cursor['position']))
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.position(self.page[-1]), False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.position(self.page[0]), True)
+
+    def position(self, obj):
+        return [
+            getattr(obj, field.lstrip('-')) for field in self.ordering
+        ]
+
+    def encode_cursor(self, position, reverse):
+        payload = json.dumps(
+            {'p': position, 'r': int(reverse)},
+            default=lambda value: value.isoformat(),
+            separators=(',', ':'),
+        )
+        cursor = urlsafe_b64encode(payload.encode()).decode()
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request, model):
+        """Курсор из запроса, значения приводятся к типам полей ordering"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(urlsafe_b64decode(encoded.encode()))
+            position = payload['p']
+            reverse = bool(payload['r'])
+        except (B64Error, ValueError, TypeError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if (not isinstance(position, list)
+                or len(position) != len(self.ordering)):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            position = [
+                model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, position)
+            ]
+        except (ValidationError, ValueError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+        if None in position:
+            raise NotFound(self.invalid_cursor_message)
+        return {'position': position, 'reverse': reverse}
+
+    @staticmethod
+    def invert(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    @staticmethod
+    def after(ordering, position):
+        """Условие "запись идет после position" при сортировке ordering"""
+        condition = Q()
+        for index, field in enumerate(ordering):
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            step = Q(**{f'{field.lstrip("-")}__{lookup}': position[index]})
+            for previous, value in zip(ordering[:index], position):
+                step &= Q(**{previous.lstrip('-'): value})
+            condition |= step
+        return condition
+
+
+class SelectablePagination(BasePagination):
+    """Курсорная пагинация по запросу, иначе прежняя постраничная.
+
+    Курсорный режим включается параметром `?pagination=cursor` или
+    переданным курсором `?cursor=...` из ссылок next/previous.
+    """
+    fallback_class = PageNumberPagination
+    keyset_class = KeysetPagination
+    mode_query_param = 'pagination'
+
+    def __init__(self):
+        self.delegate = self.fallback_class()
+
+    def use_keyset(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or self.keyset_class.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_keyset(request):
+            self.delegate = self.keyset_class()
+        return self.delegate.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.delegate.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.delegate.get_paginated_response_schema(schema)
+
+    def to_html(self):
+        return self.delegate.to_html()
+
+    @property
+    def display_page_controls(self):
+        return getattr(self.delegate, 'display_page_controls', False)
+
+    def get_schema_fields(self, view):
+        return self.delegate.get_schema_fields(view)
+
+    def get_schema_operation_parameters(self, view):
+        return self.delegate.get_schema_operation_parameters(view)
+
+
+class TitleKeysetPagination(KeysetPagination):
+    ordering = ('id',)
+
+
+class PubDateKeysetPagination(KeysetPagination):
+    ordering = ('-pub_date', '-id')
+
+
+class TitlePagination(SelectablePagination):
+    fallback_class = LimitOffsetPagination
+    keyset_class = TitleKeysetPagination
+
+
+class PubDatePagination(SelectablePagination):
+    keyset_class = PubDateKeysetPagination
@@ -9,7 +9,7 @@ class IsAuthorModeratorAdminOrReadOnly(permissions.IsAuthenticatedOrReadOnly):
             request.method in permissions.SAFE_METHODS
             or request.user.is_moderator
             or request.user.is_admin
-            or request.user == obj.author
+            or request.user.pk == obj.author_id
         )
 
 
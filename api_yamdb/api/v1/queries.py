@@ -0,0 +1,63 @@
+import logging
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def get_query_budget(view):
+    """Бюджет запросов представления из resolver_match.func или None.
+
+    Бюджет задается атрибутом max_queries класса представления
+    и учитывает аутентификацию и обновление списка отзыва токенов.
+    """
+    return getattr(getattr(view, 'cls', None), 'max_queries', None)
+
+
+def max_queries(budget):
+    """Бюджет запросов для функции-представления с @api_view"""
+    def decorator(view):
+        view.cls.max_queries = budget
+        return view
+    return decorator
+
+
+class QueryCounter:
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class QueryBudgetMiddleware:
+    """Проверяет число запросов к базе по бюджету представления.
+
+    При QUERY_BUDGET_MODE = 'log' превышение записывается в журнал,
+    при 'raise' запрос завершается ошибкой. Запросы потоковых ответов,
+    выполненные после выхода из представления, не учитываются.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            response = self.get_response(request)
+        match = request.resolver_match
+        budget = get_query_budget(match.func) if match else None
+        if budget is not None and counter.count > budget:
+            message = (f'{request.method} {request.path}: '
+                       f'{counter.count} запросов при бюджете {budget}')
+            if getattr(settings, 'QUERY_BUDGET_MODE', 'log') == 'raise':
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
@@ -0,0 +1,121 @@
+import datetime as dt
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+
+from users.models import RevokedToken, TokenCutoff
+
+# Как часто список отзыва перечитывается из базы, секунд.
+REFRESH_INTERVAL = 5
+
+
+class Denylist:
+    """Отозванные токены в памяти процесса.
+
+    Проверка токена - поиск в множестве jti и в словаре пользователей.
+    Раз в refresh_interval секунд список перечитывается из базы целиком:
+    записи нужны только до истечения срока токенов, поэтому их немного.
+    Отзыв в этом процессе действует сразу, в остальных - после
+    ближайшего обновления.
+    """
+
+    def __init__(self, refresh_interval=REFRESH_INTERVAL,
+                 clock=time.monotonic):
+        self.refresh_interval = refresh_interval
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        # Множества заменяются целиком, читать их можно без блокировки.
+        self.jtis = frozenset()
+        self.cutoffs = {}
+        self.loaded = None
+
+    def stale(self):
+        return (self.loaded is None
+                or self.clock() - self.loaded >= self.refresh_interval)
+
+    def refresh(self):
+        now = timezone.now()
+        oldest = now - api_settings.ACCESS_TOKEN_LIFETIME
+        jtis = frozenset(RevokedToken.objects.filter(
+            expires__gt=now).values_list('jti', flat=True))
+        cutoffs = {
+            user_id: int(issued_before.timestamp())
+            for user_id, issued_before in TokenCutoff.objects.filter(
+                issued_before__gt=oldest,
+            ).values_list('user_id', 'issued_before')
+        }
+        self.jtis, self.cutoffs = jtis, cutoffs
+        self.loaded = self.clock()
+
+    def ensure_fresh(self):
+        if not self.stale():
+            return
+        with self.lock:
+            if self.stale():
+                self.refresh()
+
+    def is_revoked(self, token):
+        self.ensure_fresh()
+        if token.get(api_settings.JTI_CLAIM) in self.jtis:
+            return True
+        cutoff = self.cutoffs.get(token.get(api_settings.USER_ID_CLAIM))
+        return cutoff is not None and token.get('iat', 0) <= cutoff
+
+    def add_token(self, jti):
+        with self.lock:
+            self.jtis = self.jtis | {jti}
+
+    def add_cutoff(self, user_id, timestamp):
+        with self.lock:
+            self.cutoffs = {**self.cutoffs, user_id: timestamp}
+
+
+_denylist = None
+
+
+def get_denylist():
+    global _denylist
+    if _denylist is None:
+        _denylist = Denylist(getattr(
+            settings, 'TOKEN_REVOCATION_REFRESH', REFRESH_INTERVAL))
+    return _denylist
+
+
+def purge(now):
+    """Удаляем записи, которые пережили срок действия токенов"""
+    RevokedToken.objects.filter(expires__lte=now).delete()
+    TokenCutoff.objects.filter(
+        issued_before__lte=now - api_settings.ACCESS_TOKEN_LIFETIME,
+    ).delete()
+
+
+def revoke_token(token):
+    """Отзываем один токен до истечения его срока"""
+    jti = token[api_settings.JTI_CLAIM]
+    expires = dt.datetime.fromtimestamp(token['exp'], dt.timezone.utc)
+    RevokedToken.objects.get_or_create(jti=jti,
+                                       defaults={'expires': expires})
+    transaction.on_commit(lambda: get_denylist().add_token(jti))
+
+
+def revoke_user(user_id):
+    """Отзываем все токены пользователя, выданные до конца этой секунды.
+
+    iat в токене - целые секунды, поэтому и граница целая. Токен той же
+    секунды мог быть выдан и до отзыва, его тоже отклоняем: новый токен
+    пользователь получит, начиная со следующей секунды.
+    """
+    cutoff = int(time.time())
+    issued_before = dt.datetime.fromtimestamp(cutoff, dt.timezone.utc)
+    purge(timezone.now())
+    TokenCutoff.objects.update_or_create(
+        user_id=user_id, defaults={'issued_before': issued_before})
+    transaction.on_commit(
+        lambda: get_denylist().add_cutoff(user_id, cutoff))
@@ -1,9 +1,11 @@
 from django.contrib.auth import get_user_model
 from django.core import validators
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
 
-from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.models import Category, Comment, Genre, ImportJob, Review, Title
+from .bulk import BulkListSerializer, BulkSlugRelatedField, BulkUniqueValidator
 
 User = get_user_model()
 
@@ -13,12 +15,13 @@ class GenreSerializer(serializers.ModelSerializer):
     slug = serializers.CharField(
         max_length=50,
         validators=[validators.validate_slug,
-                    UniqueValidator(queryset=Genre.objects.all())])
+                    BulkUniqueValidator(queryset=Genre.objects.all())])
 
     class Meta:
         model = Genre
         fields = ('name', 'slug')
         lookup_field = 'slug'
+        list_serializer_class = BulkListSerializer
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -27,6 +30,10 @@ class CategorySerializer(serializers.ModelSerializer):
         model = Category
         fields = ('name', 'slug')
         lookup_field = 'slug'
+        list_serializer_class = BulkListSerializer
+        extra_kwargs = {'slug': {'validators': [
+            validators.validate_slug,
+            BulkUniqueValidator(queryset=Category.objects.all())]}}
 
 
 class TitleSerializerRead(serializers.ModelSerializer):
@@ -40,12 +47,25 @@ class TitleSerializerRead(serializers.ModelSerializer):
                   'category')
 
 
+class RatingStatsSerializer(serializers.ModelSerializer):
+    histogram = serializers.DictField(
+        source='score_histogram', child=serializers.IntegerField())
+    mean = serializers.FloatField(source='rating')
+    median = serializers.FloatField(source='median_score')
+    count = serializers.IntegerField(source='rating_count')
+
+    class Meta:
+        model = Title
+        fields = ('id', 'histogram', 'mean', 'median', 'count')
+        read_only_fields = fields
+
+
 class TitleSerializerWrite(serializers.ModelSerializer):
-    category = serializers.SlugRelatedField(slug_field='slug',
-                                            queryset=Category.objects.all())
-    genre = serializers.SlugRelatedField(many=True,
-                                         slug_field='slug',
-                                         queryset=Genre.objects.all())
+    category = BulkSlugRelatedField(slug_field='slug',
+                                    queryset=Category.objects.all())
+    genre = BulkSlugRelatedField(many=True,
+                                 slug_field='slug',
+                                 queryset=Genre.objects.all())
 
     rating = serializers.IntegerField(read_only=True)
 
@@ -53,6 +73,7 @@ class TitleSerializerWrite(serializers.ModelSerializer):
         model = Title
         fields = ('id', 'name', 'year', 'rating', 'description', 'genre',
                   'category')
+        list_serializer_class = BulkListSerializer
 
 
 class ReviewSerializer(serializers.ModelSerializer):
@@ -62,18 +83,21 @@ class ReviewSerializer(serializers.ModelSerializer):
         default=serializers.CurrentUserDefault(),
     )
 
-    def validate_author(self, value):
-        author = self.context['request'].user
-        title = self.context['view'].get_title()
-        if title.reviews.filter(author=author).exists():
-            raise serializers.ValidationError(
-                'Этот автор уже оставлял отзыв к произведению')
-        return value
-
     class Meta:
         model = Review
         fields = ('id', 'text', 'author', 'score', 'pub_date')
 
+    def create(self, validated_data):
+        # Второй отзыв автора отсекает UniqueConstraint, без отдельной
+        # проверки перед вставкой.
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            raise serializers.ValidationError({
+                'author': ['Этот автор уже оставлял отзыв к произведению'],
+            })
+
 
 class SignupSerializer(serializers.Serializer):
     username = serializers.RegexField(
@@ -91,12 +115,27 @@ class SignupSerializer(serializers.Serializer):
         return value
 
 
+class LowerUniqueValidator(UniqueValidator):
+    """Уникальность без учета регистра для полей, которые хранятся
+    в нижнем регистре: значение сравнивается уже приведенным"""
+
+    def filter_queryset(self, value, queryset, field_name):
+        return super().filter_queryset(value.lower(), queryset, field_name)
+
+
 class UserSerializer(serializers.ModelSerializer):
 
     class Meta:
         fields = ('username', 'email', 'first_name',
                   'last_name', 'bio', 'role')
         model = User
+        extra_kwargs = {
+            'email': {'validators': [LowerUniqueValidator(
+                queryset=User.objects.all())]},
+        }
+
+    def validate_email(self, value):
+        return value.lower()
 
 
 class TokenSerializer(serializers.Serializer):
@@ -119,3 +158,16 @@ class CommentSerializer(serializers.ModelSerializer):
         model = Comment
         fields = ('id', 'text', 'author', 'pub_date',)
         read_only_fields = ('id', 'author', 'pub_date',)
+
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    author = serializers.SlugRelatedField(
+        slug_field='username', read_only=True)
+    throughput = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = ImportJob
+        fields = ('id', 'table', 'format', 'compressed', 'status', 'rows',
+                  'loaded', 'rejected', 'throughput', 'errors', 'author',
+                  'created', 'started', 'finished')
+        read_only_fields = fields
@@ -0,0 +1,71 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_save)
+from django.dispatch import receiver
+
+from reviews.models import Category, Comment, Genre, GenreTitle, Review, Title
+from reviews.signals import bulk_loaded
+from .authentication import CLAIMS
+from .cache import get_response_cache
+from .revocation import revoke_user
+
+User = get_user_model()
+
+# Поля, изменение которых отзывает выданные пользователю токены.
+ACCESS_FIELDS = (*CLAIMS, 'is_active')
+
+MODEL_COLLECTIONS = {
+    User: ('reviews', 'comments'),
+    Title: ('titles',),
+    GenreTitle: ('titles',),
+    Genre: ('genres',),
+    Category: ('categories',),
+    Review: ('reviews',),
+    Comment: ('comments',),
+}
+
+
+def bump_on_commit(*collections):
+    """Версии коллекций меняются после фиксации транзакции.
+
+    Иначе параллельный GET успел бы сохранить в кэше еще не измененные
+    данные под новой версией.
+    """
+    transaction.on_commit(lambda: get_response_cache().bump(*collections))
+
+
+def bump_collections(sender, **kwargs):
+    bump_on_commit(*MODEL_COLLECTIONS[sender])
+
+
+for model in MODEL_COLLECTIONS:
+    post_save.connect(bump_collections, sender=model)
+    post_delete.connect(bump_collections, sender=model)
+    bulk_loaded.connect(bump_collections, sender=model)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_genres_changed(sender, action, **kwargs):
+    if action.startswith('post_'):
+        bump_on_commit('titles')
+
+
+@receiver(pre_save, sender=User)
+def user_access_changing(sender, instance, raw, **kwargs):
+    """Смена роли, прав или активности отзывает токены пользователя,
+    где бы она ни происходила: в API, в админке или в коде"""
+    if raw or instance._state.adding:
+        return
+    loaded = getattr(instance, '_loaded_values', {})
+    if any(field not in loaded for field in ACCESS_FIELDS):
+        loaded = User.objects.filter(pk=instance.pk).values(
+            *ACCESS_FIELDS).first() or {}
+    current = {field: getattr(instance, field) for field in ACCESS_FIELDS}
+    if any(loaded.get(field) != value for field, value in current.items()):
+        revoke_user(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    revoke_user(instance.pk)
@@ -0,0 +1,158 @@
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+# Бакет, который не трогали дольше суток, давно полон: строку можно
+# удалить, поведение не изменится.
+PRUNE_AFTER = 24 * 60 * 60
+PRUNE_EVERY = 1000
+
+
+def parse_rate(rate):
+    """'10/min' -> емкость бакета и пополнение в секунду"""
+    count, period = rate.split('/')
+    count = int(count)
+    return count, count / PERIODS[period[0]]
+
+
+def take_token(state, capacity, per_second, now):
+    """Новое состояние бакета (токены, время) и ожидание в секундах.
+
+    Без сохраненного состояния бакет полон. Ожидание 0 - токен взят.
+    """
+    if state is None:
+        tokens = capacity
+    else:
+        tokens = min(capacity, state[0] + (now - state[1]) * per_second)
+    if tokens >= 1:
+        return (tokens - 1, now), 0
+    return (tokens, now), (1 - tokens) / per_second
+
+
+class MemoryBucketStore:
+    """Бакеты в памяти процесса, давно не использованные вытесняются"""
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def take(self, key, capacity, per_second, now):
+        with self.lock:
+            state, wait = take_token(
+                self.buckets.get(key), capacity, per_second, now)
+            self.buckets[key] = state
+            self.buckets.move_to_end(key)
+            while len(self.buckets) > self.max_entries:
+                self.buckets.popitem(last=False)
+        return wait
+
+    def clear(self):
+        with self.lock:
+            self.buckets.clear()
+
+
+class SQLiteBucketStore:
+    """Бакеты в отдельном файле SQLite, общие для процессов gunicorn.
+
+    Решение - одна короткая транзакция BEGIN IMMEDIATE с чтением
+    и записью строки по первичному ключу.
+    """
+
+    def __init__(self, path, timeout=5):
+        self.path = str(path)
+        self.timeout = timeout
+        self.local = threading.local()
+        self.takes = 0
+
+    def connection(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self.path, timeout=self.timeout, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS buckets ('
+                'key TEXT PRIMARY KEY, tokens REAL NOT NULL, '
+                'updated REAL NOT NULL)')
+            self.local.connection = connection
+        return connection
+
+    def take(self, key, capacity, per_second, now):
+        connection = self.connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            state, wait = take_token(connection.execute(
+                'SELECT tokens, updated FROM buckets WHERE key = ?', (key,),
+            ).fetchone(), capacity, per_second, now)
+            connection.execute(
+                'INSERT OR REPLACE INTO buckets (key, tokens, updated) '
+                'VALUES (?, ?, ?)', (key, *state))
+            self.takes += 1
+            if self.takes % PRUNE_EVERY == 0:
+                connection.execute('DELETE FROM buckets WHERE updated < ?',
+                                   (now - PRUNE_AFTER,))
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        return wait
+
+    def clear(self):
+        self.connection().execute('DELETE FROM buckets')
+
+
+_throttle_store = None
+
+
+def get_throttle_store():
+    global _throttle_store
+    if _throttle_store is None:
+        config = getattr(settings, 'THROTTLE_STORE', {})
+        backend_class = import_string(config.get(
+            'BACKEND', 'api.v1.throttling.MemoryBucketStore'))
+        _throttle_store = backend_class(**config.get('OPTIONS', {}))
+    return _throttle_store
+
+
+def throttle_scope(scope):
+    """throttle_scope для функции-представления с @api_view"""
+    def decorator(view):
+        view.cls.throttle_scope = scope
+        return view
+    return decorator
+
+
+class WriteRateThrottle(BaseThrottle):
+    """Токен-бакет на запись для представлений с throttle_scope.
+
+    Частота области берется из DEFAULT_THROTTLE_RATES в виде '10/min':
+    столько запросов подряд, затем столько же за период. Бакет свой
+    у каждого пользователя, у анонимных - у IP. Чтение не ограничивается.
+    """
+
+    def allow_request(self, request, view):
+        self.wait_time = None
+        scope = getattr(view, 'throttle_scope', None)
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope)
+        if rate is None or request.method in SAFE_METHODS:
+            return True
+        capacity, per_second = parse_rate(rate)
+        if request.user and request.user.is_authenticated:
+            ident = f'user:{request.user.pk}'
+        else:
+            ident = f'ip:{self.get_ident(request)}'
+        self.wait_time = get_throttle_store().take(
+            f'{scope}:{ident}', capacity, per_second, time.time())
+        return not self.wait_time
+
+    def wait(self):
+        return self.wait_time
@@ -1,57 +1,104 @@
+import os
+import uuid
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
-from django.db import IntegrityError
-from django.db.models import Avg
+from django.core.files.move import file_move_safe
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters, mixins, status, viewsets
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework import (filters, mixins, routers, serializers, status,
+                            viewsets)
+from rest_framework.decorators import (action, api_view, parser_classes,
+                                       permission_classes)
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework.reverse import reverse
 
-from reviews.models import Category, Genre, Review, Title
-from .filters import TitleFilter
+from reviews.exporting import EXPORT_FORMATS
+from reviews.importing import TABLES_BY_NAME
+from reviews.jobs import upload_dir, upload_format
+from reviews.models import Category, Genre, ImportJob, Title
+from users.outbox import queue_email
+from .authentication import RoleAccessToken, full_user
+from .bulk import BulkCreateMixin
+from .cache import CachedListMixin, CachedRetrieveMixin
+from .conditional import ConditionalMixin
+from .facets import FACETS, count_facets
+from .filters import PrefixSearchFilter, TitleFilter
+from .nested import NestedParentsMixin
+from .pagination import PubDatePagination, TitlePagination
 from .permissions import (IsAdminOnly, IsAdminOrReadOnly,
                           IsAuthorModeratorAdminOrReadOnly)
+from .queries import max_queries
 from .serializers import (CategorySerializer, CommentSerializer,
-                          GenreSerializer, ReviewSerializer, SignupSerializer,
+                          GenreSerializer, ImportJobSerializer,
+                          RatingStatsSerializer,
+                          ReviewSerializer, SignupSerializer,
                           TitleSerializerRead, TitleSerializerWrite,
                           TokenSerializer, UserSerializer)
+from .throttling import throttle_scope
 
 User = get_user_model()
 
 
+class APIRootView(routers.APIRootView):
+    """Список ресурсов API"""
+    max_queries = 3
+
+
+@max_queries(9)
+@throttle_scope('signup')
 @api_view(['POST'])
 @permission_classes((AllowAny,))
 def signup(request):
-    """Содаем пользователя и получаем письмо с ключом на почту"""
+    """Регистрируем пользователя и ставим в очередь письмо с ключом.
+
+    Повтор запроса безопасен: те же имя и почта находятся первым же
+    запросом, без записи в базу, а письмо в пределах SIGNUP_EMAIL_WINDOW
+    не дублируется. Новый пользователь вставляется с пропуском
+    конфликтов; если после этого он не находится, имя или почта
+    заняты другим пользователем.
+    """
     serializer = SignupSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
     username = serializer.validated_data['username']
     email = serializer.validated_data['email']
-    try:
-        user, created = User.objects.get_or_create(
-            username=username,
-            email=email.lower()
-        )
-    except IntegrityError:
-        return Response(
-            {'message': 'Имя пользователя или почта уже используются.'},
-            status=status.HTTP_400_BAD_REQUEST
+    # Почта хранится в нижнем регистре, см. User.save().
+    lookup = {'username': username, 'email': email.lower()}
+    with transaction.atomic():
+        user = User.objects.filter(**lookup).first()
+        if user is None:
+            User.objects.bulk_create(
+                [User(username=username, email=lookup['email'])],
+                ignore_conflicts=True)
+            user = User.objects.filter(**lookup).first()
+        if user is None:
+            return Response(
+                {'message': 'Имя пользователя или почта уже используются.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        # Письмо уходит через очередь, его отправляет send_emails.
+        confirmation_code = default_token_generator.make_token(user)
+        queue_email(
+            subject='Регистрация на Yamdb',
+            body=f"Your confirmation code: {confirmation_code}",
+            recipient=user.email,
+            key=f'signup:{user.pk}',
+            window=settings.SIGNUP_EMAIL_WINDOW,
         )
-    confirmation_code = default_token_generator.make_token(user)
-    send_mail(
-        subject='Регистрация на Yamdb',
-        message=f"Your confirmation code: {confirmation_code}",
-        from_email=None,
-        recipient_list=[user.email],
-    )
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+@max_queries(4)
+@throttle_scope('token')
 @api_view(['POST'])
 @permission_classes((AllowAny,))
 def token(request):
@@ -66,17 +113,76 @@ def token(request):
         return Response(
             'Неверный код подтверждения', status=status.HTTP_400_BAD_REQUEST
         )
-    token = AccessToken.for_user(user)
+    token = RoleAccessToken.for_user(user)
     return Response({'token': str(token)}, status=status.HTTP_200_OK)
 
 
+@max_queries(3)
+@api_view(['GET'])
+@permission_classes((IsAdminOnly,))
+def export_table(request, table):
+    """Потоковая выгрузка таблицы в csv или ndjson (?output=ndjson)"""
+    if table not in TABLES_BY_NAME:
+        raise NotFound(f'Таблица {table} не найдена')
+    output = request.query_params.get('output', 'csv')
+    if output not in EXPORT_FORMATS:
+        raise NotFound(f'Формат {output} не поддерживается')
+    lines, content_type, extension = EXPORT_FORMATS[output]
+    response = StreamingHttpResponse(
+        lines(TABLES_BY_NAME[table]), content_type=content_type)
+    response['Content-Disposition'] = (
+        f'attachment; filename="{table}.{extension}"')
+    return response
+
+
+@max_queries(4)
+@api_view(['POST'])
+@permission_classes((IsAdminOnly,))
+@parser_classes((MultiPartParser,))
+def import_table(request, table):
+    """Ставим в очередь загрузку файла из поля file в таблицу.
+
+    Файл сразу пишется на диск, без буферизации в памяти; загрузку
+    выполняет команда run_import_jobs.
+    """
+    if table not in TABLES_BY_NAME:
+        raise NotFound(f'Таблица {table} не найдена')
+    request.upload_handlers = [TemporaryFileUploadHandler(request)]
+    upload = request.data.get('file')
+    if not isinstance(upload, UploadedFile):
+        raise ValidationError({'file': 'Передайте файл в поле file'})
+    detected = upload_format(upload.name)
+    if detected is None:
+        raise ValidationError(
+            {'file': 'Поддерживаются файлы csv, ndjson и их gzip'})
+    path = os.path.join(upload_dir(), f'{table}-{uuid.uuid4().hex}')
+    file_move_safe(upload.temporary_file_path(), path)
+    job = ImportJob.objects.create(
+        table=table, path=path, format=detected[0], compressed=detected[1],
+        author=full_user(request.user))
+    return Response(
+        ImportJobSerializer(job).data, status=status.HTTP_202_ACCEPTED,
+        headers={'Location': reverse(
+            'import-jobs-detail', args=(job.pk,), request=request)})
+
+
+class ImportJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """Состояние заданий загрузки"""
+    serializer_class = ImportJobSerializer
+    queryset = ImportJob.objects.select_related('author')
+    max_queries = 5
+    permission_classes = (IsAdminOnly,)
+    pagination_class = LimitOffsetPagination
+
+
 class UserViewSet(viewsets.ModelViewSet):
     serializer_class = UserSerializer
     queryset = User.objects.all()
+    max_queries = 14
     permission_classes = (IsAdminOnly,)
     lookup_field = 'username'
     pagination_class = LimitOffsetPagination
-    filter_backends = (filters.SearchFilter,)
+    filter_backends = (PrefixSearchFilter,)
     search_fields = ('username',)
     http_method_names = ['get', 'post', 'patch', 'delete']
 
@@ -87,7 +193,7 @@ class UserViewSet(viewsets.ModelViewSet):
     )
     def me(self, request):
         """Получаем и обновляем свои данные"""
-        user = request.user
+        user = full_user(request.user)
         if request.method == 'PATCH':
             serializer = UserSerializer(
                 user,
@@ -101,25 +207,55 @@ class UserViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(BulkCreateMixin, ConditionalMixin, CachedListMixin,
+                   CachedRetrieveMixin, viewsets.ModelViewSet):
     permission_classes = (IsAdminOrReadOnly,)
     serializer_class = (TitleSerializerRead, TitleSerializerWrite)
     filterset_class = TitleFilter
-    pagination_class = LimitOffsetPagination
+    pagination_class = TitlePagination
     filter_backends = (DjangoFilterBackend,)
-    queryset = Title.objects.all().annotate(
-        rating=Avg('reviews__score'))
+    queryset = Title.objects.select_related('category').prefetch_related(
+        'genre')
+    cache_collections = ('titles', 'genres', 'categories', 'reviews')
+    max_queries = 16
 
     def get_serializer_class(self):
         if self.request.method == 'GET':
             return TitleSerializerRead
         return TitleSerializerWrite
 
+    @action(detail=False, methods=['GET'])
+    def facets(self, request):
+        """Количество произведений по жанрам, категориям и годам"""
+        return self.cached_response(self.get_facets, request)
+
+    def get_facets(self, request):
+        names = request.query_params.get('facets', ','.join(FACETS))
+        names = [name for name in names.split(',') if name]
+        unknown = set(names) - set(FACETS)
+        if unknown:
+            raise serializers.ValidationError(
+                {'facets': f'Неизвестные фасеты: {", ".join(sorted(unknown))}'}
+            )
+        titles = self.filter_queryset(self.get_queryset())
+        return Response(count_facets(titles, names), status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['GET'], url_path='rating-stats')
+    def rating_stats(self, request, pk=None):
+        """Гистограмма оценок, средняя, медиана и количество отзывов"""
+        return self.cached_response(self.get_rating_stats, request)
 
-class GenreViewSet(mixins.ListModelMixin,
+    def get_rating_stats(self, request):
+        serializer = RatingStatsSerializer(self.get_object())
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class GenreViewSet(BulkCreateMixin, CachedListMixin, mixins.ListModelMixin,
                    mixins.CreateModelMixin, mixins.DestroyModelMixin,
                    viewsets.GenericViewSet):
     queryset = Genre.objects.all()
+    cache_collections = ('genres',)
+    max_queries = 7
     permission_classes = (IsAdminOrReadOnly,)
     serializer_class = GenreSerializer
     pagination_class = LimitOffsetPagination
@@ -128,10 +264,12 @@ class GenreViewSet(mixins.ListModelMixin,
     lookup_field = 'slug'
 
 
-class CategoryViewSet(mixins.ListModelMixin,
-                      mixins.CreateModelMixin, mixins.DestroyModelMixin,
-                      viewsets.GenericViewSet):
+class CategoryViewSet(BulkCreateMixin, CachedListMixin,
+                      mixins.ListModelMixin, mixins.CreateModelMixin,
+                      mixins.DestroyModelMixin, viewsets.GenericViewSet):
     queryset = Category.objects.all().order_by('slug')
+    cache_collections = ('categories',)
+    max_queries = 8
     permission_classes = (IsAdminOrReadOnly,)
     serializer_class = CategorySerializer
     filter_backends = (filters.SearchFilter,)
@@ -139,37 +277,46 @@ class CategoryViewSet(mixins.ListModelMixin,
     lookup_field = 'slug'
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(NestedParentsMixin, ConditionalMixin, CachedListMixin,
+                    CachedRetrieveMixin, viewsets.ModelViewSet):
     permission_classes = IsAuthorModeratorAdminOrReadOnly,
     serializer_class = ReviewSerializer
-
-    def get_title(self):
-        return get_object_or_404(Title, pk=self.kwargs.get('title_id'))
+    pagination_class = PubDatePagination
+    cache_collections = ('titles', 'reviews')
+    throttle_scope = 'reviews'
+    max_queries = 9
 
     def get_queryset(self):
-        return self.get_title().reviews.all().order_by('-pub_date')
+        return self.get_title().reviews.select_related(
+            'author').order_by('-pub_date')
+
+    def get_list_modified(self):
+        return self.get_title().reviews_modified
 
     def perform_create(self, serializer):
         serializer.save(
-            author=self.request.user,
+            author=full_user(self.request.user),
             title=self.get_title()
         )
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(NestedParentsMixin, ConditionalMixin, CachedListMixin,
+                     CachedRetrieveMixin, viewsets.ModelViewSet):
     permission_classes = IsAuthorModeratorAdminOrReadOnly,
     serializer_class = CommentSerializer
-
-    def get_review(self):
-        return get_object_or_404(Review,
-                                 pk=self.kwargs.get('review_id'),
-                                 title__id=self.kwargs.get('title_id'))
+    pagination_class = PubDatePagination
+    cache_collections = ('reviews', 'comments')
+    throttle_scope = 'comments'
+    max_queries = 8
 
     def get_queryset(self):
-        return self.get_review().comments.all()
+        return self.get_review().comments.select_related('author')
+
+    def get_list_modified(self):
+        return self.get_review().comments_modified
 
     def perform_create(self, serializer):
         serializer.save(
-            author=self.request.user,
+            author=full_user(self.request.user),
             review=self.get_review()
         )
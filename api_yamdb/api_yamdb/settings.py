@@ -121,16 +121,63 @@ DEFAULT_FROM_EMAIL = 'reut@admin.com'
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "api.v1.authentication.ClaimsJWTAuthentication",
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.v1.throttling.WriteRateThrottle',
+    ],
+    # Области throttle_scope представлений: запросов подряд / период.
+    'DEFAULT_THROTTLE_RATES': {
+        'signup': '20/hour',
+        'token': '20/hour',
+        'reviews': '30/min',
+        'comments': '60/min',
+    },
+    # Сколько доверенных прокси стоит перед приложением. При 0 клиент
+    # определяется по REMOTE_ADDR, а X-Forwarded-For, который клиент
+    # может подставить сам, не учитывается.
+    'NUM_PROXIES': 0,
+}
+
+# Счетчики ограничения частоты. MemoryBucketStore хранит их в памяти
+# процесса; общие для всех процессов gunicorn - SQLiteBucketStore
+# с OPTIONS {'path': BASE_DIR / 'throttle.sqlite3'}.
+THROTTLE_STORE = {
+    'BACKEND': 'api.v1.throttling.MemoryBucketStore',
+    'OPTIONS': {'max_entries': 10000},
 }
 
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(hours=2),
     "AUTH_HEADER_TYPES": ("Bearer",),
 }
+
+# Превышение бюджета запросов max_queries представления: 'log' - запись
+# в журнал, 'raise' - ошибка запроса. Проверка включается добавлением
+# 'api.v1.queries.QueryBudgetMiddleware' в MIDDLEWARE.
+QUERY_BUDGET_MODE = 'log'
+
+# Повторная регистрация в течение этого времени не ставит в очередь
+# еще одно письмо с кодом.
+SIGNUP_EMAIL_WINDOW = timedelta(minutes=5)
+
+# Как часто процесс перечитывает список отозванных токенов, секунд.
+TOKEN_REVOCATION_REFRESH = 5
+
+# Ответы хранятся в памяти процесса не дольше timeout секунд.
+RESPONSE_CACHE = {
+    'BACKEND': 'api.v1.cache.LRUCacheBackend',
+    'OPTIONS': {'max_entries': 1024, 'timeout': 300},
+}
+
+# Каталог для файлов, загруженных через API до выполнения run_import_jobs.
+IMPORT_UPLOAD_DIR = BASE_DIR / 'uploads'
+
+# Задание, выполнение которого не отмечалось дольше этого времени, считается
+# брошенным упавшим процессом и возвращается в очередь.
+IMPORT_JOB_LEASE = timedelta(minutes=10)
@@ -0,0 +1,95 @@
+import datetime as dt
+import os
+import time
+
+from .importing import CsvRows
+from .models import ImportCheckpoint
+
+PROGRESS_INTERVAL = 5
+
+
+class CheckpointMismatch(Exception):
+    """Файл изменился после прерванной загрузки"""
+
+
+def file_stamp(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+class Checkpoints:
+    """Позиции загрузки файлов, сохраняемые вместе с каждым пакетом.
+
+    Без resume прежние позиции удаляются и загрузка идет с начала.
+    """
+
+    def __init__(self, path, resume=False):
+        self.path = path
+        self.states = {}
+        if not resume:
+            ImportCheckpoint.objects.all().delete()
+
+    def open(self, table):
+        """CsvRows с сохраненной позиции или None, если файл загружен"""
+        path = os.path.join(self.path, table.file)
+        size, mtime = file_stamp(path)
+        state, _ = ImportCheckpoint.objects.get_or_create(
+            table=table.name, defaults={'size': size, 'mtime': mtime})
+        if (state.size, state.mtime) != (size, mtime):
+            raise CheckpointMismatch(
+                f'Файл {table.file} изменился после прерванной загрузки')
+        self.states[table.name] = state
+        if state.done:
+            return None
+        return CsvRows(path, state.offset, state.rows)
+
+    def commit(self, table, rows, offset):
+        """Вызывается в транзакции пакета"""
+        state = self.states[table.name]
+        state.rows += rows
+        state.offset = offset
+        state.save(update_fields=('rows', 'offset', 'updated'))
+
+    def finish(self, table):
+        state = self.states[table.name]
+        state.done = True
+        state.save(update_fields=('done', 'updated'))
+
+
+def format_eta(seconds):
+    return str(dt.timedelta(seconds=round(seconds)))
+
+
+class Progress:
+    """Прогресс загрузки файла с оценкой оставшегося времени.
+
+    Скорость считается по байтам с первого сохраненного пакета таблицы,
+    строка выводится не чаще раза в interval секунд.
+    """
+
+    def __init__(self, write, interval=PROGRESS_INTERVAL,
+                 clock=time.monotonic):
+        self.write = write
+        self.interval = interval
+        self.clock = clock
+        self.table = None
+
+    def update(self, table, rows, offset, size):
+        now = self.clock()
+        if table is not self.table:
+            self.table = table
+            self.started = self.shown = now
+            self.start_offset = offset
+            return
+        if now - self.shown < self.interval:
+            return
+        self.shown = now
+        elapsed = now - self.started
+        done = offset - self.start_offset
+        percent = offset / size * 100 if size else 100
+        message = f'{table.file}: {rows} строк, {percent:.0f}%'
+        if elapsed and done:
+            eta = (size - offset) * elapsed / done
+            message += (f', {done / elapsed / 2 ** 20:.1f} МБ/с, '
+                        f'осталось {format_eta(eta)}')
+        self.write(message)
@@ -0,0 +1,47 @@
+import csv
+import json
+from datetime import datetime
+
+DEFAULT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """Буфер для csv.writer, который возвращает строку вместо записи"""
+
+    def write(self, value):
+        return value
+
+
+def format_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def export_rows(table, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Строки таблицы в порядке id, без загрузки всей таблицы в память"""
+    queryset = table.model.objects.order_by('id').values_list(*table.fields)
+    for values in queryset.iterator(chunk_size=chunk_size):
+        yield [format_value(value) for value in values]
+
+
+def csv_lines(table, chunk_size=DEFAULT_CHUNK_SIZE):
+    writer = csv.writer(Echo())
+    yield writer.writerow(table.columns)
+    for row in export_rows(table, chunk_size):
+        yield writer.writerow(row)
+
+
+def ndjson_lines(table, chunk_size=DEFAULT_CHUNK_SIZE):
+    for row in export_rows(table, chunk_size):
+        yield json.dumps(
+            dict(zip(table.columns, row)), ensure_ascii=False) + '\n'
+
+
+EXPORT_FORMATS = {
+    'csv': (csv_lines, 'text/csv; charset=utf-8', 'csv'),
+    'ndjson': (ndjson_lines, 'application/x-ndjson; charset=utf-8',
+               'ndjson'),
+}
@@ -0,0 +1,72 @@
+from contextlib import contextmanager
+
+from .search import FTS_TABLE, install_fts, uninstall_fts
+
+FAST_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'OFF',
+    # Отрицательное значение задает размер кэша в КиБ: 256 МиБ.
+    'cache_size': '-262144',
+}
+
+
+def pragma(cursor, name, value=None):
+    if value is None:
+        cursor.execute(f'PRAGMA {name}')
+    else:
+        cursor.execute(f'PRAGMA {name} = {value}')
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def secondary_indexes(cursor, tables):
+    """Неуникальные индексы, созданные CREATE INDEX, с их SQL.
+
+    Уникальные индексы остаются: без них загрузка пропустит дубликаты.
+    """
+    placeholders = ', '.join(['%s'] * len(tables))
+    cursor.execute(
+        'SELECT name, sql FROM sqlite_master WHERE type = %s '
+        f'AND tbl_name IN ({placeholders}) AND sql IS NOT NULL '
+        "AND sql NOT LIKE 'CREATE UNIQUE%%'",
+        ['index', *tables])
+    return cursor.fetchall()
+
+
+@contextmanager
+def fast_load(connection, tables):
+    """Режим быстрой загрузки SQLite для таблиц моделей tables.
+
+    Включает WAL, отключает синхронную запись на диск, увеличивает кэш,
+    удаляет вторичные индексы и триггеры поиска. При выходе, в том числе
+    по ошибке, индексы и поиск восстанавливаются, настройки возвращаются,
+    а после успешной загрузки выполняется ANALYZE.
+    """
+    if connection.vendor != 'sqlite':
+        yield
+        return
+    db_tables = [model._meta.db_table for model in tables]
+    with connection.cursor() as cursor:
+        saved = {name: pragma(cursor, name) for name in FAST_PRAGMAS}
+        indexes = secondary_indexes(cursor, db_tables)
+        has_fts = FTS_TABLE in connection.introspection.table_names(cursor)
+        for name, value in FAST_PRAGMAS.items():
+            pragma(cursor, name, value)
+        for name, _ in indexes:
+            cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
+        if has_fts:
+            uninstall_fts(connection)
+    completed = False
+    try:
+        yield
+        completed = True
+    finally:
+        with connection.cursor() as cursor:
+            for _, sql in indexes:
+                cursor.execute(sql)
+            if has_fts:
+                install_fts(connection)
+            if completed:
+                cursor.execute('ANALYZE')
+            for name, value in saved.items():
+                pragma(cursor, name, value)
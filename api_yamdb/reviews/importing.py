@@ -0,0 +1,232 @@
+import os
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from csv import DictReader, reader
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Category, Comment, Genre, GenreTitle, Review, Title
+from .signals import bulk_loaded
+
+User = get_user_model()
+
+DEFAULT_BATCH_SIZE = 1000
+
+Table = namedtuple(
+    'Table',
+    ('name', 'model', 'file', 'parse', 'depends_on', 'columns', 'fields'))
+
+
+def parse_user(row):
+    return {
+        'id': int(row['id']),
+        'username': row['username'],
+        'email': row['email'].lower(),
+        'role': row['role'],
+        'bio': row['bio'],
+        'first_name': row['first_name'],
+        'last_name': row['last_name'],
+    }
+
+
+def parse_category(row):
+    return {'id': int(row['id']), 'name': row['name'], 'slug': row['slug']}
+
+
+def parse_genre(row):
+    return {'id': int(row['id']), 'name': row['name'], 'slug': row['slug']}
+
+
+def parse_title(row):
+    values = {
+        'id': int(row['id']),
+        'name': row['name'],
+        'year': int(row['year']),
+        'category_id': int(row['category']) if row['category'] else None,
+    }
+    # В исходных файлах описания нет, тогда остается значение по умолчанию.
+    if row.get('description') is not None:
+        values['description'] = row['description']
+    return values
+
+
+def parse_genre_title(row):
+    return {
+        'id': int(row['id']),
+        'title_id': int(row['title_id']),
+        'genre_id': int(row['genre_id']),
+    }
+
+
+def parse_review(row):
+    return {
+        'id': int(row['id']),
+        'text': row['text'],
+        'title_id': int(row['title_id']),
+        'author_id': int(row['author']),
+        'score': int(row['score']),
+        'pub_date': parse_datetime(row['pub_date']),
+    }
+
+
+def parse_comment(row):
+    return {
+        'id': int(row['id']),
+        'review_id': int(row['review_id']),
+        'text': row['text'],
+        'author_id': int(row['author']),
+        'pub_date': parse_datetime(row['pub_date']),
+    }
+
+
+TABLES = (
+    Table('users', User, 'users.csv', parse_user, (),
+          ('id', 'username', 'email', 'role', 'bio', 'first_name',
+           'last_name'),
+          ('id', 'username', 'email', 'role', 'bio', 'first_name',
+           'last_name')),
+    Table('category', Category, 'category.csv', parse_category, (),
+          ('id', 'name', 'slug'), ('id', 'name', 'slug')),
+    Table('genre', Genre, 'genre.csv', parse_genre, (),
+          ('id', 'name', 'slug'), ('id', 'name', 'slug')),
+    Table('titles', Title, 'titles.csv', parse_title, ('category',),
+          ('id', 'name', 'year', 'category', 'description'),
+          ('id', 'name', 'year', 'category_id', 'description')),
+    Table('genre_title', GenreTitle, 'genre_title.csv', parse_genre_title,
+          ('titles', 'genre'),
+          ('id', 'title_id', 'genre_id'), ('id', 'title_id', 'genre_id')),
+    Table('review', Review, 'review.csv', parse_review, ('titles', 'users'),
+          ('id', 'title_id', 'text', 'author', 'score', 'pub_date'),
+          ('id', 'title_id', 'text', 'author_id', 'score', 'pub_date')),
+    Table('comments', Comment, 'comments.csv', parse_comment,
+          ('review', 'users'),
+          ('id', 'review_id', 'text', 'author', 'pub_date'),
+          ('id', 'review_id', 'text', 'author_id', 'pub_date')),
+)
+TABLES_BY_NAME = {table.name: table for table in TABLES}
+
+
+class CsvRows:
+    """Строки csv файла начиная с позиции offset в байтах.
+
+    Во время чтения offset указывает на конец последней выданной строки,
+    а number считает строки файла, включая пропущенные до offset.
+    """
+
+    def __init__(self, path, offset=0, number=0):
+        self.path = path
+        self.offset = offset
+        self.number = number
+        self.size = os.path.getsize(path)
+
+    def lines(self, file):
+        for line in file:
+            self.offset += len(line)
+            yield line.decode('utf8')
+
+    def __iter__(self):
+        with open(self.path, 'rb') as file:
+            header = next(reader([file.readline().decode('utf8')]), [])
+            self.offset = max(self.offset, file.tell())
+            file.seek(self.offset)
+            for row in DictReader(self.lines(file), fieldnames=header):
+                self.number += 1
+                yield row
+
+
+def read_rows(path):
+    yield from CsvRows(path)
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+@contextmanager
+def keep_auto_now_add(model):
+    """Сохраняем даты из файла в полях с auto_now_add"""
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def insert_batch(table, values, batch_size=DEFAULT_BATCH_SIZE):
+    table.model.objects.bulk_create(
+        [table.model(**fields) for fields in values], batch_size=batch_size)
+
+
+def load_table(table, rows, batch_size=DEFAULT_BATCH_SIZE, validator=None,
+               on_batch=None):
+    """Загружаем строки CsvRows пакетами bulk_create.
+
+    Каждый пакет сохраняется в своей транзакции, в ней же вызывается
+    on_batch(table, строк в пакете, позиция в файле). С validator строки,
+    не прошедшие проверку, пропускаются. Возвращает количество строк
+    и время загрузки в секундах.
+    """
+    started = time.monotonic()
+    count = 0
+    start = rows.number
+    with keep_auto_now_add(table.model):
+        for batch in batched(rows, batch_size):
+            if validator:
+                values = validator.filter(table, batch, start)
+            else:
+                values = [table.parse(row) for row in batch]
+            start += len(batch)
+            with transaction.atomic():
+                insert_batch(table, values, batch_size)
+                if on_batch:
+                    on_batch(table, len(batch), rows.offset)
+            count += len(values)
+    return count, time.monotonic() - started
+
+
+def refresh_denormalized():
+    """bulk_create не вызывает сигналы, поэтому пересчитываем рейтинги"""
+    Title.objects.refresh_rating()
+
+
+def mark_loaded(models):
+    """Метки изменения и сигнал bulk_loaded после загрузки в обход save().
+
+    Какие строки изменились, неизвестно, поэтому метки обновляются
+    у всех произведений или отзывов, которые могут их показывать.
+    Кэш ответов сбрасывается после фиксации транзакции.
+    """
+    models = set(models)
+    now = timezone.now()
+    title_changes = {}
+    if models & {Title, GenreTitle, Genre, Category, Review}:
+        title_changes['modified'] = now
+    if models & {Review, User}:
+        title_changes['reviews_modified'] = now
+    with transaction.atomic():
+        if title_changes:
+            Title.objects.update(**title_changes)
+        if models & {Comment, User}:
+            Review.objects.update(comments_modified=now)
+        if User in models:
+            # Имена авторов входят в тела отзывов и комментариев.
+            Review.objects.update(modified=now)
+            Comment.objects.update(modified=now)
+        for model in models:
+            bulk_loaded.send(sender=model)
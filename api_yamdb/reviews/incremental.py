@@ -0,0 +1,142 @@
+import hashlib
+import json
+import time
+
+from django.db import connection, transaction
+
+from .importing import (DEFAULT_BATCH_SIZE, batched, keep_auto_now_add,
+                        read_rows)
+from .models import ImportChunk, ImportFile, Review, Title
+
+DEFAULT_CHUNK_SIZE = 10000
+UPSERT_VENDORS = ('sqlite', 'postgresql')
+
+
+def file_checksum(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_checksum(rows):
+    payload = json.dumps(rows, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def upsert(model, objects, update_fields):
+    """INSERT ... ON CONFLICT (pk) DO UPDATE для пакета объектов.
+
+    Обновляются поля update_fields и поля с auto_now.
+    """
+    fields = model._meta.concrete_fields
+    pk = model._meta.pk
+    updated = [
+        field for field in fields
+        if field is not pk and (
+            field.attname in update_fields
+            or getattr(field, 'auto_now', False))
+    ]
+    if connection.vendor not in UPSERT_VENDORS:
+        existing = set(model.objects.filter(
+            pk__in=[obj.pk for obj in objects]).values_list('pk', flat=True))
+        model.objects.bulk_update(
+            [obj for obj in objects if obj.pk in existing],
+            [field.name for field in updated])
+        model.objects.bulk_create(
+            [obj for obj in objects if obj.pk not in existing])
+        return
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(field.column) for field in fields)
+    row = f'({", ".join(["%s"] * len(fields))})'
+    assignments = ', '.join(
+        f'{quote(field.column)} = excluded.{quote(field.column)}'
+        for field in updated)
+    max_params = connection.features.max_query_params or 30000
+    with connection.cursor() as cursor:
+        for batch in batched(objects, max(1, max_params // len(fields))):
+            params = [
+                field.get_db_prep_save(field.pre_save(obj, True), connection)
+                for obj in batch for field in fields
+            ]
+            cursor.execute(
+                f'INSERT INTO {quote(model._meta.db_table)} ({columns}) '
+                f'VALUES {", ".join([row] * len(batch))} '
+                f'ON CONFLICT ({quote(pk.column)}) DO UPDATE SET '
+                f'{assignments}',
+                params)
+
+
+def load_values(table, values, batch_size):
+    """upsert строк пакетами, возвращает id произведений для пересчета"""
+    title_ids = set()
+    for batch in batched(values, batch_size):
+        if table.model is Review:
+            # Отзыв мог перейти к другому произведению: прежнее тоже
+            # пересчитывается.
+            title_ids.update(Review.objects.filter(
+                pk__in=[fields['id'] for fields in batch],
+            ).values_list('title_id', flat=True))
+            title_ids.update(fields['title_id'] for fields in batch)
+        upsert(
+            table.model,
+            [table.model(**fields) for fields in batch],
+            set(batch[0]))
+    return title_ids
+
+
+def sync_table(table, path, chunk_size=DEFAULT_CHUNK_SIZE,
+               batch_size=DEFAULT_BATCH_SIZE, validator=None):
+    """Загружаем только изменившиеся блоки файла с обновлением по id.
+
+    Возвращает словарь со статистикой. Строки, удаленные из файла,
+    из базы не удаляются, строки, не прошедшие проверку validator,
+    пропускаются. Контрольные суммы блока с отклоненными строками
+    и всего файла тогда не сохраняются: строка, ссылавшаяся на еще не
+    загруженную запись, будет проверена снова при следующей загрузке.
+    """
+    started = time.monotonic()
+    stats = {'chunks': 0, 'changed': 0, 'rows': 0, 'skipped': False}
+    checksum = file_checksum(path)
+    state = ImportFile.objects.filter(table=table.name).first()
+    if (state and state.checksum == checksum
+            and state.chunk_size == chunk_size):
+        stats['skipped'] = True
+        stats['elapsed'] = time.monotonic() - started
+        return stats
+    known = {}
+    if state and state.chunk_size == chunk_size:
+        known = dict(state.chunks.values_list('index', 'checksum'))
+    title_ids = set()
+    rejected = False
+    with transaction.atomic(), keep_auto_now_add(table.model):
+        state, _ = ImportFile.objects.update_or_create(
+            table=table.name,
+            defaults={'checksum': '', 'chunk_size': chunk_size})
+        for index, rows in enumerate(batched(read_rows(path), chunk_size)):
+            stats['chunks'] += 1
+            digest = chunk_checksum(rows)
+            if known.get(index) == digest:
+                continue
+            if validator:
+                values = validator.filter(table, rows, index * chunk_size)
+            else:
+                values = [table.parse(row) for row in rows]
+            title_ids.update(load_values(table, values, batch_size))
+            if len(values) < len(rows):
+                rejected = True
+                state.chunks.filter(index=index).delete()
+            else:
+                ImportChunk.objects.update_or_create(
+                    file=state, index=index, defaults={'checksum': digest})
+            stats['changed'] += 1
+            stats['rows'] += len(values)
+        state.chunks.filter(index__gte=stats['chunks']).delete()
+        if not rejected:
+            state.checksum = checksum
+            state.save(update_fields=('checksum',))
+        for ids in batched(title_ids, batch_size):
+            Title.objects.filter(pk__in=ids).refresh_rating()
+    stats['elapsed'] = time.monotonic() - started
+    return stats
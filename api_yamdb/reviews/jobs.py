@@ -0,0 +1,148 @@
+import csv
+import gzip
+import json
+import logging
+import os
+from itertools import islice
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from .importing import (DEFAULT_BATCH_SIZE, TABLES_BY_NAME, CsvRows,
+                        load_table, mark_loaded, refresh_denormalized)
+from .models import ImportJob
+from .validation import RejectReport, Validator
+
+# Расширения загружаемых файлов и их форматы.
+UPLOAD_FORMATS = {'.csv': 'csv', '.ndjson': 'ndjson', '.jsonl': 'ndjson'}
+# Сколько отклоненных строк сохраняется в задании, полный отчет
+# остается в файле рядом с загрузкой.
+MAX_JOB_ERRORS = 100
+
+logger = logging.getLogger(__name__)
+
+
+def upload_dir():
+    path = settings.IMPORT_UPLOAD_DIR
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def upload_format(filename):
+    """Формат и признак сжатия по имени файла, None для неизвестных"""
+    name = filename.lower()
+    compressed = name.endswith('.gz')
+    if compressed:
+        name = name[:-len('.gz')]
+    extension = os.path.splitext(name)[1]
+    if extension not in UPLOAD_FORMATS:
+        return None
+    return UPLOAD_FORMATS[extension], compressed
+
+
+def open_upload(job):
+    opener = gzip.open if job.compressed else open
+    return opener(job.path, 'rt', encoding='utf8', newline='')
+
+
+def ndjson_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return str(int(value))
+    return str(value)
+
+
+def prepare_csv(job, table):
+    """Приводим загрузку к csv, который читает import_csv"""
+    if job.format == 'csv' and not job.compressed:
+        return job.path
+    path = f'{job.path}.csv'
+    with open_upload(job) as source, \
+            open(path, 'w', encoding='utf8', newline='') as target:
+        if job.format == 'csv':
+            for block in iter(lambda: source.read(1 << 20), ''):
+                target.write(block)
+            return path
+        writer = csv.writer(target)
+        writer.writerow(table.columns)
+        for line in source:
+            if line.strip():
+                row = json.loads(line)
+                writer.writerow(
+                    ndjson_value(row.get(column)) for column in table.columns)
+    return path
+
+
+def read_errors(path, limit=MAX_JOB_ERRORS):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf8') as file:
+        return [json.loads(line) for line in islice(file, limit)]
+
+
+def requeue_stale_jobs():
+    """Возвращаем в очередь задания, выполнение которых не отмечалось
+    дольше IMPORT_JOB_LEASE: процесс, забравший их, упал.
+
+    Пакеты, сохраненные до падения, остаются в базе, при повторной
+    загрузке их строки отклоняются проверкой как повторы.
+    """
+    return ImportJob.objects.filter(
+        status=ImportJob.Status.RUNNING,
+        heartbeat__lt=timezone.now() - settings.IMPORT_JOB_LEASE,
+    ).update(status=ImportJob.Status.QUEUED, started=None, heartbeat=None,
+             rows=0)
+
+
+def run_job(job, batch_size=DEFAULT_BATCH_SIZE):
+    """Загрузка файла задания тем же путем, что и в import_csv.
+
+    Задание забирается, только если оно еще в очереди; возвращает
+    True, если загрузка выполнялась. Каждый пакет продлевает отметку
+    выполнения heartbeat. Пакеты, сохраненные до ошибки, остаются
+    в базе, загруженный файл после выполнения удаляется.
+    """
+    now = timezone.now()
+    claimed = ImportJob.objects.filter(
+        pk=job.pk, status=ImportJob.Status.QUEUED,
+    ).update(status=ImportJob.Status.RUNNING, started=now, heartbeat=now)
+    if not claimed:
+        return False
+    job.refresh_from_db()
+    table = TABLES_BY_NAME[job.table]
+    report = RejectReport(f'{job.path}.errors.jsonl')
+
+    def batch_loaded(table, rows, offset):
+        ImportJob.objects.filter(pk=job.pk).update(
+            rows=F('rows') + rows, heartbeat=timezone.now())
+
+    try:
+        path = prepare_csv(job, table)
+        job.loaded, _ = load_table(
+            table, CsvRows(path), batch_size, Validator(report),
+            batch_loaded)
+        job.status = ImportJob.Status.DONE
+    except Exception as error:
+        logger.exception('Задание загрузки %s завершилось ошибкой', job.pk)
+        job.status = ImportJob.Status.FAILED
+        job.errors = [{'error': str(error)}]
+    finally:
+        report.close()
+        # Пакеты сохраняются и при ошибке, поэтому рейтинги, метки
+        # изменения и кэш ответов обновляются в любом случае.
+        if table.name == 'review':
+            refresh_denormalized()
+        mark_loaded([table.model])
+        job.rows = ImportJob.objects.values_list(
+            'rows', flat=True).get(pk=job.pk)
+        job.rejected = report.total
+        job.errors += read_errors(report.path)
+        job.finished = timezone.now()
+        job.save(update_fields=(
+            'status', 'rows', 'loaded', 'rejected', 'errors', 'finished'))
+        for path in {job.path, f'{job.path}.csv'}:
+            if os.path.exists(path):
+                os.remove(path)
+    return True
@@ -0,0 +1,48 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews.exporting import DEFAULT_CHUNK_SIZE, csv_lines
+from reviews.importing import TABLES, TABLES_BY_NAME
+
+
+class Command(BaseCommand):
+    help = ('Выгружает данные в csv файлы того же формата, что читает '
+            'import_csv')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='Каталог для csv файлов')
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help='Количество строк, читаемых из базы за один раз')
+        parser.add_argument(
+            '--tables',
+            nargs='+',
+            choices=list(TABLES_BY_NAME),
+            help='Выгрузить только указанные таблицы')
+
+    def handle(self, *args, **options):
+        tables = TABLES
+        if options['tables']:
+            tables = [TABLES_BY_NAME[name] for name in options['tables']]
+        if not os.path.isdir(options['path']):
+            raise CommandError(f'Каталог {options["path"]} не найден')
+        for table in tables:
+            started = time.monotonic()
+            count = 0
+            lines = csv_lines(table, options['chunk_size'])
+            path = os.path.join(options['path'], table.file)
+            with open(path, 'w', encoding='utf8', newline='') as file:
+                file.write(next(lines))
+                for line in lines:
+                    file.write(line)
+                    count += 1
+            self.stdout.write(
+                f'{table.file}: {count} строк за '
+                f'{time.monotonic() - started:.2f} с')
+        self.stdout.write(self.style.SUCCESS('Данные выгружены'))
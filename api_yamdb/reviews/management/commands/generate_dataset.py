@@ -0,0 +1,164 @@
+import csv
+import datetime as dt
+import os
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews.importing import TABLES_BY_NAME
+
+WORDS = (
+    'время', 'дом', 'путь', 'ночь', 'море', 'город', 'война', 'любовь',
+    'тайна', 'звезда', 'огонь', 'ветер', 'сердце', 'мир', 'тень', 'свет',
+    'зима', 'лето', 'дорога', 'остров', 'река', 'небо', 'сон', 'память',
+    'герой', 'мастер', 'побег', 'охота', 'игра', 'песня', 'история', 'день',
+)
+START_DATE = dt.datetime(2015, 1, 1, tzinfo=dt.timezone.utc)
+END_DATE = dt.datetime(2023, 1, 1, tzinfo=dt.timezone.utc)
+# Показатели неравномерности: чем больше, тем сильнее популярные
+# произведения и активные авторы отрываются от остальных.
+TITLE_SKEW = 1.1
+AUTHOR_SKEW = 3
+REVIEW_SKEW = 2
+
+
+def skewed_index(rng, size, skew):
+    """Индекс от 0 до size - 1, маленькие индексы выпадают чаще"""
+    return min(size - 1, int(size * rng.random() ** skew))
+
+
+def phrase(rng, low, high):
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(low, high)))
+
+
+def timestamp(rng):
+    seconds = (END_DATE - START_DATE).total_seconds()
+    moment = START_DATE + dt.timedelta(seconds=rng.random() * seconds)
+    return moment.isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+
+def reviews_per_title(total, titles, users):
+    """Распределяем отзывы по произведениям по закону Ципфа.
+
+    Одно произведение получает не больше отзывов, чем есть авторов,
+    потому что автор оставляет только один отзыв на произведение.
+    """
+    if total > titles * users:
+        raise CommandError(
+            'Отзывов больше, чем пар произведение-автор: '
+            f'{total} > {titles} * {users}')
+    weights = [1 / rank ** TITLE_SKEW for rank in range(1, titles + 1)]
+    scale = total / sum(weights)
+    counts = [min(users, int(weight * scale)) for weight in weights]
+    remainder = total - sum(counts)
+    while remainder:
+        for index in range(titles):
+            if not remainder:
+                break
+            if counts[index] < users:
+                counts[index] += 1
+                remainder -= 1
+    return counts
+
+
+def distinct_authors(rng, count, users):
+    if count * 2 > users:
+        return rng.sample(range(users), count)
+    chosen = set()
+    while len(chosen) < count:
+        chosen.add(skewed_index(rng, users, AUTHOR_SKEW))
+    return list(chosen)
+
+
+class Command(BaseCommand):
+    help = ('Создает воспроизводимый набор данных для нагрузочного '
+            'тестирования в формате csv файлов import_csv')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Каталог для csv файлов')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--genres', type=int, default=30)
+        parser.add_argument('--titles', type=int, default=1000)
+        parser.add_argument('--reviews', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=20000)
+
+    def write(self, table_name, rows):
+        table = TABLES_BY_NAME[table_name]
+        path = os.path.join(self.path, table.file)
+        count = 0
+        with open(path, 'w', encoding='utf8', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(table.columns)
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+        self.stdout.write(f'{table.file}: {count} строк')
+
+    def handle(self, *args, **options):
+        self.path = options['path']
+        if not os.path.isdir(self.path):
+            raise CommandError(f'Каталог {self.path} не найден')
+        for name in ('users', 'categories', 'genres', 'titles'):
+            if options[name] < 1:
+                raise CommandError(f'--{name} должно быть больше нуля')
+        if options['comments'] and not options['reviews']:
+            raise CommandError('Комментариям нужны отзывы')
+        rng = random.Random(options['seed'])
+        users = options['users']
+        titles = options['titles']
+        genres = options['genres']
+        categories = options['categories']
+        counts = reviews_per_title(options['reviews'], titles, users)
+
+        self.write('users', self.users(users))
+        self.write('category', (
+            (index, f'Категория {index}', f'category-{index}')
+            for index in range(1, categories + 1)))
+        self.write('genre', (
+            (index, f'Жанр {index}', f'genre-{index}')
+            for index in range(1, genres + 1)))
+        self.write('titles', (
+            (index, phrase(rng, 1, 4).capitalize(),
+             rng.randint(1900, END_DATE.year),
+             rng.randint(1, categories), phrase(rng, 5, 20))
+            for index in range(1, titles + 1)))
+        self.write('genre_title', self.genre_titles(rng, titles, genres))
+        self.write('review', self.reviews(rng, counts, users))
+        self.write('comments', (
+            (index, skewed_index(rng, options['reviews'], REVIEW_SKEW) + 1,
+             phrase(rng, 3, 30), skewed_index(rng, users, AUTHOR_SKEW) + 1,
+             timestamp(rng))
+            for index in range(1, options['comments'] + 1)))
+        self.stdout.write(self.style.SUCCESS('Набор данных создан'))
+
+    @staticmethod
+    def users(count):
+        for index in range(1, count + 1):
+            role = 'user'
+            if index % 1000 == 0:
+                role = 'admin'
+            elif index % 100 == 0:
+                role = 'moderator'
+            yield (index, f'user{index}', f'user{index}@yamdb.fake', role,
+                   '', '', '')
+
+    @staticmethod
+    def genre_titles(rng, titles, genres):
+        index = 0
+        for title in range(1, titles + 1):
+            for genre in rng.sample(range(1, genres + 1),
+                                    min(genres, rng.randint(1, 3))):
+                index += 1
+                yield index, title, genre
+
+    @staticmethod
+    def reviews(rng, counts, users):
+        """Отзывы идут от популярных произведений к редким"""
+        index = 0
+        for title, count in enumerate(counts, 1):
+            for author in distinct_authors(rng, count, users):
+                index += 1
+                yield (index, title, phrase(rng, 3, 40), author + 1,
+                       rng.randint(1, 10), timestamp(rng))
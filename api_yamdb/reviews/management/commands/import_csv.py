@@ -1,12 +1,17 @@
 import logging
-from csv import DictReader
+import os
 
-from django.contrib.auth import get_user_model
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
 
-from reviews.models import Category, Comment, Genre, Title, Review, GenreTitle
-
-User = get_user_model()
+from reviews.checkpoints import (PROGRESS_INTERVAL, CheckpointMismatch,
+                                 Checkpoints, Progress)
+from reviews.fastload import fast_load
+from reviews.importing import (DEFAULT_BATCH_SIZE, TABLES, load_table,
+                               mark_loaded, refresh_denormalized)
+from reviews.incremental import sync_table
+from reviews.pipeline import DEFAULT_CHUNK_SIZE, run_pipeline
+from reviews.validation import DEFAULT_REPORT, RejectReport, Validator
 
 MESSAGE = 'Данные успешно загружены в таблицу'
 SUCCESS_MESSAGE = 'Все данные успешно загружены'
@@ -22,77 +27,144 @@ logging.basicConfig(
 class Command(BaseCommand):
     help = 'Команда для создания БД на основе имеющихся csv файлов'
 
-    def genre_create(row):
-        Genre.objects.create(
-            id=row['id'],
-            name=row['name'],
-            slug=row['slug'])
-
-    def category_create(row):
-        Category.objects.create(
-            id=row['id'],
-            name=row['name'],
-            slug=row['slug'])
-
-    def title_create(row):
-        Title.objects.create(
-            id=row['id'],
-            name=row['name'],
-            year=row['year'],
-            category=Category.objects.get(id=row['category']))
-
-    def genre_title_create(row):
-        GenreTitle.objects.create(
-            id=row['id'],
-            title_id=row['title_id'],
-            genre_id=row['genre_id'])
-
-    def user_create(row):
-        User.objects.create(
-            id=row['id'],
-            username=row['username'],
-            email=row['email'],
-            role=row['role'],
-            bio=row['bio'],
-            first_name=row['first_name'],
-            last_name=row['last_name'])
-
-    def comment_create(row):
-        Comment.objects.create(
-            id=row['id'],
-            review_id=row['review_id'],
-            text=row['text'],
-            author_id=row['author'],
-            pub_date=row['pub_date'])
-
-    def review_create(row):
-        Review.objects.create(
-            id=row['id'],
-            text=row['text'],
-            title_id=row['title_id'],
-            author_id=row['author'],
-            score=row['score'],
-            pub_date=row['pub_date'])
-
-    ACTIONS = [
-        (user_create, User, 'users.csv'),
-        (category_create, Category, 'category.csv'),
-        (genre_create, Genre, 'genre.csv'),
-        (title_create, Title, 'titles.csv'),
-        (genre_title_create, GenreTitle, 'genre_title.csv'),
-        (review_create, Review, 'review.csv'),
-        (comment_create, Comment, 'comments.csv'),
-    ]
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default='static/data',
+            help='Каталог с csv файлами')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Количество строк в одном INSERT')
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Количество процессов для разбора строк; при 1 файлы '
+                 'загружаются последовательно в одном процессе')
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help='Количество строк в одном задании на разбор; в режиме '
+                 '--incremental размер блока для контрольных сумм')
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Загружать только изменившиеся файлы и блоки строк, '
+                 'обновляя существующие записи по id')
+        parser.add_argument(
+            '--fast',
+            action='store_true',
+            help='Быстрая загрузка SQLite: WAL, synchronous=OFF, большой '
+                 'кэш, вторичные индексы пересоздаются после загрузки')
+        parser.add_argument(
+            '--report',
+            default=DEFAULT_REPORT,
+            help='Файл JSON Lines со строками, не прошедшими проверку; '
+                 'создается, только если такие строки есть')
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Продолжить прерванную загрузку с последнего сохраненного '
+                 'пакета каждого файла')
+        parser.add_argument(
+            '--progress-interval',
+            type=float,
+            default=PROGRESS_INTERVAL,
+            help='Как часто выводить прогресс загрузки, в секундах')
+
+    def table_loaded(self, table, count, elapsed):
+        self.checkpoints.finish(table)
+        rate = count / elapsed if elapsed else count
+        self.stdout.write(
+            f'{table.file}: {count} строк за {elapsed:.2f} с '
+            f'({rate:.0f} строк/с)')
+        logging.info(MESSAGE)
+
+    def batch_loaded(self, table, rows, offset):
+        self.checkpoints.commit(table, rows, offset)
+        self.progress.update(
+            table, self.checkpoints.states[table.name].rows, offset,
+            self.readers[table.name].size)
+
+    def sync(self, options):
+        changed = []
+        for table in TABLES:
+            stats = sync_table(
+                table, os.path.join(options['path'], table.file),
+                options['chunk_size'], options['batch_size'],
+                self.validator)
+            if stats['skipped']:
+                self.stdout.write(f'{table.file}: без изменений')
+                continue
+            if stats['changed']:
+                changed.append(table.model)
+            self.stdout.write(
+                f'{table.file}: изменено блоков {stats["changed"]} из '
+                f'{stats["chunks"]}, {stats["rows"]} строк за '
+                f'{stats["elapsed"]:.2f} с')
+            logging.info(MESSAGE)
+        mark_loaded(changed)
 
     def handle(self, *args, **options):
+        if options['resume'] and options['incremental']:
+            raise CommandError(
+                '--incremental сам пропускает загруженные файлы, '
+                '--resume с ним не нужен')
         logging.info('Загрузка данных из csv в базу:')
-        for func, model, file in self.ACTIONS:
-            if model.objects.exists():
-                logging.info('Таблица уже содержит данные.')
-            for row in DictReader(
-                open(
-                    f'static/data/{file}',
-                    encoding='utf8')):
-                func(row)
-            logging.info(MESSAGE)
+        models = [table.model for table in TABLES]
+        report = RejectReport(options['report'], append=options['resume'])
+        self.validator = Validator(report, upsert=options['incremental'])
+        self.progress = Progress(
+            self.stdout.write, options['progress_interval'])
+        try:
+            if options['fast']:
+                with fast_load(connection, models):
+                    self.load(options)
+            else:
+                self.load(options)
+        except CheckpointMismatch as error:
+            raise CommandError(
+                f'{error}, запустите загрузку без --resume') from error
+        finally:
+            report.close()
+        if report.total:
+            counts = ', '.join(
+                f'{name}: {count}' for name, count in report.counts.items())
+            logging.warning('Отклонено строк: %s (%s)', report.total, counts)
+            self.stdout.write(self.style.WARNING(
+                f'Отклонено строк: {report.total} ({counts}), '
+                f'отчет в {report.path}'))
         logging.info(SUCCESS_MESSAGE)
+        self.stdout.write(self.style.SUCCESS(SUCCESS_MESSAGE))
+
+    def load(self, options):
+        if options['incremental']:
+            self.sync(options)
+            return
+        self.checkpoints = Checkpoints(options['path'], options['resume'])
+        self.readers = {}
+        for table in TABLES:
+            if table.model.objects.exists() and not options['resume']:
+                logging.info('Таблица уже содержит данные.')
+            rows = self.checkpoints.open(table)
+            if rows is None:
+                self.stdout.write(f'{table.file}: уже загружен')
+            else:
+                self.readers[table.name] = rows
+        pending = [table for table in TABLES if table.name in self.readers]
+        if options['workers'] > 1:
+            run_pipeline(
+                pending, options['path'], options['workers'],
+                options['chunk_size'], options['batch_size'],
+                self.table_loaded, self.validator, self.batch_loaded,
+                self.readers)
+        else:
+            for table in pending:
+                self.table_loaded(table, *load_table(
+                    table, self.readers[table.name], options['batch_size'],
+                    self.validator, self.batch_loaded))
+        refresh_denormalized()
+        mark_loaded(table.model for table in pending)
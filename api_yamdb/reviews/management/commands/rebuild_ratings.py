@@ -0,0 +1,76 @@
+from collections import Counter, defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from reviews.models import SCORES, Review, Title, score_field
+from reviews.signals import bulk_loaded
+
+SCORE_FIELDS = [score_field(score) for score in SCORES]
+RATING_FIELDS = ['rating_sum', 'rating_count', *SCORE_FIELDS]
+
+
+def expected_values(histogram):
+    values = {score_field(score): histogram[score] for score in SCORES}
+    values['rating_sum'] = sum(
+        score * count for score, count in histogram.items())
+    values['rating_count'] = sum(histogram.values())
+    return values
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает рейтинг и гистограмму оценок всех произведений '
+            'за один проход по отзывам и сверяет их с сохраненными')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только проверить гистограммы, ничего не изменяя')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Размер пакета при сохранении исправлений')
+
+    def handle(self, *args, **options):
+        histograms = defaultdict(Counter)
+        rows = (
+            Review.objects.order_by().values_list('title_id', 'score')
+            .annotate(count=Count('id'))
+        )
+        for title_id, score, count in rows.iterator():
+            histograms[title_id][score] = count
+
+        now = timezone.now()
+        mismatched = []
+        titles = Title.objects.only('id', *RATING_FIELDS).order_by('id')
+        for title in titles.iterator():
+            values = expected_values(histograms[title.id])
+            if all(getattr(title, field) == value
+                   for field, value in values.items()):
+                continue
+            for field, value in values.items():
+                setattr(title, field, value)
+            title.modified = now
+            mismatched.append(title)
+
+        self.stdout.write(
+            f'Проверено произведений: {titles.count()}, '
+            f'расхождений: {len(mismatched)}')
+        if options['check']:
+            if mismatched:
+                raise CommandError(
+                    'Гистограммы не совпадают для произведений: '
+                    + ', '.join(str(title.id) for title in mismatched[:20]))
+            return
+        with transaction.atomic():
+            Title.objects.bulk_update(
+                mismatched, [*RATING_FIELDS, 'modified'],
+                batch_size=options['batch_size'])
+            # bulk_update обходит save(): кэш ответов сбрасываем сигналом.
+            if mismatched:
+                bulk_loaded.send(sender=Title)
+        self.stdout.write(self.style.SUCCESS('Гистограммы пересчитаны'))
@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from reviews.importing import DEFAULT_BATCH_SIZE
+from reviews.jobs import requeue_stale_jobs, run_job
+from reviews.models import ImportJob
+
+POLL_INTERVAL = 5
+
+
+class Command(BaseCommand):
+    help = ('Выполняет задания загрузки, созданные через API, '
+            'по очереди в порядке создания')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Выполнить задания из очереди и завершиться')
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=POLL_INTERVAL,
+            help='Пауза между проверками пустой очереди, в секундах')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Количество строк в одном INSERT')
+
+    def handle(self, *args, **options):
+        while True:
+            requeue_stale_jobs()
+            job = ImportJob.objects.filter(
+                status=ImportJob.Status.QUEUED).order_by('id').first()
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['poll_interval'])
+                continue
+            if run_job(job, options['batch_size']):
+                job.refresh_from_db()
+                self.stdout.write(
+                    f'Задание {job.pk} ({job.table}): {job.status}, '
+                    f'загружено {job.loaded}, отклонено {job.rejected}')
@@ -0,0 +1,39 @@
+# Generated by Django 3.2 on 2026-10-18 17:05
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0003_title_rating'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, verbose_name='Дата изменения комментария'),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='comments_modified',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Дата изменения комментариев'),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, verbose_name='Дата изменения отзыва'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, verbose_name='Дата изменения'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='reviews_modified',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Дата изменения отзывов'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+from reviews.search import install_fts, uninstall_fts
+
+
+def create_fts(apps, schema_editor):
+    install_fts(schema_editor.connection)
+
+
+def drop_fts(apps, schema_editor):
+    uninstall_fts(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_change_stamps'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
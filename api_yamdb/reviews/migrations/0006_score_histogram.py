@@ -0,0 +1,89 @@
+# Generated by Django 3.2 on 2026-10-18 17:10
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from reviews.search import install_fts
+
+
+def fill_histogram(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    Review = apps.get_model('reviews', 'Review')
+    reviews = Review.objects.filter(
+        title=OuterRef('pk')).order_by().values('title')
+    Title.objects.update(**{
+        f'score_{score}': Coalesce(
+            Subquery(reviews.filter(score=score).annotate(
+                count=Count('id')).values('count')),
+            0)
+        for score in range(1, 11)
+    })
+
+
+def restore_fts(apps, schema_editor):
+    # Пересоздание reviews_title удаляет триггеры поискового индекса.
+    install_fts(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_title_fts'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, restore_fts),
+        migrations.AddField(
+            model_name='title',
+            name='score_1',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество оценок 1'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_10',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество оценок 10'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_2',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество оценок 2'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_3',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество оценок 3'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_4',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество оценок 4'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_5',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество оценок 5'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_6',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество оценок 6'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_7',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество оценок 7'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_8',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество оценок 8'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_9',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество оценок 9'),
+        ),
+        migrations.RunPython(fill_histogram, migrations.RunPython.noop),
+        migrations.RunPython(restore_fts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 3.2 on 2026-10-18 17:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_score_histogram'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('table', models.CharField(max_length=50, unique=True, verbose_name='Таблица')),
+                ('checksum', models.CharField(max_length=64, verbose_name='Контрольная сумма файла')),
+                ('chunk_size', models.PositiveIntegerField(verbose_name='Строк в блоке')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Дата загрузки')),
+            ],
+            options={
+                'verbose_name': 'Загруженный файл',
+                'verbose_name_plural': 'Загруженные файлы',
+            },
+        ),
+        migrations.CreateModel(
+            name='ImportChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveIntegerField(verbose_name='Номер блока')),
+                ('checksum', models.CharField(max_length=64, verbose_name='Контрольная сумма блока')),
+                ('file', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='reviews.importfile', verbose_name='Файл')),
+            ],
+            options={
+                'verbose_name': 'Блок загруженного файла',
+                'verbose_name_plural': 'Блоки загруженных файлов',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='importchunk',
+            constraint=models.UniqueConstraint(fields=('file', 'index'), name='Один блок файла с таким номером'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 3.2 on 2026-10-18 17:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_import_checksums'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('table', models.CharField(max_length=50, unique=True, verbose_name='Таблица')),
+                ('size', models.PositiveBigIntegerField(verbose_name='Размер файла')),
+                ('mtime', models.BigIntegerField(verbose_name='Время изменения файла, нс')),
+                ('offset', models.PositiveBigIntegerField(default=0, verbose_name='Загружено байт')),
+                ('rows', models.PositiveBigIntegerField(default=0, verbose_name='Загружено строк')),
+                ('done', models.BooleanField(default=False, verbose_name='Файл загружен')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Дата сохранения')),
+            ],
+            options={
+                'verbose_name': 'Позиция загрузки файла',
+                'verbose_name_plural': 'Позиции загрузки файлов',
+            },
+        ),
+    ]
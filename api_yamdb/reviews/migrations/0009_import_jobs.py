@@ -0,0 +1,40 @@
+# Generated by Django 3.2 on 2026-10-18 17:28
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('reviews', '0008_import_checkpoints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('table', models.CharField(max_length=50, verbose_name='Таблица')),
+                ('path', models.CharField(max_length=255, verbose_name='Загруженный файл')),
+                ('format', models.CharField(max_length=10, verbose_name='Формат файла')),
+                ('compressed', models.BooleanField(default=False, verbose_name='Сжат gzip')),
+                ('status', models.CharField(choices=[('queued', 'В очереди'), ('running', 'Выполняется'), ('done', 'Завершено'), ('failed', 'Ошибка')], default='queued', max_length=10, verbose_name='Состояние')),
+                ('rows', models.PositiveBigIntegerField(default=0, verbose_name='Обработано строк')),
+                ('loaded', models.PositiveBigIntegerField(default=0, verbose_name='Загружено строк')),
+                ('rejected', models.PositiveBigIntegerField(default=0, verbose_name='Отклонено строк')),
+                ('errors', models.JSONField(default=list, verbose_name='Отклоненные строки и ошибки')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('started', models.DateTimeField(null=True, verbose_name='Начало загрузки')),
+                ('finished', models.DateTimeField(null=True, verbose_name='Окончание загрузки')),
+                ('author', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='import_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+            ],
+            options={
+                'verbose_name': 'Задание загрузки',
+                'verbose_name_plural': 'Задания загрузки',
+                'ordering': ('-id',),
+            },
+        ),
+    ]
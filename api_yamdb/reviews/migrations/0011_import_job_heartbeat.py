@@ -0,0 +1,18 @@
+# Generated by Django 3.2 on 2026-10-18 18:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0010_collection_versions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='heartbeat',
+            field=models.DateTimeField(null=True, verbose_name='Последняя отметка выполнения'),
+        ),
+    ]
@@ -1,11 +1,20 @@
 from django.contrib.auth import get_user_model
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import connection, models, transaction
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
 from .validators import validate_year
 
 User = get_user_model()
 
+SCORES = range(1, 11)
+
+
+def score_field(score):
+    return f'score_{score}'
+
 
 class Genre(models.Model):
     name = models.CharField(
@@ -25,6 +34,29 @@ class Genre(models.Model):
         return self.name
 
 
+class TitleQuerySet(models.QuerySet):
+
+    def refresh_rating(self):
+        """Пересчитываем рейтинг и гистограмму оценок одним UPDATE"""
+        reviews = Review.objects.filter(
+            title=OuterRef('pk')).order_by().values('title')
+        buckets = {
+            score_field(score): Coalesce(
+                Subquery(reviews.filter(score=score).annotate(
+                    count=Count('id')).values('count')),
+                0)
+            for score in SCORES
+        }
+        return self.update(
+            **buckets,
+            rating_sum=Coalesce(
+                Subquery(reviews.annotate(total=Sum('score')).values('total')),
+                0),
+            rating_count=Coalesce(
+                Subquery(reviews.annotate(count=Count('id')).values('count')),
+                0))
+
+
 class Title(models.Model):
     name = models.CharField(
         max_length=256,
@@ -51,6 +83,64 @@ class Title(models.Model):
         default='описание',
         null=True,
         verbose_name='Описание')
+    rating_sum = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Сумма оценок')
+    rating_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество оценок')
+    # Гистограмма оценок: score_N - число отзывов с оценкой N из SCORES.
+    score_1 = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество оценок 1')
+    score_2 = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество оценок 2')
+    score_3 = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество оценок 3')
+    score_4 = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество оценок 4')
+    score_5 = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество оценок 5')
+    score_6 = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество оценок 6')
+    score_7 = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество оценок 7')
+    score_8 = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество оценок 8')
+    score_9 = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество оценок 9')
+    score_10 = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество оценок 10')
+    modified = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения')
+    reviews_modified = models.DateTimeField(
+        default=timezone.now,
+        editable=False,
+        verbose_name='Дата изменения отзывов')
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'произведение'
@@ -59,6 +149,33 @@ class Title(models.Model):
     def __str__(self):
         return self.name[:15]
 
+    @property
+    def rating(self):
+        if not self.rating_count:
+            return None
+        return self.rating_sum / self.rating_count
+
+    @property
+    def score_histogram(self):
+        return {
+            score: getattr(self, score_field(score)) for score in SCORES
+        }
+
+    @property
+    def median_score(self):
+        if not self.rating_count:
+            return None
+        middle = ((self.rating_count - 1) // 2, self.rating_count // 2)
+        values = []
+        seen = 0
+        for score, count in self.score_histogram.items():
+            values.extend(
+                score for position in middle
+                if seen <= position < seen + count
+            )
+            seen += count
+        return sum(values) / len(values)
+
 
 class Category(models.Model):
     name = models.CharField(
@@ -117,6 +234,13 @@ class Review(models.Model):
         auto_now_add=True,
         db_index=True
     )
+    modified = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения отзыва')
+    comments_modified = models.DateTimeField(
+        default=timezone.now,
+        editable=False,
+        verbose_name='Дата изменения комментариев')
 
     class Meta:
         verbose_name_plural = 'Отзывов'
@@ -128,6 +252,18 @@ class Review(models.Model):
             )
         ]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_score = instance.__dict__.get('score')
+        instance._loaded_title_id = instance.__dict__.get('title_id')
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Рейтинг произведения обновляется сигналом в той же транзакции.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     author = models.ForeignKey(
@@ -144,8 +280,213 @@ class Comment(models.Model):
         verbose_name='Дата добавления комментария',
         auto_now_add=True,
         db_index=True)
+    modified = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения комментария')
 
     class Meta:
         ordering = ('-pub_date',)
         verbose_name_plural = 'Комментарии'
         verbose_name = 'Комментарии'
+
+    def save(self, *args, **kwargs):
+        # Метка изменения отзыва обновляется сигналом в той же транзакции.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+class ImportFile(models.Model):
+    table = models.CharField(
+        max_length=50,
+        unique=True,
+        verbose_name='Таблица')
+    checksum = models.CharField(
+        max_length=64,
+        verbose_name='Контрольная сумма файла')
+    chunk_size = models.PositiveIntegerField(
+        verbose_name='Строк в блоке')
+    updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата загрузки')
+
+    class Meta:
+        verbose_name = 'Загруженный файл'
+        verbose_name_plural = 'Загруженные файлы'
+
+    def __str__(self):
+        return self.table
+
+
+class ImportChunk(models.Model):
+    file = models.ForeignKey(
+        ImportFile,
+        related_name='chunks',
+        on_delete=models.CASCADE,
+        verbose_name='Файл')
+    index = models.PositiveIntegerField(
+        verbose_name='Номер блока')
+    checksum = models.CharField(
+        max_length=64,
+        verbose_name='Контрольная сумма блока')
+
+    class Meta:
+        verbose_name = 'Блок загруженного файла'
+        verbose_name_plural = 'Блоки загруженных файлов'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['file', 'index'],
+                name='Один блок файла с таким номером'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.file_id} {self.index}'
+
+
+class ImportCheckpoint(models.Model):
+    table = models.CharField(
+        max_length=50,
+        unique=True,
+        verbose_name='Таблица')
+    size = models.PositiveBigIntegerField(
+        verbose_name='Размер файла')
+    mtime = models.BigIntegerField(
+        verbose_name='Время изменения файла, нс')
+    offset = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name='Загружено байт')
+    rows = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name='Загружено строк')
+    done = models.BooleanField(
+        default=False,
+        verbose_name='Файл загружен')
+    updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата сохранения')
+
+    class Meta:
+        verbose_name = 'Позиция загрузки файла'
+        verbose_name_plural = 'Позиции загрузки файлов'
+
+    def __str__(self):
+        return f'{self.table} {self.rows}'
+
+
+class ImportJob(models.Model):
+
+    class Status(models.TextChoices):
+        QUEUED = 'queued', 'В очереди'
+        RUNNING = 'running', 'Выполняется'
+        DONE = 'done', 'Завершено'
+        FAILED = 'failed', 'Ошибка'
+
+    table = models.CharField(
+        max_length=50,
+        verbose_name='Таблица')
+    path = models.CharField(
+        max_length=255,
+        verbose_name='Загруженный файл')
+    format = models.CharField(
+        max_length=10,
+        verbose_name='Формат файла')
+    compressed = models.BooleanField(
+        default=False,
+        verbose_name='Сжат gzip')
+    status = models.CharField(
+        max_length=10,
+        choices=Status.choices,
+        default=Status.QUEUED,
+        verbose_name='Состояние')
+    rows = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name='Обработано строк')
+    loaded = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name='Загружено строк')
+    rejected = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name='Отклонено строк')
+    errors = models.JSONField(
+        default=list,
+        verbose_name='Отклоненные строки и ошибки')
+    author = models.ForeignKey(
+        User,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name='import_jobs',
+        verbose_name='Автор')
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата создания')
+    started = models.DateTimeField(
+        null=True,
+        verbose_name='Начало загрузки')
+    finished = models.DateTimeField(
+        null=True,
+        verbose_name='Окончание загрузки')
+    heartbeat = models.DateTimeField(
+        null=True,
+        verbose_name='Последняя отметка выполнения')
+
+    class Meta:
+        ordering = ('-id',)
+        verbose_name = 'Задание загрузки'
+        verbose_name_plural = 'Задания загрузки'
+
+    def __str__(self):
+        return f'{self.table} {self.status}'
+
+    @property
+    def throughput(self):
+        """Строк в секунду с начала загрузки"""
+        if self.started is None:
+            return None
+        elapsed = (
+            (self.finished or timezone.now()) - self.started).total_seconds()
+        return self.rows / elapsed if elapsed > 0 else None
+
+
+class CollectionVersionQuerySet(models.QuerySet):
+
+    def current(self, names):
+        """Версии коллекций одним запросом, у новой коллекции 0"""
+        found = dict(
+            self.filter(name__in=names).values_list('name', 'version'))
+        return [found.get(name, 0) for name in names]
+
+    def bump(self, *names):
+        """Увеличиваем версии одним UPSERT, новые коллекции получают 1"""
+        names = sorted(set(names))
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {table} (name, version) VALUES '
+                f'{", ".join(["(%s, 1)"] * len(names))} '
+                'ON CONFLICT (name) DO UPDATE SET version = '
+                f'{table}.version + 1',
+                names)
+
+
+class CollectionVersion(models.Model):
+    """Счетчик изменений коллекции для ключей кэша ответов.
+
+    Хранится в базе, чтобы запись в любом процессе, в том числе
+    в команде manage.py, сбрасывала кэш всех процессов.
+    """
+    name = models.CharField(
+        max_length=50,
+        unique=True,
+        verbose_name='Коллекция')
+    version = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name='Версия')
+
+    objects = CollectionVersionQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Версия коллекции'
+        verbose_name_plural = 'Версии коллекций'
+
+    def __str__(self):
+        return f'{self.name} {self.version}'
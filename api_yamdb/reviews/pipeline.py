@@ -0,0 +1,133 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.db import transaction
+
+from .importing import (DEFAULT_BATCH_SIZE, CsvRows, batched, insert_batch,
+                        keep_auto_now_add)
+from .validation import RejectReport, Validator, validate_chunk
+
+DEFAULT_CHUNK_SIZE = 10000
+# Сколько разобранных пакетов на процесс может ждать записи в каждой
+# таблице: ограничивает память, пока писатель занят другой таблицей.
+CHUNKS_PER_WORKER = 2
+DONE = object()
+
+
+def dependency_order(tables):
+    """Сортируем таблицы так, чтобы внешние ключи загружались раньше"""
+    pending = list(tables)
+    names = {table.name for table in pending}
+    loaded = set()
+    ordered = []
+    while pending:
+        ready = [
+            table for table in pending
+            if set(table.depends_on) & names <= loaded
+        ]
+        if not ready:
+            raise ValueError('Циклическая зависимость между таблицами')
+        for table in ready:
+            ordered.append(table)
+            loaded.add(table.name)
+            pending.remove(table)
+    return ordered
+
+
+def put(items, item, stop):
+    while not stop.is_set():
+        try:
+            items.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def produce(table, rows, pool, chunk_size, items, stop):
+    """Читаем CsvRows и отдаем пакеты строк на проверку и разбор в пул.
+
+    Вместе с заданием передаем размер пакета и позицию в файле после него.
+    """
+    try:
+        start = rows.number
+        for chunk in batched(rows, chunk_size):
+            future = pool.submit(validate_chunk, table.name, chunk, start)
+            start += len(chunk)
+            if not put(items, (future, len(chunk), rows.offset), stop):
+                return
+    except Exception as error:
+        put(items, error, stop)
+    put(items, DONE, stop)
+
+
+def write_table(table, items, batch_size, validator, on_batch=None):
+    """Каждый пакет разбора сохраняется в своей транзакции"""
+    started = time.monotonic()
+    count = 0
+    with keep_auto_now_add(table.model):
+        while True:
+            item = items.get()
+            if item is DONE:
+                break
+            if isinstance(item, Exception):
+                raise item
+            future, size, offset = item
+            values = validator.check(table, *future.result())
+            with transaction.atomic():
+                for batch in batched(values, batch_size):
+                    insert_batch(table, batch, batch_size)
+                if on_batch:
+                    on_batch(table, size, offset)
+            count += len(values)
+    return count, time.monotonic() - started
+
+
+def run_pipeline(tables, path, workers, chunk_size=DEFAULT_CHUNK_SIZE,
+                 batch_size=DEFAULT_BATCH_SIZE, on_loaded=None,
+                 validator=None, on_batch=None, readers=None):
+    """Параллельная загрузка таблиц.
+
+    Файлы всех таблиц читаются сразу, строки разбираются в пуле из workers
+    процессов, а единственный писатель (текущий поток) вставляет пакеты по
+    таблицам в порядке зависимостей. Проверка столбцов идет в пуле, ссылки
+    проверяет писатель. В readers можно передать CsvRows, продолжающие
+    чтение файлов с сохраненной позиции.
+    """
+    validator = validator or Validator(RejectReport())
+    readers = readers or {}
+    ordered = dependency_order(tables)
+    stop = threading.Event()
+    queues = {
+        table.name: queue.Queue(maxsize=workers * CHUNKS_PER_WORKER)
+        for table in ordered
+    }
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=django.setup) as pool:
+        producers = [
+            threading.Thread(
+                target=produce,
+                args=(table,
+                      readers.get(table.name)
+                      or CsvRows(os.path.join(path, table.file)),
+                      pool, chunk_size, queues[table.name], stop),
+                daemon=True)
+            for table in ordered
+        ]
+        for producer in producers:
+            producer.start()
+        try:
+            for table in ordered:
+                count, elapsed = write_table(
+                    table, queues[table.name], batch_size, validator,
+                    on_batch)
+                if on_loaded:
+                    on_loaded(table, count, elapsed)
+        finally:
+            stop.set()
+            for producer in producers:
+                producer.join()
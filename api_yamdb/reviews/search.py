@@ -0,0 +1,115 @@
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'reviews_title_fts'
+TITLE_TABLE = 'reviews_title'
+# Вес совпадений в названии и в описании для bm25().
+NAME_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+CREATE_TABLE = (
+    f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+    f"name, description, content='{TITLE_TABLE}', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')"
+)
+CREATE_TRIGGERS = (
+    f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON '
+    f'{TITLE_TABLE} BEGIN '
+    f'INSERT INTO {FTS_TABLE}(rowid, name, description) '
+    'VALUES (new.id, new.name, new.description); END',
+    f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON '
+    f'{TITLE_TABLE} BEGIN '
+    f'INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description) '
+    "VALUES ('delete', old.id, old.name, old.description); END",
+    f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF name, '
+    f'description ON {TITLE_TABLE} BEGIN '
+    f'INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description) '
+    "VALUES ('delete', old.id, old.name, old.description); "
+    f'INSERT INTO {FTS_TABLE}(rowid, name, description) '
+    'VALUES (new.id, new.name, new.description); END',
+)
+DROP_STATEMENTS = (
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ai',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ad',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_au',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+)
+
+_fts_enabled = None
+
+
+def fts_supported(db_connection):
+    if db_connection.vendor != 'sqlite':
+        return False
+    with db_connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+def install_fts(db_connection):
+    """Создаем индекс FTS5 и триггеры и заполняем индекс заново.
+
+    SQLite удаляет триггеры при пересоздании таблицы, поэтому миграции,
+    меняющие reviews_title, должны вызывать эту функцию повторно.
+    """
+    if not fts_supported(db_connection):
+        return
+    with db_connection.cursor() as cursor:
+        cursor.execute(CREATE_TABLE)
+        for statement in CREATE_TRIGGERS:
+            cursor.execute(statement)
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def uninstall_fts(db_connection):
+    if db_connection.vendor != 'sqlite':
+        return
+    with db_connection.cursor() as cursor:
+        for statement in DROP_STATEMENTS:
+            cursor.execute(statement)
+
+
+def fts_enabled():
+    global _fts_enabled
+    if _fts_enabled is None:
+        _fts_enabled = (
+            connection.vendor == 'sqlite'
+            and FTS_TABLE in connection.introspection.table_names()
+        )
+    return _fts_enabled
+
+
+def match_expression(text, columns):
+    """Запрос MATCH: все слова как префиксы в указанных колонках"""
+    terms = re.findall(r'\w+', text)
+    if not terms:
+        return None
+    words = ' '.join(f'"{term}"*' for term in terms)
+    return f'{{{" ".join(columns)}}} : ({words})'
+
+
+def search_titles(queryset, text, columns=('name', 'description')):
+    """Полнотекстовый поиск произведений с сортировкой по релевантности.
+
+    Без FTS5 работает как прежний поиск по подстроке.
+    """
+    expression = match_expression(text, columns) if fts_enabled() else None
+    if expression is None:
+        condition = Q()
+        for column in columns:
+            condition |= Q(**{f'{column}__icontains': text})
+        return queryset.filter(condition)
+    matched = RawSQL(
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+        (expression,))
+    rank = RawSQL(
+        f'SELECT bm25({FTS_TABLE}, {NAME_WEIGHT}, {DESCRIPTION_WEIGHT}) '
+        f'FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+        f'AND {FTS_TABLE}.rowid = {TITLE_TABLE}.id',
+        (expression,))
+    return queryset.filter(id__in=matched).annotate(
+        search_rank=rank).order_by('search_rank', 'id')
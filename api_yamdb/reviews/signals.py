@@ -0,0 +1,119 @@
+from django.db.models import F
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete, pre_save)
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from .models import (Category, Comment, GenreTitle, Review, Title, User,
+                     score_field)
+
+# Строки модели sender загружены в обход save(): bulk_create или UPSERT.
+bulk_loaded = Signal()
+
+
+def change_scores(title_id, added=None, removed=None):
+    """Обновляем рейтинг и гистограмму оценок одним UPDATE"""
+    now = timezone.now()
+    changes = {'modified': now, 'reviews_modified': now}
+    if added != removed:
+        for score, delta in ((added, 1), (removed, -1)):
+            if score is None:
+                continue
+            field = score_field(score)
+            changes[field] = F(field) + delta
+        changes['rating_sum'] = (
+            F('rating_sum') + (added or 0) - (removed or 0))
+        changes['rating_count'] = (
+            F('rating_count') + (added is not None) - (removed is not None))
+    Title.objects.filter(pk=title_id).update(**changes)
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, **kwargs):
+    score = int(instance.score)
+    if created:
+        change_scores(instance.title_id, added=score)
+    elif (getattr(instance, '_loaded_score', None) is None
+          or getattr(instance, '_loaded_title_id', None) is None):
+        titles = Title.objects.filter(pk=instance.title_id)
+        titles.refresh_rating()
+        titles.update(modified=timezone.now(),
+                      reviews_modified=timezone.now())
+    elif instance._loaded_title_id != instance.title_id:
+        # Отзыв перенесен к другому произведению.
+        change_scores(instance._loaded_title_id,
+                      removed=instance._loaded_score)
+        change_scores(instance.title_id, added=score)
+    else:
+        change_scores(
+            instance.title_id, added=score, removed=instance._loaded_score)
+    instance._loaded_score = score
+    instance._loaded_title_id = instance.title_id
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    change_scores(instance.title_id, removed=int(instance.score))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    Review.objects.filter(pk=instance.review_id).update(
+        comments_modified=timezone.now())
+
+
+@receiver(post_save, sender=GenreTitle)
+@receiver(post_delete, sender=GenreTitle)
+def genre_title_changed(sender, instance, **kwargs):
+    Title.objects.filter(pk=instance.title_id).update(
+        modified=timezone.now())
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_genres_changed(sender, instance, action, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if isinstance(instance, Title):
+        titles = Title.objects.filter(pk=instance.pk)
+    elif pk_set:
+        titles = Title.objects.filter(pk__in=pk_set)
+    else:
+        titles = instance.genres.all()
+    titles.update(modified=timezone.now())
+
+
+@receiver(pre_delete, sender=Category)
+def category_deleted(sender, instance, **kwargs):
+    instance.titles.update(modified=timezone.now())
+
+
+def touch_authors(authors):
+    """Метки изменения отзывов и комментариев авторов и их списков.
+
+    Имя автора входит в тела ответов, поэтому при его смене ETag
+    объектов и списков должны измениться.
+    """
+    now = timezone.now()
+    reviews = Review.objects.filter(author__in=authors)
+    comments = Comment.objects.filter(author__in=authors)
+    Title.objects.filter(
+        pk__in=reviews.values('title_id')).update(reviews_modified=now)
+    Review.objects.filter(
+        pk__in=comments.values('review_id')).update(comments_modified=now)
+    reviews.update(modified=now)
+    comments.update(modified=now)
+
+
+@receiver(pre_save, sender=User)
+def author_renaming(sender, instance, raw, **kwargs):
+    if raw or instance._state.adding:
+        return
+    loaded = getattr(instance, '_loaded_values', {})
+    if 'username' in loaded:
+        username = loaded['username']
+    else:
+        username = User.objects.filter(pk=instance.pk).values_list(
+            'username', flat=True).first()
+    if username != instance.username:
+        touch_authors([instance.pk])
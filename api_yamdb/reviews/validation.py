@@ -0,0 +1,251 @@
+import datetime as dt
+import json
+import re
+
+from django.db import models
+from django.utils.dateparse import parse_datetime
+
+from .importing import TABLES_BY_NAME
+from .models import SCORES
+
+INTEGER = re.compile(r'[+-]?\d+')
+DEFAULT_REPORT = 'import_errors.jsonl'
+
+
+def integer(values):
+    return [
+        None if INTEGER.fullmatch(value or '') else 'ожидается целое число'
+        for value in values
+    ]
+
+
+def optional_integer(values):
+    return [
+        None if not value or INTEGER.fullmatch(value)
+        else 'ожидается целое число или пустое значение'
+        for value in values
+    ]
+
+
+def required(values):
+    return [None if value else 'значение не может быть пустым'
+            for value in values]
+
+
+def score(values):
+    return [
+        None if INTEGER.fullmatch(value or '') and int(value) in SCORES
+        else f'оценка должна быть от {SCORES[0]} до {SCORES[-1]}'
+        for value in values
+    ]
+
+
+def year(values):
+    # Тот же предел, что и в validate_year.
+    current = dt.date.today().year
+    return [
+        None if INTEGER.fullmatch(value or '') and int(value) <= current
+        else f'год должен быть целым числом не больше {current}'
+        for value in values
+    ]
+
+
+def role(values):
+    from users.models import User
+
+    roles = set(User.Role.values)
+    return [None if value in roles else 'неизвестная роль'
+            for value in values]
+
+
+def timestamp(values):
+    errors = []
+    for value in values:
+        try:
+            valid = parse_datetime(value or '') is not None
+        except ValueError:
+            valid = False
+        errors.append(None if valid else 'ожидается дата и время ISO 8601')
+    return errors
+
+
+# Проверки столбцов файла, не зависящие от других таблиц.
+CHECKS = {
+    'users': (('id', integer), ('username', required), ('email', required),
+              ('role', role)),
+    'category': (('id', integer), ('name', required), ('slug', required)),
+    'genre': (('id', integer), ('name', required), ('slug', required)),
+    'titles': (('id', integer), ('name', required), ('year', year),
+               ('category', optional_integer)),
+    'genre_title': (('id', integer), ('title_id', integer),
+                    ('genre_id', integer)),
+    'review': (('id', integer), ('title_id', integer), ('text', required),
+               ('author', integer), ('score', score),
+               ('pub_date', timestamp)),
+    'comments': (('id', integer), ('review_id', integer), ('text', required),
+                 ('author', integer), ('pub_date', timestamp)),
+}
+# Внешние ключи: столбец файла, поле модели и таблица, на которую ссылается.
+FOREIGN_KEYS = {
+    'titles': (('category', 'category_id', 'category'),),
+    'genre_title': (('title_id', 'title_id', 'titles'),
+                    ('genre_id', 'genre_id', 'genre')),
+    'review': (('title_id', 'title_id', 'titles'),
+               ('author', 'author_id', 'users')),
+    'comments': (('review_id', 'review_id', 'review'),
+                 ('author', 'author_id', 'users')),
+}
+
+
+def unique_keys(model):
+    """Наборы полей, значения которых уникальны в таблице: первичный
+    ключ, поля unique=True и UniqueConstraint по полям"""
+    keys = [(field.attname,) for field in model._meta.concrete_fields
+            if field.unique]
+    keys.extend(
+        tuple(model._meta.get_field(name).attname
+              for name in constraint.fields)
+        for constraint in model._meta.constraints
+        if isinstance(constraint, models.UniqueConstraint)
+        and constraint.fields and constraint.condition is None)
+    return keys
+
+
+def rejected(row_number, row, errors):
+    return {'row': row_number, 'id': row.get('id'), 'errors': errors}
+
+
+def validate_chunk(table_name, rows, start=0):
+    """Проверка пакета строк по столбцам и разбор прошедших проверку.
+
+    Каждая проверка получает столбец целиком. Возвращает список пар
+    (номер строки, поля модели) и список отклоненных строк. Может
+    выполняться в отдельном процессе.
+    """
+    errors = [{} for _ in rows]
+    for column, check in CHECKS[table_name]:
+        messages = check([row.get(column) for row in rows])
+        for row_errors, message in zip(errors, messages):
+            if message:
+                row_errors[column] = message
+    parse = TABLES_BY_NAME[table_name].parse
+    accepted, rejects = [], []
+    for number, (row, row_errors) in enumerate(zip(rows, errors), start + 1):
+        if row_errors:
+            rejects.append(rejected(number, row, row_errors))
+        else:
+            accepted.append((number, parse(row)))
+    return accepted, rejects
+
+
+class RejectReport:
+    """Отчет об отклоненных строках в формате JSON Lines.
+
+    Файл создается при первой отклоненной строке, с append дописывается.
+    """
+
+    def __init__(self, path=DEFAULT_REPORT, append=False):
+        self.path = path
+        self.mode = 'a' if append else 'w'
+        self.file = None
+        self.counts = {}
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+    def write(self, table, rejects):
+        if not rejects:
+            return
+        if self.file is None:
+            self.file = open(self.path, self.mode, encoding='utf8')
+        for reject in rejects:
+            self.file.write(json.dumps(
+                {'table': table.name, 'file': table.file, **reject},
+                ensure_ascii=False))
+            self.file.write('\n')
+        self.counts[table.name] = self.counts.get(table.name, 0) + len(rejects)
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class Validator:
+    """Проверка строк перед загрузкой.
+
+    Значения уникальных полей каждой таблицы, включая id, проверяются
+    по словарям значение -> id: значения из базы читаются при первом
+    обращении к таблице и дополняются значениями принятых строк. По тем
+    же словарям id проверяются ссылки на другие таблицы. При upsert
+    строка может совпадать только с собственной записью в базе.
+    """
+
+    def __init__(self, report, upsert=False):
+        self.report = report
+        self.upsert = upsert
+        self.owners = {}
+        self.seen = {}
+
+    def table_owners(self, table_name):
+        if table_name not in self.owners:
+            model = TABLES_BY_NAME[table_name].model
+            owners = {}
+            for key in unique_keys(model):
+                rows = model.objects.values_list('pk', *key)
+                owners[key] = {tuple(values): pk for pk, *values in rows}
+            self.owners[table_name] = owners
+            self.seen[table_name] = set()
+        return self.owners[table_name]
+
+    def filter(self, table, rows, start=0):
+        return self.check(table, *validate_chunk(table.name, rows, start))
+
+    def reference_errors(self, table_name, values):
+        """Проверка внешних ключей по столбцам через множества id"""
+        errors = [{} for _ in values]
+        for column, field, target in FOREIGN_KEYS.get(table_name, ()):
+            keys = self.table_owners(target)[('id',)]
+            for row_errors, fields in zip(errors, values):
+                value = fields[field]
+                if value is not None and (value,) not in keys:
+                    row_errors[column] = (
+                        f'нет записи {value} в таблице {target}')
+        return errors
+
+    def remember(self, table_name, fields):
+        """Запоминаем ключи принятой строки, возвращаем ошибку повтора"""
+        pk = fields['id']
+        owners = self.table_owners(table_name)
+        if pk in self.seen[table_name]:
+            return {'id': 'повторяющийся id'}
+        errors = {}
+        for key, values in owners.items():
+            owner = values.get(tuple(fields[field] for field in key))
+            if owner is not None and not (self.upsert and owner == pk):
+                errors[', '.join(key)] = (
+                    'повторяющийся id' if key == ('id',)
+                    else 'значение уже есть в таблице')
+        if errors:
+            return errors
+        for key, values in owners.items():
+            values[tuple(fields[field] for field in key)] = pk
+        self.seen[table_name].add(pk)
+        return {}
+
+    def check(self, table, accepted, rejects):
+        """Проверка ссылок и повторов, возвращает поля принятых строк"""
+        values = [fields for _, fields in accepted]
+        errors = self.reference_errors(table.name, values)
+        accepted_values = []
+        for (number, fields), row_errors in zip(accepted, errors):
+            row_errors = row_errors or self.remember(table.name, fields)
+            if row_errors:
+                rejects.append(
+                    rejected(number, {'id': str(fields['id'])}, row_errors))
+            else:
+                accepted_values.append(fields)
+        rejects.sort(key=lambda reject: reject['row'])
+        self.report.write(table, rejects)
+        return accepted_values
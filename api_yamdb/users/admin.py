@@ -1,6 +1,8 @@
 from django.contrib import admin
 from django.contrib.auth import get_user_model
 
+from .models import OutgoingEmail, RevokedToken, TokenCutoff
+
 User = get_user_model()
 
 
@@ -12,3 +14,25 @@ class UserAdmin(admin.ModelAdmin):
     )
     list_editable = ('role',)
     search_fields = ('username', 'role',)
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk', 'recipient', 'subject', 'created', 'attempts', 'sent',
+        'last_error',
+    )
+    list_filter = ('sent',)
+    search_fields = ('recipient',)
+
+
+@admin.register(RevokedToken)
+class RevokedTokenAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'jti', 'expires', 'created')
+    search_fields = ('jti',)
+
+
+@admin.register(TokenCutoff)
+class TokenCutoffAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'user_id', 'issued_before')
+    search_fields = ('user_id',)
@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.outbox import (DEFAULT_BATCH_SIZE, MAX_ATTEMPTS, purge_sent,
+                          send_batch)
+
+POLL_INTERVAL = 1
+
+
+class Command(BaseCommand):
+    help = ('Отправляет письма из очереди исходящих пачками через одно '
+            'соединение с почтовым сервером')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Отправить письма, которым пора уходить, и завершиться')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Писем за одно соединение')
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=MAX_ATTEMPTS,
+            help='Сколько раз пытаться отправить письмо')
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=POLL_INTERVAL,
+            help='Пауза при пустой очереди, в секундах')
+
+    def handle(self, *args, **options):
+        while True:
+            sent, errors = send_batch(
+                options['batch_size'], options['max_attempts'])
+            if sent or errors:
+                self.stdout.write(
+                    f'Отправлено писем: {sent}, с ошибкой: {errors}')
+                continue
+            # Очередь пуста: удаляем давно отправленные письма.
+            purge_sent()
+            if options['once']:
+                return
+            time.sleep(options['poll_interval'])
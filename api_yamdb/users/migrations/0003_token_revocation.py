@@ -0,0 +1,40 @@
+# Generated by Django 3.2 on 2026-10-18 17:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_outgoing_email'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevokedToken',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jti', models.CharField(max_length=255, unique=True, verbose_name='Идентификатор токена')),
+                ('expires', models.DateTimeField(db_index=True, verbose_name='Срок действия токена')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата отзыва')),
+            ],
+            options={
+                'verbose_name': 'Отозванный токен',
+                'verbose_name_plural': 'Отозванные токены',
+                'ordering': ('id',),
+            },
+        ),
+        migrations.CreateModel(
+            name='TokenCutoff',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_id', models.PositiveBigIntegerField(unique=True, verbose_name='Пользователь')),
+                ('issued_before', models.DateTimeField(db_index=True, verbose_name='Отозваны токены, выданные до')),
+            ],
+            options={
+                'verbose_name': 'Отзыв токенов пользователя',
+                'verbose_name_plural': 'Отзывы токенов пользователей',
+                'ordering': ('id',),
+            },
+        ),
+    ]
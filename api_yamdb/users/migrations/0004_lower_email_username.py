@@ -0,0 +1,44 @@
+# Generated by Django 3.2 on 2026-10-18 17:46
+
+from collections import defaultdict
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+def normalize_emails(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    # Приводим почту так же, как User.save(), - str.lower(), а не LOWER()
+    # базы, которая меняет регистр только у ASCII.
+    owners = defaultdict(list)
+    changed = []
+    for user in User.objects.only('id', 'email').order_by('id').iterator():
+        email = user.email.lower()
+        owners[email].append(user.id)
+        if email != user.email:
+            user.email = email
+            changed.append(user)
+    # Адреса, отличающиеся только регистром, после приведения нарушили бы
+    # уникальность: сообщаем о них до изменения данных.
+    duplicates = [email for email, ids in owners.items() if len(ids) > 1]
+    if duplicates:
+        raise ValueError(
+            'Почта повторяется без учета регистра: '
+            f'{", ".join(duplicates[:10])}. Объедините эти учетные записи '
+            'перед миграцией.')
+    User.objects.bulk_update(changed, ['email'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_token_revocation'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_emails, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(django.db.models.functions.text.Lower('username'), name='user_username_lower'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 3.2 on 2026-10-18 17:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_lower_email_username'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outgoingemail',
+            name='key',
+            field=models.CharField(blank=True, max_length=255, verbose_name='Ключ повтора'),
+        ),
+        migrations.AddIndex(
+            model_name='outgoingemail',
+            index=models.Index(fields=['key', 'created'], name='outgoing_email_key'),
+        ),
+    ]
@@ -1,5 +1,7 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models.functions import Lower
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 
@@ -35,10 +37,36 @@ class User(AbstractUser):
         ordering = ['id']
         verbose_name = 'Пользователь'
         verbose_name_plural = 'Пользователи'
+        # Поиск по началу имени без учета регистра. Почта сохраняется
+        # в нижнем регистре, поэтому ее уникальность без учета регистра
+        # обеспечивает unique=True.
+        indexes = [
+            models.Index(Lower('username'), name='user_username_lower'),
+        ]
 
     def __str__(self):
         return self.username
 
+    def save(self, *args, **kwargs):
+        self.email = self.email.lower()
+        super().save(*args, **kwargs)
+        # Сохраненные значения - исходные для следующего save().
+        update_fields = kwargs.get('update_fields')
+        self._loaded_values = {
+            **getattr(self, '_loaded_values', {}),
+            **{field.attname: self.__dict__[field.attname]
+               for field in self._meta.concrete_fields
+               if field.attname in self.__dict__
+               and (update_fields is None or field.name in update_fields)},
+        }
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Значения на момент чтения: с ними сравниваются права при save().
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
     @property
     def is_user(self):
         return self.role == self.Role.USER
@@ -50,3 +78,92 @@ class User(AbstractUser):
     @property
     def is_moderator(self):
         return self.role == self.Role.MODERATOR
+
+
+class OutgoingEmail(models.Model):
+    subject = models.CharField(
+        max_length=255,
+        verbose_name='Тема')
+    body = models.TextField(
+        verbose_name='Текст письма')
+    from_email = models.CharField(
+        max_length=254,
+        blank=True,
+        verbose_name='Отправитель')
+    recipient = models.EmailField(
+        max_length=254,
+        verbose_name='Получатель')
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата создания')
+    send_after = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Отправить не раньше')
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попыток отправки')
+    sent = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Дата отправки')
+    last_error = models.TextField(
+        blank=True,
+        verbose_name='Последняя ошибка')
+    key = models.CharField(
+        max_length=255,
+        blank=True,
+        verbose_name='Ключ повтора')
+
+    class Meta:
+        ordering = ('id',)
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        indexes = [
+            models.Index(fields=('sent', 'send_after'),
+                         name='outgoing_email_due'),
+            models.Index(fields=('key', 'created'),
+                         name='outgoing_email_key'),
+        ]
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject}'
+
+
+class RevokedToken(models.Model):
+    jti = models.CharField(
+        max_length=255,
+        unique=True,
+        verbose_name='Идентификатор токена')
+    expires = models.DateTimeField(
+        db_index=True,
+        verbose_name='Срок действия токена')
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата отзыва')
+
+    class Meta:
+        ordering = ('id',)
+        verbose_name = 'Отозванный токен'
+        verbose_name_plural = 'Отозванные токены'
+
+    def __str__(self):
+        return self.jti
+
+
+class TokenCutoff(models.Model):
+    # Не внешний ключ: после удаления пользователя его токены
+    # должны оставаться отозванными до истечения срока.
+    user_id = models.PositiveBigIntegerField(
+        unique=True,
+        verbose_name='Пользователь')
+    issued_before = models.DateTimeField(
+        db_index=True,
+        verbose_name='Отозваны токены, выданные до')
+
+    class Meta:
+        ordering = ('id',)
+        verbose_name = 'Отзыв токенов пользователя'
+        verbose_name_plural = 'Отзывы токенов пользователей'
+
+    def __str__(self):
+        return f'{self.user_id}: {self.issued_before}'
@@ -0,0 +1,112 @@
+import datetime as dt
+import logging
+
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+DEFAULT_BATCH_SIZE = 100
+MAX_ATTEMPTS = 5
+RETRY_DELAY = dt.timedelta(seconds=30)
+MAX_RETRY_DELAY = dt.timedelta(hours=1)
+# Сколько выбранное письмо скрыто от других обработчиков: если обработчик
+# упал, не отметив письмо, после этого срока его отправит другой.
+LEASE = dt.timedelta(minutes=10)
+# Сколько хранятся отправленные письма (уже без текста). Не меньше окна
+# повтора queue_email: по этим строкам находятся недавние письма с key.
+SENT_RETENTION = dt.timedelta(days=1)
+
+logger = logging.getLogger(__name__)
+
+
+def queue_email(subject, body, recipient, from_email='', key='',
+                window=None):
+    """Письмо в очередь; вызывается в транзакции изменения данных.
+
+    Если письмо с тем же key уже поставлено в очередь за последний
+    window, новое не создается и возвращается None.
+    """
+    if key and window and OutgoingEmail.objects.filter(
+            key=key, created__gt=timezone.now() - window).exists():
+        return None
+    return OutgoingEmail.objects.create(
+        subject=subject, body=body, recipient=recipient,
+        from_email=from_email, key=key)
+
+
+def retry_delay(attempts):
+    return min(RETRY_DELAY * 2 ** (attempts - 1), MAX_RETRY_DELAY)
+
+
+def claim(batch_size, max_attempts):
+    """Выбираем письма, которым пора уходить, и откладываем их на LEASE"""
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True).filter(
+                sent__isnull=True, send_after__lte=now,
+                attempts__lt=max_attempts,
+            ).order_by('send_after', 'id')[:batch_size])
+        OutgoingEmail.objects.filter(
+            pk__in=[email.pk for email in emails],
+        ).update(send_after=now + LEASE)
+    return emails
+
+
+def failed(email, error):
+    email.attempts += 1
+    email.last_error = str(error)
+    email.send_after = timezone.now() + retry_delay(email.attempts)
+    email.save(update_fields=('attempts', 'last_error', 'send_after'))
+    logger.warning('Письмо %s не отправлено (попытка %s): %s',
+                   email.pk, email.attempts, error)
+
+
+def send_batch(batch_size=DEFAULT_BATCH_SIZE, max_attempts=MAX_ATTEMPTS):
+    """Отправляем пачку писем через одно соединение с почтовым сервером.
+
+    Неудачные письма откладываются с экспоненциально растущей паузой,
+    после max_attempts попыток остаются неотправленными с последней
+    ошибкой. Возвращает количество отправленных и неудачных писем.
+    """
+    emails = claim(batch_size, max_attempts)
+    sent = errors = 0
+    if not emails:
+        return sent, errors
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as error:
+        for email in emails:
+            failed(email, error)
+        return sent, len(emails)
+    try:
+        for email in emails:
+            message = EmailMessage(
+                email.subject, email.body, email.from_email or None,
+                [email.recipient], connection=connection)
+            try:
+                message.send()
+            except Exception as error:
+                failed(email, error)
+                errors += 1
+                continue
+            email.attempts += 1
+            email.sent = timezone.now()
+            # Текст может содержать код подтверждения, после отправки
+            # он в базе не нужен.
+            email.body = ''
+            email.save(update_fields=('attempts', 'sent', 'body'))
+            sent += 1
+    finally:
+        connection.close()
+    return sent, errors
+
+
+def purge_sent(retention=SENT_RETENTION):
+    """Удаляем письма, отправленные раньше retention назад"""
+    deleted, _ = OutgoingEmail.objects.filter(
+        sent__lt=timezone.now() - retention).delete()
+    return deleted
@@ -1,6 +1,8 @@
 import os
 import sys
+from http import HTTPStatus
 
+import pytest
 from django.utils.version import get_version
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -33,3 +35,36 @@ assert get_version() < '4.0.0', 'Пожалуйста, используйте в
 pytest_plugins = [
     'tests.fixtures.fixture_user',
 ]
+
+
+@pytest.fixture(autouse=True)
+def clear_process_state():
+    """Кэш ответов, список отзыва токенов и бакеты ограничения частоты
+    хранятся вне тестовой базы, поэтому перед каждым тестом сбрасываются"""
+    from api.v1.cache import get_response_cache
+    from api.v1.revocation import get_denylist
+    from api.v1.throttling import get_throttle_store
+
+    get_response_cache().clear()
+    get_denylist().clear()
+    get_throttle_store().clear()
+
+
+@pytest.fixture
+def claims_client():
+    """Клиент с токеном, полученным через `/api/v1/auth/token/`"""
+    from django.contrib.auth.tokens import default_token_generator
+    from rest_framework.test import APIClient
+
+    def make_client(user):
+        response = APIClient().post('/api/v1/auth/token/', data={
+            'username': user.username,
+            'confirmation_code': default_token_generator.make_token(user),
+        })
+        assert response.status_code == HTTPStatus.OK
+        client = APIClient()
+        token = response.json()['token']
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        return client, token
+
+    return make_client
@@ -0,0 +1,87 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_reviews
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08TitleRating:
+
+    def get_rating(self, client, title_id):
+        response = client.get(f'/api/v1/titles/{title_id}/')
+        assert response.status_code == HTTPStatus.OK
+        return response.json().get('rating')
+
+    def test_01_rating_follows_reviews(self, admin_client, admin, user,
+                                       user_client, moderator,
+                                       moderator_client):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        reviews, titles = create_reviews(admin_client, author_map)
+        title_id = titles[0]['id']
+        url = f'/api/v1/titles/{title_id}/reviews/'
+        assert self.get_rating(admin_client, title_id) == 5, (
+            'Проверьте, что рейтинг произведения пересчитывается при '
+            'создании отзыва.'
+        )
+
+        response = user_client.patch(
+            f'{url}{reviews[1]["id"]}/', data={'score': 8}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert self.get_rating(admin_client, title_id) == 6, (
+            'Проверьте, что рейтинг произведения пересчитывается при '
+            'изменении оценки в отзыве.'
+        )
+
+        response = admin_client.delete(f'{url}{reviews[0]["id"]}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert self.get_rating(admin_client, title_id) == 6, (
+            'Проверьте, что рейтинг произведения пересчитывается при '
+            'удалении отзыва.'
+        )
+
+        response = admin_client.delete(f'/api/v1/users/{user.username}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert self.get_rating(admin_client, title_id) == 5, (
+            'Проверьте, что рейтинг произведения пересчитывается при '
+            'каскадном удалении отзывов вместе с пользователем.'
+        )
+
+        response = moderator_client.delete(f'{url}{reviews[2]["id"]}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert self.get_rating(admin_client, title_id) is None, (
+            'Проверьте, что у произведения без отзывов рейтинг равен `None`.'
+        )
+
+    @pytest.mark.parametrize('new_score', (7, 9))
+    def test_02_review_moved_to_other_title(self, user, new_score):
+        from io import StringIO
+
+        from django.core.management import call_command
+
+        from reviews.models import Review, Title
+
+        old, new = (Title.objects.create(name=name, year=2000)
+                    for name in ('Старое', 'Новое'))
+        Review.objects.create(title=old, author=user, text='Отзыв', score=7)
+        # Так отзыв переносит админка.
+        review = Review.objects.get()
+        review.title = new
+        review.score = new_score
+        review.save()
+        old.refresh_from_db()
+        new.refresh_from_db()
+        assert old.rating is None and old.score_histogram[7] == 0, (
+            'Проверьте, что перенос отзыва убирает оценку у прежнего '
+            'произведения.'
+        )
+        assert new.rating == new_score, (
+            'Проверьте, что перенос отзыва добавляет оценку новому '
+            'произведению.'
+        )
+        call_command('rebuild_ratings', '--check', stdout=StringIO())
@@ -0,0 +1,89 @@
+import json
+from base64 import urlsafe_b64encode
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_reviews
+
+
+def cursor(position):
+    payload = json.dumps({'p': position, 'r': 0})
+    return urlsafe_b64encode(payload.encode()).decode()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09CursorPagination:
+
+    def test_01_reviews_cursor(self, client, admin_client, admin, user,
+                               user_client, moderator, moderator_client):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        reviews, titles = create_reviews(admin_client, author_map)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+
+        response = client.get(url)
+        assert 'count' in response.json(), (
+            f'Проверьте, что без параметра `pagination` эндпоинт `{url}` '
+            'использует прежнюю пагинацию.'
+        )
+
+        response = client.get(url, {'pagination': 'cursor', 'page_size': 2})
+        assert response.status_code == HTTPStatus.OK
+        first_page = response.json()
+        assert 'count' not in first_page, (
+            'Проверьте, что курсорная пагинация не считает `count`.'
+        )
+        assert first_page['previous'] is None
+        assert first_page['next'], (
+            'Проверьте, что курсорная пагинация возвращает ссылку `next`.'
+        )
+        second_page = client.get(first_page['next']).json()
+        ids = [item['id'] for item in first_page['results']]
+        ids += [item['id'] for item in second_page['results']]
+        assert ids == [review['id'] for review in reversed(reviews)], (
+            f'Проверьте, что курсорная пагинация `{url}` отдает отзывы '
+            'от новых к старым без пропусков и повторов.'
+        )
+        assert second_page['next'] is None
+
+        previous_page = client.get(second_page['previous']).json()
+        assert previous_page['results'] == first_page['results'], (
+            'Проверьте, что ссылка `previous` возвращает предыдущую страницу.'
+        )
+
+        response = client.get(url, {'cursor': 'broken'})
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_02_titles_cursor(self, client, admin_client):
+        _, titles = create_reviews(admin_client, {})
+        url = '/api/v1/titles/'
+        response = client.get(url, {'pagination': 'cursor', 'page_size': 1})
+        data = response.json()
+        assert [item['id'] for item in data['results']] == [titles[0]['id']]
+        data = client.get(data['next']).json()
+        assert [item['id'] for item in data['results']] == [titles[1]['id']]
+        assert data['next'] is None
+
+    @pytest.mark.parametrize('position', (
+        ['notadate', 1], [None, 1], ['2022-01-01T00:00:00+00:00', 'abc'],
+    ))
+    def test_03_forged_reviews_cursor(self, client, admin_client, position):
+        _, titles = create_reviews(admin_client, {})
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        response = client.get(url, {'cursor': cursor(position)})
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что курсор с неверными значениями возвращает ответ '
+            'со статусом 404.'
+        )
+
+    @pytest.mark.parametrize('position', (['abc'], [[1]], [None], [{}]))
+    def test_04_forged_titles_cursor(self, client, position):
+        response = client.get('/api/v1/titles/', {'cursor': cursor(position)})
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что курсор с неверными значениями возвращает ответ '
+            'со статусом 404.'
+        )
@@ -0,0 +1,99 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_genre, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10ResponseCache:
+
+    def test_01_cache_invalidated_on_write(self, client, admin_client):
+        url = '/api/v1/genres/'
+        genres = create_genre(admin_client)
+
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert response['X-Cache'] == 'MISS'
+        response = client.get(url)
+        assert response['X-Cache'] == 'HIT', (
+            f'Проверьте, что повторный GET-запрос к `{url}` отдается из кэша.'
+        )
+        assert response.json()['count'] == len(genres)
+
+        admin_client.delete(f'{url}{genres[0]["slug"]}/')
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что удаление жанра сбрасывает кэш списка жанров.'
+        )
+        assert response.json()['count'] == len(genres) - 1
+
+    def test_02_title_cache_follows_reviews(self, client, admin_client,
+                                            user_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        assert client.get(url).json()['rating'] is None
+        assert client.get(url)['X-Cache'] == 'HIT'
+
+        user_client.post(
+            f'{url}reviews/', data={'text': 'Отличный фильм', 'score': 9}
+        )
+        assert client.get(url).json()['rating'] == 9, (
+            'Проверьте, что новый отзыв сбрасывает кэш произведения.'
+        )
+
+    def test_03_cache_keyed_on_role(self, client, admin_client, user_client):
+        url = '/api/v1/categories/'
+        client.get(url)
+        assert admin_client.get(url)['X-Cache'] == 'MISS'
+        assert user_client.get(url)['X-Cache'] == 'MISS'
+        assert user_client.get(url)['X-Cache'] == 'HIT'
+
+    def test_04_versions_bumped_after_commit(self, client):
+        from django.db import transaction
+
+        from reviews.models import CollectionVersion, Genre
+
+        url = '/api/v1/genres/'
+        client.get(url)
+        before = CollectionVersion.objects.current(['genres'])
+        with transaction.atomic():
+            Genre.objects.create(name='Драма', slug='drama')
+            assert CollectionVersion.objects.current(['genres']) == before, (
+                'Проверьте, что версия коллекции меняется только после '
+                'фиксации транзакции.'
+            )
+        assert CollectionVersion.objects.current(['genres']) != before
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что запись вне запроса, например из команды '
+            'manage.py, сбрасывает кэш ответов.'
+        )
+        assert response.json()['count'] == 1
+
+    def test_05_entries_expire(self, monkeypatch):
+        from api.v1 import cache
+
+        now = [1000.0]
+        monkeypatch.setattr(cache.time, 'monotonic', lambda: now[0])
+        backend = cache.LRUCacheBackend(timeout=60)
+        backend.set('key', 'value')
+        now[0] += 59
+        assert backend.get('key') == 'value'
+        now[0] += 1
+        assert backend.get('key') is None, (
+            'Проверьте, что записи кэша ответов живут не дольше timeout.'
+        )
+
+    def test_06_cache_keyed_on_host(self, client, admin_client):
+        create_genre(admin_client)
+        url = '/api/v1/genres/?limit=1'
+        response = client.get(url, HTTP_HOST='attacker.example')
+        assert response.json()['next'].startswith('http://attacker.example/')
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['next'].startswith('http://testserver/'), (
+            'Проверьте, что ссылки пагинации из кэша построены по хосту '
+            'текущего запроса.'
+        )
+        assert client.get(url)['X-Cache'] == 'HIT'
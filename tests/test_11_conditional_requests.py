@@ -0,0 +1,91 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_comments, create_reviews, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11ConditionalRequests:
+
+    def test_01_reviews_list_etag(self, client, admin_client, user,
+                                  user_client):
+        reviews, titles = create_reviews(admin_client, {user: user_client})
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+
+        response = client.get(url)
+        etag = response.get('ETag')
+        assert etag and response.get('Last-Modified'), (
+            f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+            'заголовки `ETag` и `Last-Modified`.'
+        )
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{url}` с актуальным '
+            '`If-None-Match` возвращает ответ со статусом 304.'
+        )
+
+        user_client.patch(f'{url}{reviews[0]["id"]}/', data={'score': 3})
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что изменение отзыва меняет `ETag` списка отзывов.'
+        )
+        assert response['ETag'] != etag
+
+    def test_02_if_match(self, admin_client, user, user_client):
+        reviews, titles = create_reviews(admin_client, {user: user_client})
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/'
+        etag = user_client.get(url)['ETag']
+
+        response = user_client.patch(
+            url, data={'text': 'новый текст'}, HTTP_IF_MATCH=etag
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert response['ETag'] != etag
+
+        response = user_client.delete(url, HTTP_IF_MATCH=etag)
+        assert response.status_code == HTTPStatus.PRECONDITION_FAILED, (
+            'Проверьте, что DELETE-запрос с устаревшим `If-Match` '
+            'возвращает ответ со статусом 412.'
+        )
+        response = user_client.delete(url, HTTP_IF_MATCH='*')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+
+    def test_03_author_rename(self, client, admin_client, user, user_client):
+        comments, reviews, titles = create_comments(
+            admin_client, {user: user_client})
+        reviews_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        comments_url = f'{reviews_url}{reviews[0]["id"]}/comments/'
+        urls = (reviews_url, f'{reviews_url}{reviews[0]["id"]}/',
+                comments_url, f'{comments_url}{comments[0]["id"]}/')
+        etags = {url: client.get(url)['ETag'] for url in urls}
+
+        response = admin_client.patch(f'/api/v1/users/{user.username}/',
+                                      data={'username': 'renamed'})
+        assert response.status_code == HTTPStatus.OK
+        for url, etag in etags.items():
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что смена имени автора меняет `ETag` `{url}`.'
+            )
+            assert 'renamed' in response.content.decode()
+
+    def test_04_title_patch_with_genre(self, client, admin_client):
+        titles, _, genres = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        etag = admin_client.get(url)['ETag']
+        response = admin_client.patch(
+            url, data={'genre': [genres[1]['slug']]}, HTTP_IF_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK
+        etag = response['ETag']
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            'Проверьте, что `ETag` ответа на PATCH-запрос с `genre` '
+            'совпадает с `ETag` сохраненного произведения.'
+        )
+        response = admin_client.patch(
+            url, data={'name': 'Новое название'}, HTTP_IF_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что `ETag` ответа на PATCH-запрос подходит для '
+            'следующего `If-Match`.'
+        )
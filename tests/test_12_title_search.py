@@ -0,0 +1,46 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12TitleSearch:
+
+    def search(self, client, **params):
+        response = client.get('/api/v1/titles/', params)
+        assert response.status_code == HTTPStatus.OK
+        return [title['name'] for title in response.json()['results']]
+
+    def test_01_name_search(self, client, admin_client):
+        create_titles(admin_client)
+        assert self.search(client, name='терминатор') == ['Терминатор'], (
+            'Проверьте, что фильтр `name` не зависит от регистра.'
+        )
+        assert self.search(client, name='Креп') == ['Крепкий орешек'], (
+            'Проверьте, что фильтр `name` находит произведение по началу '
+            'слова.'
+        )
+        assert self.search(client, name='back') == [], (
+            'Проверьте, что фильтр `name` не ищет по описанию.'
+        )
+
+    def test_02_q_search(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        assert self.search(client, q='yippie') == ['Крепкий орешек'], (
+            'Проверьте, что параметр `q` ищет в описании произведения.'
+        )
+        admin_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/',
+            data={'description': 'Yippie, он вернется'}
+        )
+        assert self.search(client, q='yippie орешек') == [
+            'Крепкий орешек'
+        ], 'Проверьте, что параметр `q` учитывает все слова запроса.'
+        assert len(self.search(client, q='yippie')) == 2, (
+            'Проверьте, что поисковый индекс обновляется при изменении '
+            'произведения.'
+        )
+        admin_client.delete(f'/api/v1/titles/{titles[1]["id"]}/')
+        assert self.search(client, q='yippie') == ['Терминатор']
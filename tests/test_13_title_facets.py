@@ -0,0 +1,47 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13TitleFacets:
+
+    def test_01_facets(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        url = '/api/v1/titles/facets/'
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{url}` возвращает ответ со '
+            'статусом 200.'
+        )
+        data = response.json()
+        assert data['count'] == 2
+        assert {item['slug']: item['count'] for item in data['genre']} == {
+            genres[0]['slug']: 1, genres[1]['slug']: 1, genres[2]['slug']: 1
+        }, 'Проверьте подсчет произведений по жанрам.'
+        assert {item['slug']: item['count'] for item in data['category']} == {
+            categories[0]['slug']: 1, categories[1]['slug']: 1
+        }, 'Проверьте подсчет произведений по категориям.'
+        assert data['year'] == [
+            {'year': 1984, 'count': 1}, {'year': 1988, 'count': 1}
+        ], 'Проверьте подсчет произведений по годам.'
+
+        response = client.get(
+            url, {'facets': 'year', 'genre': genres[0]['slug']}
+        )
+        assert response.json() == {
+            'count': 1, 'year': [{'year': 1984, 'count': 1}]
+        }, (
+            'Проверьте, что фасеты учитывают фильтры и параметр `facets`.'
+        )
+
+        admin_client.delete(f'/api/v1/titles/{titles[0]["id"]}/')
+        response = client.get(url, {'facets': 'year'})
+        assert response.json()['count'] == 1, (
+            'Проверьте, что удаление произведения сбрасывает кэш фасетов.'
+        )
+
+        response = client.get(url, {'facets': 'author'})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
@@ -0,0 +1,66 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14RatingStats:
+
+    def test_01_rating_stats(self, client, admin_client, user_client,
+                             moderator_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        url = f'/api/v1/titles/{title_id}/rating-stats/'
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{url}` возвращает ответ со '
+            'статусом 200.'
+        )
+        assert response.json()['count'] == 0
+        assert response.json()['median'] is None
+
+        create_single_review(admin_client, title_id, 'отзыв 1', 2)
+        create_single_review(user_client, title_id, 'отзыв 2', 9)
+        response = create_single_review(
+            moderator_client, title_id, 'отзыв 3', 10
+        )
+        data = client.get(url).json()
+        assert data['histogram']['2'] == 1
+        assert data['histogram']['9'] == 1
+        assert data['histogram']['10'] == 1
+        assert (data['count'], data['mean'], data['median']) == (3, 7, 9), (
+            f'Проверьте расчет количества, средней и медианы в `{url}`.'
+        )
+
+        moderator_client.patch(
+            f'/api/v1/titles/{title_id}/reviews/{response.json()["id"]}/',
+            data={'score': 2}
+        )
+        data = client.get(url).json()
+        assert (data['histogram']['2'], data['histogram']['10']) == (2, 0), (
+            'Проверьте, что гистограмма обновляется при изменении оценки.'
+        )
+        assert data['median'] == 2
+
+    def test_02_rebuild_command(self, client, admin_client, user_client):
+        from reviews.models import Title
+
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(user_client, titles[0]['id'], 'отзыв', 7)
+        call_command('rebuild_ratings', '--check')
+
+        Title.objects.filter(pk=titles[0]['id']).update(
+            score_7=0, rating_sum=0, rating_count=0)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        assert client.get(url).json()['rating'] is None
+        with pytest.raises(CommandError):
+            call_command('rebuild_ratings', '--check')
+        call_command('rebuild_ratings')
+        call_command('rebuild_ratings', '--check')
+        assert Title.objects.get(pk=titles[0]['id']).score_7 == 1
+        assert client.get(url).json()['rating'] == 7, (
+            'Проверьте, что `rebuild_ratings` сбрасывает кэш ответов.'
+        )
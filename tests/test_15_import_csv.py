@@ -0,0 +1,421 @@
+import os
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from tests.conftest import MANAGE_PATH
+
+DATA_PATH = os.path.join(MANAGE_PATH, 'static', 'data')
+
+
+def count_rows(filename):
+    from reviews.importing import read_rows
+
+    return sum(1 for _ in read_rows(os.path.join(DATA_PATH, filename)))
+
+
+INVALID_ROWS = {
+    'titles.csv': (
+        '33,Из будущего,3000,1',
+        '34,Без категории,2000,99',
+    ),
+    'review.csv': (
+        '1000,1,Мало звезд,100,11,2019-09-24T21:08:21.567Z',
+        '1001,999,Нет произведения,100,5,2019-09-24T21:08:21.567Z',
+        '1002,2,Нет автора,999,5,2019-09-24T21:08:21.567Z',
+        '1003,33,Произведение отклонено,100,5,2019-09-24T21:08:21.567Z',
+    ),
+}
+EXPECTED_ERRORS = {
+    ('titles', '33'): 'year',
+    ('titles', '34'): 'category',
+    ('review', '1000'): 'score',
+    ('review', '1001'): 'title_id',
+    ('review', '1002'): 'author',
+    ('review', '1003'): 'title_id',
+}
+
+
+def copy_with_invalid_rows(path):
+    import shutil
+
+    shutil.copytree(DATA_PATH, path, dirs_exist_ok=True)
+    for filename, rows in INVALID_ROWS.items():
+        # Файлы могут не заканчиваться переводом строки, а пустые строки
+        # csv пропускает.
+        with open(os.path.join(path, filename), 'a', encoding='utf8') as file:
+            file.write('\n' + '\n'.join(rows) + '\n')
+
+
+def check_rejected(report, out):
+    import json
+
+    from reviews.models import Review, Title
+
+    with open(report, encoding='utf8') as file:
+        rejects = [json.loads(line) for line in file]
+    errors = {
+        (reject['table'], reject['id']): set(reject['errors'])
+        for reject in rejects
+    }
+    assert errors == {
+        key: {column} for key, column in EXPECTED_ERRORS.items()
+    }, (
+        'Проверьте, что `import_csv` записывает в отчет каждую отклоненную '
+        'строку с id и столбцом, не прошедшим проверку.'
+    )
+    assert all(reject['row'] > 0 for reject in rejects)
+    assert Title.objects.count() == count_rows('titles.csv'), (
+        'Проверьте, что `import_csv` загружает строки, прошедшие проверку.'
+    )
+    assert Review.objects.count() == count_rows('review.csv')
+    assert 'Отклонено строк: 6' in out.getvalue()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15ImportCsv:
+
+    def test_01_import(self):
+        from reviews.importing import TABLES
+        from reviews.models import Review, Title
+
+        out = StringIO()
+        call_command(
+            'import_csv', path=DATA_PATH, batch_size=10, stdout=out
+        )
+        for table in TABLES:
+            assert table.model.objects.count() == count_rows(table.file), (
+                f'Проверьте, что команда `import_csv` загружает все строки '
+                f'файла `{table.file}`.'
+            )
+            assert f'{table.file}: ' in out.getvalue(), (
+                'Проверьте, что команда `import_csv` выводит скорость '
+                'загрузки каждой таблицы.'
+            )
+        review = Review.objects.get(pk=1)
+        assert review.pub_date.year == 2019, (
+            'Проверьте, что `import_csv` сохраняет дату публикации из файла.'
+        )
+        title = Title.objects.get(pk=review.title_id)
+        assert title.rating_count == title.reviews.count(), (
+            'Проверьте, что после загрузки пересчитывается рейтинг.'
+        )
+        call_command('rebuild_ratings', '--check', stdout=out)
+
+    def test_02_parallel_import(self):
+        from reviews.importing import TABLES
+
+        out = StringIO()
+        call_command(
+            'import_csv', path=DATA_PATH, workers=2, chunk_size=10,
+            stdout=out
+        )
+        for table in TABLES:
+            assert table.model.objects.count() == count_rows(table.file), (
+                'Проверьте, что команда `import_csv --workers` загружает '
+                f'все строки файла `{table.file}`.'
+            )
+        call_command('rebuild_ratings', '--check', stdout=out)
+
+    def test_03_dependency_order(self):
+        from reviews.importing import TABLES
+        from reviews.pipeline import dependency_order
+
+        ordered = [table.name for table in dependency_order(reversed(TABLES))]
+        for table in TABLES:
+            for dependency in table.depends_on:
+                assert ordered.index(dependency) < ordered.index(table.name)
+
+    def test_04_incremental_import(self, tmp_path):
+        import shutil
+
+        from reviews.models import Review, Title
+
+        shutil.copytree(DATA_PATH, tmp_path, dirs_exist_ok=True)
+        options = {'path': str(tmp_path), 'incremental': True,
+                   'chunk_size': 20}
+        call_command('import_csv', stdout=StringIO(), **options)
+        call_command('import_csv', stdout=StringIO(), **options)
+        assert Review.objects.count() == count_rows('review.csv'), (
+            'Проверьте, что повторный запуск `import_csv --incremental` '
+            'не дублирует записи.'
+        )
+
+        titles = tmp_path / 'titles.csv'
+        titles.write_text(
+            titles.read_text(encoding='utf8').replace(
+                'Побег из Шоушенка', 'Побег из Алькатраса'),
+            encoding='utf8'
+        )
+        out = StringIO()
+        call_command('import_csv', stdout=out, **options)
+        output = out.getvalue()
+        assert 'users.csv: без изменений' in output
+        assert 'titles.csv: изменено блоков 1 из 2' in output, (
+            'Проверьте, что `import_csv --incremental` загружает только '
+            'изменившиеся блоки строк.'
+        )
+        assert Title.objects.get(pk=1).name == 'Побег из Алькатраса'
+        assert Title.objects.count() == count_rows('titles.csv')
+        call_command('rebuild_ratings', '--check', stdout=out)
+
+    def test_05_fast_import_restores_indexes(self, tmp_path):
+        from django.db import connection
+
+        from reviews.importing import TABLES
+        from reviews.models import Review
+
+        def indexes():
+            with connection.cursor() as cursor:
+                return {
+                    name
+                    for table in ('reviews_review', 'reviews_comment')
+                    for name in connection.introspection.get_constraints(
+                        cursor, table)
+                }
+
+        before = indexes()
+        with pytest.raises(FileNotFoundError):
+            call_command(
+                'import_csv', path=str(tmp_path), fast=True,
+                stdout=StringIO()
+            )
+        assert indexes() == before, (
+            'Проверьте, что `import_csv --fast` восстанавливает индексы, '
+            'даже если загрузка прервалась.'
+        )
+
+        call_command('import_csv', path=DATA_PATH, fast=True,
+                     stdout=StringIO())
+        assert indexes() == before
+        assert Review.objects.count() == count_rows('review.csv')
+        for table in TABLES:
+            assert table.model.objects.exists()
+
+    def test_06_invalid_rows_are_reported(self, tmp_path):
+        data = tmp_path / 'data'
+        copy_with_invalid_rows(data)
+        report = tmp_path / 'errors.jsonl'
+        out = StringIO()
+        call_command('import_csv', path=str(data), report=str(report),
+                     batch_size=10, stdout=out)
+        check_rejected(report, out)
+        call_command('rebuild_ratings', '--check', stdout=out)
+
+    def test_07_parallel_invalid_rows_are_reported(self, tmp_path):
+        data = tmp_path / 'data'
+        copy_with_invalid_rows(data)
+        report = tmp_path / 'errors.jsonl'
+        out = StringIO()
+        call_command('import_csv', path=str(data), report=str(report),
+                     workers=2, chunk_size=10, stdout=out)
+        check_rejected(report, out)
+
+    def test_08_clean_import_has_no_report(self, tmp_path):
+        report = tmp_path / 'errors.jsonl'
+        call_command('import_csv', path=DATA_PATH, report=str(report),
+                     stdout=StringIO())
+        assert not report.exists(), (
+            'Проверьте, что `import_csv` не создает отчет, если все строки '
+            'прошли проверку.'
+        )
+
+    def test_09_resume_after_failure(self, tmp_path, monkeypatch):
+        import shutil
+
+        from django.core.management.base import CommandError
+
+        from reviews import importing
+        from reviews.importing import TABLES
+        from reviews.models import ImportCheckpoint, Review
+
+        shutil.copytree(DATA_PATH, tmp_path, dirs_exist_ok=True)
+        insert_batch = importing.insert_batch
+        calls = []
+
+        def failing_insert(table, values, batch_size):
+            if table.name == 'review':
+                calls.append(table)
+                if len(calls) == 3:
+                    raise RuntimeError('Сбой загрузки')
+            insert_batch(table, values, batch_size)
+
+        monkeypatch.setattr(importing, 'insert_batch', failing_insert)
+        out = StringIO()
+        with pytest.raises(RuntimeError):
+            call_command('import_csv', path=str(tmp_path), batch_size=10,
+                         progress_interval=0, stdout=out)
+        checkpoint = ImportCheckpoint.objects.get(table='review')
+        assert checkpoint.rows == 20 and not checkpoint.done, (
+            'Проверьте, что `import_csv` сохраняет позицию вместе с каждым '
+            'пакетом.'
+        )
+        assert Review.objects.count() == 20
+        assert 'осталось' in out.getvalue(), (
+            'Проверьте, что `import_csv` выводит прогресс с оценкой '
+            'оставшегося времени.'
+        )
+        monkeypatch.setattr(importing, 'insert_batch', insert_batch)
+
+        review_file = tmp_path / 'review.csv'
+        stat = review_file.stat()
+        os.utime(review_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+        with pytest.raises(CommandError):
+            call_command('import_csv', path=str(tmp_path), resume=True,
+                         stdout=StringIO())
+        os.utime(review_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+        out = StringIO()
+        call_command('import_csv', path=str(tmp_path), resume=True,
+                     workers=2, chunk_size=10, stdout=out)
+        assert 'users.csv: уже загружен' in out.getvalue(), (
+            'Проверьте, что `import_csv --resume` пропускает загруженные '
+            'файлы.'
+        )
+        for table in TABLES:
+            assert table.model.objects.count() == count_rows(table.file), (
+                'Проверьте, что `import_csv --resume` догружает '
+                f'файл `{table.file}` без повторов.'
+            )
+        call_command('rebuild_ratings', '--check', stdout=out)
+
+    def test_10_import_invalidates_responses(self, client):
+        from reviews.models import Review
+
+        url = '/api/v1/titles/'
+        assert client.get(url).json()['count'] == 0
+        assert client.get(url)['X-Cache'] == 'HIT'
+        call_command('import_csv', path=DATA_PATH, stdout=StringIO())
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что `import_csv` сбрасывает кэш ответов.'
+        )
+        assert response.json()['count'] == count_rows('titles.csv')
+
+        review = Review.objects.first()
+        comments = (f'{url}{review.title_id}/reviews/{review.id}'
+                    '/comments/')
+        etags = {
+            path: client.get(path)['ETag']
+            for path in (f'{url}{review.title_id}/', comments)
+        }
+        call_command('import_csv', path=DATA_PATH, incremental=True,
+                     stdout=StringIO())
+        for path, etag in etags.items():
+            response = client.get(path, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == 200, (
+                'Проверьте, что загрузка обновляет метки изменения '
+                f'и ETag ответа `{path}` меняется.'
+            )
+
+    def test_11_duplicates_rejected_against_db(self, tmp_path):
+        import json
+        import shutil
+
+        from reviews.importing import TABLES
+        from reviews.models import Genre, Review
+
+        call_command('import_csv', path=DATA_PATH, stdout=StringIO())
+        report = tmp_path / 'errors.jsonl'
+        call_command('import_csv', path=DATA_PATH, report=str(report),
+                     stdout=StringIO())
+        with open(report, encoding='utf8') as file:
+            rejects = [json.loads(line) for line in file]
+        assert len(rejects) == sum(
+            count_rows(table.file) for table in TABLES), (
+            'Проверьте, что повторная загрузка отклоняет строки с id, '
+            'которые уже есть в базе, а не падает с IntegrityError.'
+        )
+
+        data = tmp_path / 'data'
+        shutil.copytree(DATA_PATH, data)
+        (data / 'genre.csv').write_text(
+            'id,name,slug\n500,Новый,drama\n501,Драма,new\n',
+            encoding='utf8')
+        review = Review.objects.first()
+        (data / 'review.csv').write_text(
+            'id,title_id,text,author,score,pub_date\n'
+            f'500,{review.title_id},Еще,{review.author_id},5,'
+            '2019-09-24T21:08:21.567Z\n',
+            encoding='utf8')
+        (data / 'users.csv').write_text(
+            'id,username,email,role,bio,first_name,last_name\n'
+            '500,bingobongo,new@yamdb.fake,user,,,\n'
+            '501,new,BingoBongo@yamdb.fake,user,,,\n',
+            encoding='utf8')
+        report = tmp_path / 'duplicates.jsonl'
+        call_command('import_csv', path=str(data), report=str(report),
+                     incremental=True, stdout=StringIO())
+        with open(report, encoding='utf8') as file:
+            errors = {
+                (reject['table'], reject['id']): set(reject['errors'])
+                for reject in map(json.loads, file)
+            }
+        assert errors == {
+            ('genre', '500'): {'slug'},
+            ('genre', '501'): {'name'},
+            ('review', '500'): {'title_id, author_id'},
+            ('users', '500'): {'username'},
+            ('users', '501'): {'email'},
+        }, (
+            'Проверьте, что уникальные поля и сочетания проверяются '
+            'по записям в базе.'
+        )
+        assert not Genre.objects.filter(pk__gte=500).exists()
+
+    def test_12_incremental_review_moved(self, tmp_path):
+        import csv
+        import shutil
+
+        from reviews.models import Review, Title
+
+        shutil.copytree(DATA_PATH, tmp_path, dirs_exist_ok=True)
+        options = {'path': str(tmp_path), 'incremental': True,
+                   'chunk_size': 1}
+        call_command('import_csv', stdout=StringIO(), **options)
+        review = Review.objects.get(pk=1)
+        target = Title.objects.exclude(
+            reviews__author=review.author_id).first()
+        path = tmp_path / 'review.csv'
+        with open(path, encoding='utf8', newline='') as file:
+            rows = list(csv.reader(file))
+        for row in rows[1:]:
+            if row[0] == '1':
+                row[1] = str(target.id)
+        with open(path, 'w', encoding='utf8', newline='') as file:
+            csv.writer(file).writerows(rows)
+        call_command('import_csv', stdout=StringIO(), **options)
+        assert Review.objects.get(pk=1).title_id == target.id
+        out = StringIO()
+        call_command('rebuild_ratings', '--check', stdout=out)
+        assert 'расхождений: 0' in out.getvalue(), (
+            'Проверьте, что `import_csv --incremental` пересчитывает '
+            'рейтинг прежнего произведения перенесенного отзыва.'
+        )
+
+    def test_13_incremental_retries_rejected_rows(self, tmp_path):
+        import shutil
+
+        from reviews.models import GenreTitle, Review
+
+        data = tmp_path / 'data'
+        shutil.copytree(DATA_PATH, data)
+        path = data / 'titles.csv'
+        original = path.read_text(encoding='utf8')
+        header, first, *rest = original.splitlines(keepends=True)
+        title_id = first.split(',')[0]
+        path.write_text(header + ''.join(rest), encoding='utf8')
+        options = {'path': str(data), 'incremental': True,
+                   'report': str(tmp_path / 'errors.jsonl')}
+        call_command('import_csv', stdout=StringIO(), **options)
+        assert not Review.objects.filter(title_id=title_id).exists()
+
+        path.write_text(original, encoding='utf8')
+        call_command('import_csv', stdout=StringIO(), **options)
+        assert Review.objects.count() == count_rows('review.csv'), (
+            'Проверьте, что `import_csv --incremental` загружает строки, '
+            'отклоненные ранее из-за отсутствующей записи, когда она '
+            'появилась, даже если их файл не изменился.'
+        )
+        assert GenreTitle.objects.count() == count_rows('genre_title.csv')
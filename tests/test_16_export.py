@@ -0,0 +1,69 @@
+import json
+import os
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from tests.test_15_import_csv import DATA_PATH
+
+
+def read_dir(path):
+    result = {}
+    for filename in sorted(os.listdir(path)):
+        with open(os.path.join(path, filename), encoding='utf8') as file:
+            result[filename] = file.read()
+    return result
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16Export:
+
+    def test_01_export_round_trip(self, tmp_path):
+        from reviews.importing import TABLES
+
+        out = StringIO()
+        call_command('import_csv', path=DATA_PATH, stdout=out)
+        first = tmp_path / 'first'
+        first.mkdir()
+        call_command('export_csv', str(first), chunk_size=7, stdout=out)
+
+        for table in reversed(TABLES):
+            table.model.objects.all().delete()
+        call_command('import_csv', path=str(first), stdout=out)
+        second = tmp_path / 'second'
+        second.mkdir()
+        call_command('export_csv', str(second), stdout=out)
+
+        assert read_dir(first) == read_dir(second), (
+            'Проверьте, что выгрузка `export_csv` загружается обратно '
+            'командой `import_csv` без потерь.'
+        )
+        assert len(read_dir(first)) == len(TABLES)
+
+    def test_02_export_endpoint(self, client, user_client, admin_client):
+        call_command('import_csv', path=DATA_PATH, stdout=StringIO())
+        url = '/api/v1/export/review/'
+        assert client.get(url).status_code == HTTPStatus.UNAUTHORIZED
+        assert user_client.get(url).status_code == HTTPStatus.FORBIDDEN, (
+            f'Проверьте, что `{url}` доступен только администратору.'
+        )
+
+        response = admin_client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert response.streaming, (
+            f'Проверьте, что `{url}` отдает потоковый ответ.'
+        )
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        assert lines[0] == 'id,title_id,text,author,score,pub_date'
+
+        response = admin_client.get(url, {'output': 'ndjson'})
+        rows = [
+            json.loads(line) for line in
+            b''.join(response.streaming_content).decode().splitlines()
+        ]
+        assert rows[0]['id'] == 1 and rows[0]['score'] == 10
+        assert admin_client.get(
+            '/api/v1/export/unknown/'
+        ).status_code == HTTPStatus.NOT_FOUND
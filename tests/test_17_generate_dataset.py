@@ -0,0 +1,44 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from tests.test_16_export import read_dir
+
+SIZES = {'users': 20, 'titles': 15, 'reviews': 120, 'comments': 200}
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17GenerateDataset:
+
+    def test_01_generate_and_import(self, tmp_path):
+        from reviews.models import Comment, Review, Title
+
+        first = tmp_path / 'first'
+        second = tmp_path / 'second'
+        first.mkdir()
+        second.mkdir()
+        call_command('generate_dataset', str(first), seed=7,
+                     stdout=StringIO(), **SIZES)
+        call_command('generate_dataset', str(second), seed=7,
+                     stdout=StringIO(), **SIZES)
+        assert read_dir(first) == read_dir(second), (
+            'Проверьте, что `generate_dataset` с одинаковым `--seed` '
+            'создает одинаковые файлы.'
+        )
+
+        call_command('import_csv', path=str(first), stdout=StringIO())
+        assert Review.objects.count() == SIZES['reviews']
+        assert Comment.objects.count() == SIZES['comments']
+        counts = list(
+            Title.objects.order_by('id').values_list(
+                'rating_count', flat=True)
+        )
+        assert counts[0] > counts[-1], (
+            'Проверьте, что отзывы распределены неравномерно.'
+        )
+        from reviews.management.commands.generate_dataset import END_DATE
+
+        assert not Title.objects.filter(year__gt=END_DATE.year).exists(), (
+            'Проверьте, что годы произведений не зависят от текущей даты.'
+        )
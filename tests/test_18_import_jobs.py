@@ -0,0 +1,170 @@
+import gzip
+import json
+from http import HTTPStatus
+from io import BytesIO, StringIO
+
+import pytest
+from django.core.management import call_command
+
+from tests.test_15_import_csv import DATA_PATH
+
+
+def upload(client, table, name, content):
+    file = BytesIO(content)
+    file.name = name
+    return client.post(f'/api/v1/import/{table}/', {'file': file},
+                       format='multipart')
+
+
+def run_jobs():
+    call_command('run_import_jobs', once=True, stdout=StringIO())
+
+
+@pytest.fixture(autouse=True)
+def upload_dir(settings, tmp_path):
+    settings.IMPORT_UPLOAD_DIR = tmp_path / 'uploads'
+    return settings.IMPORT_UPLOAD_DIR
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18ImportJobs:
+
+    def test_01_import_permissions(self, client, user_client,
+                                   admin_client):
+        content = b'id,name,slug\n1,Drama,drama\n'
+        url = '/api/v1/import/genre/'
+        assert client.post(url).status_code == HTTPStatus.UNAUTHORIZED
+        assert upload(
+            user_client, 'genre', 'genre.csv', content
+        ).status_code == HTTPStatus.FORBIDDEN, (
+            f'Проверьте, что `{url}` доступен только администратору.'
+        )
+        assert upload(
+            admin_client, 'unknown', 'genre.csv', content
+        ).status_code == HTTPStatus.NOT_FOUND
+        assert upload(
+            admin_client, 'genre', 'genre.xlsx', content
+        ).status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что загрузка файла неизвестного формата '
+            'возвращает 400.'
+        )
+        assert user_client.get(
+            '/api/v1/import-jobs/'
+        ).status_code == HTTPStatus.FORBIDDEN
+
+    def test_02_csv_job(self, admin_client, upload_dir):
+        from reviews.models import Genre
+
+        response = upload(
+            admin_client, 'genre', 'genre.csv',
+            'id,name,slug\n1,Драма,drama\n2,Комедия,comedy\n'.encode())
+        assert response.status_code == HTTPStatus.ACCEPTED, (
+            'Проверьте, что загрузка файла ставит задание в очередь и '
+            'возвращает 202.'
+        )
+        job = response.json()
+        assert job['status'] == 'queued'
+        assert response['Location'].endswith(f'/import-jobs/{job["id"]}/')
+        assert len(list(upload_dir.iterdir())) == 1, (
+            'Проверьте, что загруженный файл сохраняется на диск.'
+        )
+
+        run_jobs()
+        job = admin_client.get(f'/api/v1/import-jobs/{job["id"]}/').json()
+        assert job['status'] == 'done', (
+            'Проверьте, что `run_import_jobs` выполняет задание.'
+        )
+        assert job['rows'] == job['loaded'] == 2
+        assert job['rejected'] == 0 and job['errors'] == []
+        assert job['throughput'] is not None
+        assert Genre.objects.count() == 2
+        assert not list(upload_dir.iterdir()), (
+            'Проверьте, что загруженный файл удаляется после загрузки.'
+        )
+
+    def test_03_gzip_ndjson_job(self, admin_client, admin):
+        from reviews.models import Review, Title
+
+        call_command('import_csv', path=DATA_PATH, stdout=StringIO())
+        rows = [
+            {'id': 1000, 'title_id': 1, 'text': 'Отлично', 'author': admin.id,
+             'score': 7, 'pub_date': '2023-01-01T00:00:00Z'},
+            {'id': 1001, 'title_id': 1, 'text': 'Ошибка', 'author': admin.id,
+             'score': 11, 'pub_date': '2023-01-01T00:00:00Z'},
+        ]
+        content = gzip.compress('\n'.join(
+            json.dumps(row, ensure_ascii=False) for row in rows
+        ).encode())
+        before = Title.objects.get(pk=1).rating_count
+        response = upload(admin_client, 'review', 'review.ndjson.gz',
+                          content)
+        assert response.status_code == HTTPStatus.ACCEPTED
+
+        run_jobs()
+        job = admin_client.get(response['Location']).json()
+        assert job['status'] == 'done'
+        assert job['loaded'] == 1 and job['rejected'] == 1, (
+            'Проверьте, что задание загружает строки, прошедшие проверку, '
+            'и считает отклоненные.'
+        )
+        assert job['errors'][0]['id'] == '1001'
+        assert 'score' in job['errors'][0]['errors']
+        assert Review.objects.filter(pk=1000).exists()
+        assert Title.objects.get(pk=1).rating_count == before + 1, (
+            'Проверьте, что после загрузки отзывов пересчитывается рейтинг.'
+        )
+
+        listing = admin_client.get('/api/v1/import-jobs/').json()
+        assert listing['results'][0]['id'] == job['id']
+
+    def test_04_file_must_be_upload(self, admin_client):
+        response = admin_client.post('/api/v1/import/genre/',
+                                     {'file': 'genre.csv'},
+                                     format='multipart')
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что строка вместо файла в поле file возвращает 400.'
+        )
+
+    def test_05_job_invalidates_responses(self, client, admin_client):
+        url = '/api/v1/genres/'
+        assert client.get(url).json()['count'] == 0
+        assert client.get(url)['X-Cache'] == 'HIT'
+        upload(admin_client, 'genre', 'genre.csv',
+               'id,name,slug\n1,Драма,drama\n'.encode())
+        run_jobs()
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что выполненное задание сбрасывает кэш ответов.'
+        )
+        assert response.json()['count'] == 1
+
+    def test_06_stale_running_job_requeued(self, admin_client, settings):
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        from reviews.models import Genre, ImportJob
+
+        response = upload(admin_client, 'genre', 'genre.csv',
+                          'id,name,slug\n1,Драма,drama\n'.encode())
+        job = ImportJob.objects.get(pk=response.json()['id'])
+        started = timezone.now() - settings.IMPORT_JOB_LEASE
+        ImportJob.objects.filter(pk=job.pk).update(
+            status=ImportJob.Status.RUNNING, started=started,
+            heartbeat=started + timedelta(minutes=1))
+        run_jobs()
+        job.refresh_from_db()
+        assert job.status == ImportJob.Status.RUNNING, (
+            'Проверьте, что задание с действующей отметкой выполнения '
+            'не забирается повторно.'
+        )
+        ImportJob.objects.filter(pk=job.pk).update(
+            heartbeat=started - timedelta(seconds=1))
+        run_jobs()
+        job.refresh_from_db()
+        assert job.status == ImportJob.Status.DONE, (
+            'Проверьте, что `run_import_jobs` возвращает в очередь '
+            'задания, выполнение которых не отмечалось дольше '
+            '`IMPORT_JOB_LEASE`.'
+        )
+        assert Genre.objects.count() == 1
@@ -0,0 +1,125 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def post_titles(client, count, genres, category):
+    data = [
+        {'name': f'Произведение {index}', 'year': 2000 + index % 20,
+         'genre': genres, 'category': category,
+         'description': f'Описание {index}'}
+        for index in range(count)
+    ]
+    with CaptureQueriesContext(connection) as queries:
+        response = client.post('/api/v1/titles/', data=data, format='json')
+    return response, len(queries)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19BulkCreate:
+
+    def test_01_bulk_genres_and_categories(self, admin_client, user_client):
+        from reviews.models import Category, Genre
+
+        genres = [
+            {'name': 'Драма', 'slug': 'drama'},
+            {'name': 'Комедия', 'slug': 'comedy'},
+            {'name': 'Ужасы', 'slug': 'horror'},
+        ]
+        assert user_client.post(
+            '/api/v1/genres/', data=genres, format='json'
+        ).status_code == HTTPStatus.FORBIDDEN
+        response = admin_client.post('/api/v1/genres/', data=genres,
+                                     format='json')
+        assert response.status_code == HTTPStatus.CREATED, (
+            'Проверьте, что POST-запрос администратора со списком жанров '
+            'к `/api/v1/genres/` возвращает ответ со статусом 201.'
+        )
+        assert response.json() == genres
+        assert Genre.objects.count() == len(genres)
+
+        categories = [
+            {'name': 'Фильм', 'slug': 'movie'},
+            {'name': 'Книга', 'slug': 'book'},
+            {'name': 'Снова фильм', 'slug': 'movie'},
+            {'name': 'Плохой', 'slug': ':-)'},
+        ]
+        response = admin_client.post('/api/v1/categories/', data=categories,
+                                     format='json')
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что список с ошибками возвращает ответ со статусом '
+            '400.'
+        )
+        errors = response.json()
+        assert len(errors) == len(categories), (
+            'Проверьте, что ответ содержит ошибки по каждому элементу '
+            'списка в том же порядке.'
+        )
+        assert 'slug' in errors[3]
+        assert Category.objects.count() == 0, (
+            'Проверьте, что при ошибке не создается ни один объект списка.'
+        )
+
+        response = admin_client.post('/api/v1/categories/',
+                                     data=categories[:3], format='json')
+        errors = response.json()
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert 'slug' in errors[0] and 'slug' in errors[2], (
+            'Проверьте, что повтор slug внутри списка - ошибка.'
+        )
+        assert errors[1] == {}
+
+        Category.objects.create(name='Фильм', slug='movie')
+        response = admin_client.post('/api/v1/categories/',
+                                     data=categories[:2], format='json')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert 'slug' in response.json()[0] and response.json()[1] == {}
+
+    def test_02_bulk_titles(self, admin_client):
+        from reviews.models import Category, Genre, GenreTitle, Title
+
+        Category.objects.create(name='Фильм', slug='movie')
+        for slug in ('drama', 'comedy'):
+            Genre.objects.create(name=slug, slug=slug)
+        assert admin_client.get('/api/v1/titles/').json()['count'] == 0
+
+        response, few = post_titles(
+            admin_client, 2, ['drama', 'comedy'], 'movie')
+        assert response.status_code == HTTPStatus.CREATED, (
+            'Проверьте, что POST-запрос администратора со списком '
+            'произведений к `/api/v1/titles/` возвращает ответ со '
+            'статусом 201.'
+        )
+        response, many = post_titles(
+            admin_client, 30, ['drama', 'comedy'], 'movie')
+        assert response.status_code == HTTPStatus.CREATED
+        assert many == few, (
+            'Проверьте, что число запросов к базе при создании списка '
+            'произведений не зависит от его длины.'
+        )
+
+        created = response.json()
+        assert len(created) == 30
+        assert Title.objects.count() == 32
+        assert GenreTitle.objects.count() == 64, (
+            'Проверьте, что для произведений списка создаются связи '
+            'с жанрами.'
+        )
+        for item in created:
+            title = Title.objects.get(pk=item['id'])
+            assert title.name == item['name']
+            assert item['genre'] == ['drama', 'comedy']
+            assert set(title.genre.values_list('slug', flat=True)) == {
+                'drama', 'comedy'}
+            assert item['category'] == 'movie'
+        assert admin_client.get('/api/v1/titles/').json()['count'] == 32, (
+            'Проверьте, что после создания списка сбрасывается кэш '
+            'списка произведений.'
+        )
+
+        response, _ = post_titles(admin_client, 2, ['drama', 'none'], 'movie')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert 'genre' in response.json()[0]
+        assert Title.objects.count() == 32
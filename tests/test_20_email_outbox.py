@@ -0,0 +1,145 @@
+from io import StringIO
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+
+
+class CountingBackend(EmailBackend):
+    opened = 0
+
+    def open(self):
+        CountingBackend.opened += 1
+        return True
+
+
+class FailingBackend(EmailBackend):
+
+    def send_messages(self, messages):
+        raise ConnectionError('Почтовый сервер недоступен')
+
+
+def signup(client, index):
+    return client.post('/api/v1/auth/signup/', data={
+        'username': f'user{index}', 'email': f'user{index}@yamdb.fake'})
+
+
+def send_emails(**options):
+    call_command('send_emails', once=True, stdout=StringIO(), **options)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20EmailOutbox:
+
+    def test_01_signup_queues_email(self, client, settings):
+        from users.models import OutgoingEmail
+
+        settings.EMAIL_BACKEND = 'tests.test_20_email_outbox.CountingBackend'
+        CountingBackend.opened = 0
+        outbox_before = len(mail.outbox)
+        for index in range(5):
+            signup(client, index)
+        assert len(mail.outbox) == outbox_before, (
+            'Проверьте, что `/api/v1/auth/signup/` не отправляет письмо '
+            'во время запроса.'
+        )
+        assert OutgoingEmail.objects.filter(sent__isnull=True).count() == 5, (
+            'Проверьте, что `/api/v1/auth/signup/` ставит письмо в очередь.'
+        )
+
+        send_emails(batch_size=3)
+        assert len(mail.outbox) == outbox_before + 5, (
+            'Проверьте, что команда `send_emails` отправляет письма из '
+            'очереди.'
+        )
+        assert CountingBackend.opened == 2, (
+            'Проверьте, что `send_emails` открывает одно соединение на '
+            'пачку писем.'
+        )
+        assert not OutgoingEmail.objects.filter(sent__isnull=True).exists()
+        recipients = {message.to[0] for message in mail.outbox[-5:]}
+        assert recipients == {f'user{index}@yamdb.fake' for index in range(5)}
+
+        send_emails()
+        assert len(mail.outbox) == outbox_before + 5, (
+            'Проверьте, что отправленные письма не отправляются повторно.'
+        )
+
+    def test_02_signup_conflict_queues_nothing(self, client):
+        from users.models import OutgoingEmail
+
+        signup(client, 1)
+        response = client.post('/api/v1/auth/signup/', data={
+            'username': 'user1', 'email': 'other@yamdb.fake'})
+        assert response.status_code == 400
+        assert OutgoingEmail.objects.count() == 1
+
+    def test_03_retry_with_backoff(self, client, settings):
+        from django.utils import timezone
+
+        from users.models import OutgoingEmail
+
+        settings.EMAIL_BACKEND = 'tests.test_20_email_outbox.FailingBackend'
+        signup(client, 1)
+        send_emails()
+        email = OutgoingEmail.objects.get()
+        assert email.sent is None and email.attempts == 1, (
+            'Проверьте, что неудачная отправка увеличивает счетчик попыток.'
+        )
+        assert 'недоступен' in email.last_error
+        assert email.send_after > timezone.now(), (
+            'Проверьте, что неудачное письмо откладывается.'
+        )
+        delay = email.send_after - timezone.now()
+
+        OutgoingEmail.objects.update(send_after=timezone.now())
+        send_emails()
+        email.refresh_from_db()
+        assert email.attempts == 2
+        assert email.send_after - timezone.now() > delay, (
+            'Проверьте, что пауза между попытками растет.'
+        )
+
+        OutgoingEmail.objects.update(send_after=timezone.now())
+        send_emails(max_attempts=2)
+        email.refresh_from_db()
+        assert email.attempts == 2, (
+            'Проверьте, что после max_attempts попыток письмо больше не '
+            'отправляется.'
+        )
+
+        settings.EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+        outbox_before = len(mail.outbox)
+        send_emails()
+        assert len(mail.outbox) == outbox_before + 1
+        email.refresh_from_db()
+        assert email.sent is not None
+
+    def test_04_sent_emails_redacted_and_purged(self, client):
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        from users.models import OutgoingEmail
+        from users.outbox import SENT_RETENTION
+
+        for index in range(3):
+            signup(client, index)
+        send_emails()
+        assert 'Your confirmation code' in mail.outbox[-1].body
+        assert not OutgoingEmail.objects.exclude(body='').exists(), (
+            'Проверьте, что после отправки текст письма с кодом '
+            'подтверждения не хранится в базе.'
+        )
+
+        old, recent, _ = OutgoingEmail.objects.all()
+        OutgoingEmail.objects.filter(pk=old.pk).update(
+            sent=timezone.now() - SENT_RETENTION - timedelta(minutes=1))
+        signup(client, 3)
+        send_emails()
+        assert not OutgoingEmail.objects.filter(pk=old.pk).exists(), (
+            'Проверьте, что `send_emails` удаляет давно отправленные письма.'
+        )
+        assert OutgoingEmail.objects.filter(pk=recent.pk).exists()
+        assert OutgoingEmail.objects.count() == 3
@@ -0,0 +1,101 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import user_queries
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21TokenClaims:
+
+    def test_01_token_has_role_claims(self, admin, claims_client):
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        _, raw = claims_client(admin)
+        token = AccessToken(raw)
+        assert token['user_id'] == admin.id
+        assert token['role'] == 'admin', (
+            'Проверьте, что токен содержит роль пользователя.'
+        )
+        assert token['username'] == admin.username
+        assert token['is_superuser'] is False
+
+    def test_02_permissions_without_user_query(self, admin, user,
+                                               claims_client):
+        admin_client, _ = claims_client(admin)
+        with CaptureQueriesContext(connection) as queries:
+            response = admin_client.post(
+                '/api/v1/genres/', data={'name': 'Драма', 'slug': 'drama'})
+        assert response.status_code == HTTPStatus.CREATED
+        assert not user_queries(queries), (
+            'Проверьте, что права администратора проверяются по токену, '
+            'без запроса пользователя к базе.'
+        )
+
+        user_client, _ = claims_client(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = user_client.post(
+                '/api/v1/genres/', data={'name': 'Ужасы', 'slug': 'horror'})
+        assert response.status_code == HTTPStatus.FORBIDDEN
+        assert not user_queries(queries)
+
+    def test_03_full_user_loaded_when_needed(self, admin, user, claims_client):
+        from reviews.models import Category, Review, Title
+
+        client, _ = claims_client(user)
+        response = client.get('/api/v1/users/me/')
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['email'] == user.email, (
+            'Проверьте, что `/api/v1/users/me/` возвращает данные '
+            'пользователя из базы.'
+        )
+
+        category = Category.objects.create(name='Фильм', slug='movie')
+        title = Title.objects.create(name='Фильм', year=2000,
+                                     category=category)
+        response = client.post(
+            f'/api/v1/titles/{title.id}/reviews/',
+            data={'text': 'Хорошо', 'score': 8})
+        assert response.status_code == HTTPStatus.CREATED, (
+            'Проверьте, что отзыв создается с токеном с ролью.'
+        )
+        review = Review.objects.get()
+        assert review.author == user
+        assert response.json()['author'] == user.username
+
+        response = client.patch(
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/',
+            data={'text': 'Отлично'})
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что автор может изменить свой отзыв.'
+        )
+        other, _ = claims_client(admin)
+        response = other.delete(
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+
+    def test_04_inactive_or_deleted_user(self, admin, user, claims_client):
+        from reviews.models import Title
+
+        client, _ = claims_client(user)
+        title = Title.objects.create(name='Фильм', year=2000)
+        # Изменения в обход модели: сигналы отзыва токенов не срабатывают.
+        type(user).objects.filter(pk=user.pk).update(is_active=False)
+        response = client.get('/api/v1/users/me/')
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что неактивный пользователь с токеном получает 401.'
+        )
+        type(user).objects.filter(pk=user.pk).update(is_active=True)
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM users_user WHERE id = %s', [user.pk])
+        for response in (
+            client.get('/api/v1/users/me/'),
+            client.post(f'/api/v1/titles/{title.id}/reviews/',
+                        data={'text': 'Отзыв', 'score': 5}),
+        ):
+            assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+                'Проверьте, что удаленный пользователь с токеном '
+                'получает 401.'
+            )
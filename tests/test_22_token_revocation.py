@@ -0,0 +1,173 @@
+from http import HTTPStatus
+from unittest import mock
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+
+def shifted_client(user, seconds):
+    """Клиент с токеном, выданным на seconds секунд позже текущей:
+    время выдачи в токене и граница отзыва - целые секунды"""
+    from api.v1.authentication import RoleAccessToken
+
+    token = RoleAccessToken.for_user(user)
+    token['iat'] += seconds
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client, token
+
+
+def revocation_queries(queries):
+    tables = [connection.ops.quote_name(table)
+              for table in ('users_revokedtoken', 'users_tokencutoff')]
+    return [
+        query['sql'] for query in queries.captured_queries
+        if any(table in query['sql'] for table in tables)
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22TokenRevocation:
+
+    def test_01_role_change_revokes_tokens(self, admin, moderator, user,
+                                           claims_client):
+        admin_client, _ = claims_client(admin)
+        moderator_client, _ = shifted_client(moderator, -1)
+        user_client, _ = shifted_client(user, -1)
+        assert moderator_client.get(
+            '/api/v1/users/me/').status_code == HTTPStatus.OK
+
+        response = admin_client.patch(
+            f'/api/v1/users/{moderator.username}/', data={'role': 'user'})
+        assert response.status_code == HTTPStatus.OK
+        assert moderator_client.get(
+            '/api/v1/users/me/').status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что смена роли через `/api/v1/users/{username}/` '
+            'отзывает выданные пользователю токены.'
+        )
+        assert user_client.get(
+            '/api/v1/users/me/').status_code == HTTPStatus.OK, (
+            'Проверьте, что отзыв не затрагивает токены других '
+            'пользователей.'
+        )
+
+        response = admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'bio': 'Новое'})
+        assert response.status_code == HTTPStatus.OK
+        assert user_client.get(
+            '/api/v1/users/me/').status_code == HTTPStatus.OK, (
+            'Проверьте, что изменение без смены роли не отзывает токены.'
+        )
+
+        moderator_client, _ = shifted_client(moderator, 1)
+        response = moderator_client.get('/api/v1/users/me/')
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что токен, выданный после смены роли, действует.'
+        )
+        assert response.json()['role'] == 'user'
+
+    def test_02_delete_revokes_tokens(self, admin, user, claims_client):
+        admin_client, _ = claims_client(admin)
+        user_client, _ = shifted_client(user, -1)
+        response = admin_client.delete(f'/api/v1/users/{user.username}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        response = user_client.post(
+            '/api/v1/genres/', data={'name': 'Драма', 'slug': 'drama'})
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что токены удаленного пользователя отозваны.'
+        )
+
+    def test_03_revoke_token_by_jti(self, admin, claims_client):
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        from api.v1.revocation import revoke_token
+
+        client, raw = claims_client(admin)
+        other, _ = claims_client(admin)
+        revoke_token(AccessToken(raw))
+        assert client.get(
+            '/api/v1/users/me/').status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что отозванный по jti токен не принимается.'
+        )
+        assert other.get('/api/v1/users/me/').status_code == HTTPStatus.OK
+
+    def test_04_denylist_refreshes_from_db(self, admin):
+        from django.utils import timezone
+
+        from api.v1.revocation import Denylist
+        from users.models import TokenCutoff
+
+        _, token = shifted_client(admin, -1)
+        now = [0.0]
+        denylist = Denylist(refresh_interval=5, clock=lambda: now[0])
+        assert not denylist.is_revoked(token)
+
+        # Отзыв из другого процесса: запись появилась только в базе.
+        TokenCutoff.objects.create(user_id=admin.id,
+                                   issued_before=timezone.now())
+        with CaptureQueriesContext(connection) as queries:
+            assert not denylist.is_revoked(token)
+        assert not queries.captured_queries, (
+            'Проверьте, что между обновлениями токен проверяется '
+            'без запросов к базе.'
+        )
+        now[0] = 5.0
+        assert denylist.is_revoked(token), (
+            'Проверьте, что список отзыва перечитывается из базы.'
+        )
+
+    def test_05_common_path_without_queries(self, admin, claims_client):
+        client, _ = claims_client(admin)
+        assert client.get('/api/v1/genres/').status_code == HTTPStatus.OK
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post(
+                '/api/v1/genres/', data={'name': 'Драма', 'slug': 'drama'})
+        assert response.status_code == HTTPStatus.CREATED
+        assert not revocation_queries(queries), (
+            'Проверьте, что проверка отзыва не обращается к базе '
+            'на каждый запрос.'
+        )
+
+    @pytest.mark.parametrize('change', ('role', 'is_active', 'delete'))
+    def test_06_model_changes_revoke_tokens(self, moderator, change):
+        client, _ = shifted_client(moderator, -1)
+        assert client.get('/api/v1/users/me/').status_code == HTTPStatus.OK
+        # Так же меняют пользователя админка и код вне API.
+        if change == 'role':
+            moderator.role = 'user'
+            moderator.save()
+        elif change == 'is_active':
+            moderator.is_active = False
+            moderator.save(update_fields=('is_active',))
+        else:
+            moderator.delete()
+        response = client.get('/api/v1/users/me/')
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            f'Проверьте, что изменение `{change}` пользователя вне API '
+            'отзывает его токены.'
+        )
+        assert response.json()['code'] == 'token_not_valid'
+
+    def test_07_unrelated_save_keeps_tokens(self, user):
+        client, _ = shifted_client(user, -1)
+        user.bio = 'Новое'
+        user.save()
+        assert client.get('/api/v1/users/me/').status_code == HTTPStatus.OK
+
+    def test_08_same_second_token_revoked(self, admin, claims_client):
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        client, raw = claims_client(admin)
+        # Понижение в ту же секунду, в которую выдан токен.
+        now = AccessToken(raw)['iat'] + 0.5
+        with mock.patch('api.v1.revocation.time.time', return_value=now):
+            admin.role = 'user'
+            admin.save()
+        response = client.post(
+            '/api/v1/genres/', data={'name': 'Драма', 'slug': 'drama'})
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что токен, выданный в ту же секунду, что и смена '
+            'роли, отозван.'
+        )
@@ -0,0 +1,87 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def selects_from(queries, table):
+    table = connection.ops.quote_name(table)
+    return [
+        query['sql'] for query in queries.captured_queries
+        if query['sql'].startswith('SELECT') and f'FROM {table}' in query['sql']
+    ]
+
+
+def create_title():
+    from reviews.models import Category, Title
+
+    category = Category.objects.create(name='Фильм', slug='movie')
+    return Title.objects.create(name='Фильм', year=2000, category=category)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23NestedParents:
+
+    def test_01_review_create_reads_title_once(self, user, claims_client):
+        title = create_title()
+        client, _ = claims_client(user)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post(url, data={'text': 'Хорошо', 'score': 8})
+        assert response.status_code == HTTPStatus.CREATED
+        assert len(selects_from(queries, 'reviews_title')) == 1, (
+            'Проверьте, что при создании отзыва произведение читается '
+            'из базы один раз.'
+        )
+        assert not selects_from(queries, 'reviews_review'), (
+            'Проверьте, что повторный отзыв отсекается ограничением '
+            'уникальности, без отдельного запроса.'
+        )
+
+        response = client.post(url, data={'text': 'Еще раз', 'score': 2})
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что второй отзыв автора на произведение '
+            'возвращает ответ со статусом 400.'
+        )
+        assert 'author' in response.json()
+        title.refresh_from_db()
+        assert title.rating == 8, (
+            'Проверьте, что отклоненный отзыв не меняет рейтинг.'
+        )
+
+    def test_02_comment_parents_in_one_query(self, user, claims_client):
+        from reviews.models import Review
+
+        title = create_title()
+        review = Review.objects.create(title=title, author=user,
+                                       text='Хорошо', score=8)
+        client, _ = claims_client(user)
+        url = f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post(url, data={'text': 'Согласен'})
+        assert response.status_code == HTTPStatus.CREATED
+        assert len(selects_from(queries, 'reviews_review')) == 1, (
+            'Проверьте, что отзыв и произведение проверяются одним '
+            'запросом.'
+        )
+        assert not selects_from(queries, 'reviews_title')
+
+    def test_03_review_from_other_title(self, user, claims_client):
+        from reviews.models import Review, Title
+
+        title = create_title()
+        other = Title.objects.create(name='Другой', year=2001,
+                                     category=title.category)
+        review = Review.objects.create(title=title, author=user,
+                                       text='Хорошо', score=8)
+        client, _ = claims_client(user)
+        response = client.get(
+            f'/api/v1/titles/{other.id}/reviews/{review.id}/comments/')
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что отзыв чужого произведения не найден.'
+        )
+        response = client.post(
+            f'/api/v1/titles/{other.id + 1}/reviews/',
+            data={'text': 'Хорошо', 'score': 8})
+        assert response.status_code == HTTPStatus.NOT_FOUND
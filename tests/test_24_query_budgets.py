@@ -0,0 +1,180 @@
+from http import HTTPStatus
+from io import BytesIO
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import api_routes, check_query_budget
+
+TITLES = 5
+
+
+def create_catalog(users, titles=TITLES):
+    from reviews.models import Category, Comment, Genre, Review, Title
+
+    category, _ = Category.objects.get_or_create(name='Фильм', slug='movie')
+    genres = [
+        Genre.objects.get_or_create(name=slug, slug=slug)[0]
+        for slug in ('drama', 'comedy')
+    ]
+    created = []
+    for index in range(titles):
+        title = Title.objects.create(
+            name=f'Произведение {index}', year=2000 + index,
+            category=category)
+        title.genre.set(genres)
+        for number, author in enumerate(users, 1):
+            review = Review.objects.create(
+                title=title, author=author, text='Отзыв', score=number)
+            Comment.objects.create(review=review, author=author,
+                                   text='Комментарий')
+        created.append(title)
+    return created
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    return len(queries)
+
+
+def budget_requests(title, review, comment, user, job):
+    """Запросы, покрывающие все маршруты api/urls.py"""
+    from django.contrib.auth.tokens import default_token_generator
+
+    titles = '/api/v1/titles/'
+    reviews = f'{titles}{title.id}/reviews/'
+    comments = f'{reviews}{review.id}/comments/'
+    upload = BytesIO('id,name,slug\n100,Ужасы,horror\n'.encode())
+    upload.name = 'genre.csv'
+    return [
+        ('api-root', 'get', '/api/v1/', {}),
+        ('titles-list', 'get', titles, {}),
+        ('titles-list', 'post', titles, {'data': {
+            'name': 'Новое', 'year': 2001, 'category': 'movie',
+            'genre': ['drama', 'comedy']}}),
+        ('titles-detail', 'get', f'{titles}{title.id}/', {}),
+        ('titles-detail', 'patch', f'{titles}{title.id}/',
+         {'data': {'genre': ['drama']}}),
+        ('titles-facets', 'get', f'{titles}facets/', {}),
+        ('titles-rating-stats', 'get',
+         f'{titles}{title.id}/rating-stats/', {}),
+        ('genre-list', 'get', '/api/v1/genres/', {}),
+        ('genre-list', 'post', '/api/v1/genres/',
+         {'data': {'name': 'Ужасы', 'slug': 'horror'}}),
+        ('genre-detail', 'delete', '/api/v1/genres/horror/', {}),
+        ('category-list', 'get', '/api/v1/categories/', {}),
+        ('category-list', 'post', '/api/v1/categories/',
+         {'data': {'name': 'Книга', 'slug': 'book'}}),
+        ('category-detail', 'delete', '/api/v1/categories/book/', {}),
+        ('user-list', 'get', '/api/v1/users/', {}),
+        ('user-detail', 'get', f'/api/v1/users/{user.username}/', {}),
+        ('user-detail', 'patch', f'/api/v1/users/{user.username}/',
+         {'data': {'role': 'moderator'}}),
+        ('user-me', 'get', '/api/v1/users/me/', {}),
+        ('reviews-list', 'get', reviews, {}),
+        ('reviews-list', 'post', reviews,
+         {'data': {'text': 'Отзыв', 'score': 5}}),
+        ('reviews-detail', 'get', f'{reviews}{review.id}/', {}),
+        ('reviews-detail', 'patch', f'{reviews}{review.id}/',
+         {'data': {'score': 3}}),
+        ('comments-list', 'get', comments, {}),
+        ('comments-list', 'post', comments, {'data': {'text': 'Да'}}),
+        ('comments-detail', 'get', f'{comments}{comment.id}/', {}),
+        ('comments-detail', 'delete', f'{comments}{comment.id}/', {}),
+        ('import-jobs-list', 'get', '/api/v1/import-jobs/', {}),
+        ('import-jobs-detail', 'get', f'/api/v1/import-jobs/{job.id}/', {}),
+        ('export', 'get', '/api/v1/export/genre/', {}),
+        ('import', 'post', '/api/v1/import/genre/',
+         {'data': {'file': upload}, 'format': 'multipart'}),
+        ('signup', 'post', '/api/v1/auth/signup/',
+         {'data': {'username': 'new', 'email': 'new@yamdb.fake'}}),
+        ('token', 'post', '/api/v1/auth/token/', {'data': {
+            'username': user.username,
+            'confirmation_code': default_token_generator.make_token(user)}}),
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24QueryBudgets:
+
+    @pytest.mark.parametrize('url', (
+        '/api/v1/titles/',
+        '/api/v1/titles/{title}/reviews/',
+        '/api/v1/titles/{title}/reviews/{review}/comments/',
+    ))
+    def test_01_no_queries_per_object(self, admin_client, django_user_model,
+                                      url):
+        from reviews.models import Review
+
+        users = [
+            django_user_model.objects.create_user(
+                username=f'user{index}', email=f'user{index}@yamdb.fake')
+            for index in range(3)
+        ]
+        title = create_catalog(users[:1], titles=1)[0]
+        review = Review.objects.get()
+        url = url.format(title=title.id, review=review.id)
+        admin_client.get('/api/v1/genres/')
+        few = count_queries(admin_client, url)
+
+        create_catalog(users, titles=TITLES)
+        for author in users[1:]:
+            Review.objects.create(title=title, author=author, text='Еще',
+                                  score=5)
+            review.comments.create(author=author, text='Еще')
+        many = count_queries(admin_client, url)
+        assert many == few, (
+            f'Проверьте, что число запросов GET-запроса к `{url}` не '
+            f'зависит от числа объектов: {few} и {many}.'
+        )
+
+    def test_02_every_route_within_budget(self, admin, admin_client, user,
+                                          settings, tmp_path):
+        from reviews.models import Comment, ImportJob, Review
+
+        settings.IMPORT_UPLOAD_DIR = tmp_path
+        title = create_catalog([user])[0]
+        review = Review.objects.get(title=title)
+        comment = Comment.objects.filter(review=review).first()
+        job = ImportJob.objects.create(table='genre', path='genre.csv',
+                                       format='csv', author=admin)
+        requests = budget_requests(title, review, comment, user, job)
+        missing = api_routes() - {name for name, *_ in requests}
+        assert not missing, (
+            'Проверьте бюджет запросов для маршрутов: '
+            f'{", ".join(sorted(missing))}'
+        )
+        for _, method, url, kwargs in requests:
+            response = check_query_budget(admin_client, method, url,
+                                          **kwargs)
+            assert response.status_code < HTTPStatus.BAD_REQUEST, (
+                f'{method.upper()} {url}: {response.status_code}'
+            )
+
+    def test_03_middleware(self, admin_client, settings, caplog):
+        from api.v1.queries import QueryBudgetExceeded
+        from api.v1.views import GenreViewSet
+
+        settings.MIDDLEWARE = [
+            *settings.MIDDLEWARE, 'api.v1.queries.QueryBudgetMiddleware']
+        response = admin_client.get('/api/v1/genres/')
+        assert response.status_code == HTTPStatus.OK
+        assert 'бюджете' not in caplog.text
+
+        budget = GenreViewSet.max_queries
+        GenreViewSet.max_queries = 0
+        try:
+            response = admin_client.get('/api/v1/genres/?search=a')
+            assert response.status_code == HTTPStatus.OK
+            assert 'бюджете 0' in caplog.text, (
+                'Проверьте, что middleware записывает превышение бюджета '
+                'запросов в журнал.'
+            )
+            settings.QUERY_BUDGET_MODE = 'raise'
+            with pytest.raises(QueryBudgetExceeded):
+                admin_client.get('/api/v1/genres/?search=b')
+        finally:
+            GenreViewSet.max_queries = budget
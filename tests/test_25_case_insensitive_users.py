@@ -0,0 +1,143 @@
+from http import HTTPStatus
+from importlib import import_module
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import user_queries
+
+
+def signup(client, username, email):
+    return client.post('/api/v1/auth/signup/',
+                       data={'username': username, 'email': email})
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25CaseInsensitiveUsers:
+
+    def test_01_signup_ignores_email_case(self, client, django_user_model):
+        response = signup(client, 'NewUser', 'New.User@YamDB.fake')
+        assert response.status_code == HTTPStatus.OK
+        user = django_user_model.objects.get(username='NewUser')
+        assert user.email == 'new.user@yamdb.fake', (
+            'Проверьте, что почта сохраняется в нижнем регистре.'
+        )
+
+        response = signup(client, 'NewUser', 'NEW.USER@yamdb.fake')
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что повторная регистрация с той же почтой '
+            'в другом регистре возвращает ответ со статусом 200.'
+        )
+        assert django_user_model.objects.count() == 1
+
+        response = signup(client, 'other', 'new.user@YAMDB.fake')
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что почта, занятая в другом регистре, возвращает '
+            'ответ со статусом 400.'
+        )
+        assert django_user_model.objects.count() == 1
+
+    def test_02_username_keeps_case(self, client, django_user_model):
+        from django.contrib.auth.tokens import default_token_generator
+
+        signup(client, 'NewUser', 'new.user@yamdb.fake')
+        response = signup(client, 'NEWUSER', 'other@yamdb.fake')
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что имена, отличающиеся регистром, принадлежат '
+            'разным пользователям.'
+        )
+        user = django_user_model.objects.get(username='NEWUSER')
+        response = client.post('/api/v1/auth/token/', data={
+            'username': 'NEWUSER',
+            'confirmation_code': default_token_generator.make_token(user),
+        })
+        assert response.status_code == HTTPStatus.OK
+
+    def test_03_admin_duplicates(self, admin_client, user):
+        response = admin_client.post('/api/v1/users/', data={
+            'username': user.username, 'email': 'new@yamdb.fake'})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert 'username' in response.json()
+        response = admin_client.post('/api/v1/users/', data={
+            'username': 'new', 'email': user.email.upper()})
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что почта, занятая в другом регистре, возвращает '
+            'ответ со статусом 400.'
+        )
+        assert 'email' in response.json()
+
+    def test_04_prefix_search_uses_index(self, admin_client, admin, user,
+                                         moderator):
+        url = '/api/v1/users/?search=testm'
+        with CaptureQueriesContext(connection) as queries:
+            response = admin_client.get(url)
+        sql = user_queries(queries)[-1]
+        assert response.status_code == HTTPStatus.OK
+        assert [item['username'] for item in response.json()['results']] == [
+            moderator.username], (
+            'Проверьте, что `/api/v1/users/?search=` ищет по началу имени '
+            'без учета регистра.'
+        )
+        response = admin_client.get('/api/v1/users/?search=User')
+        assert response.json()['count'] == 0
+
+        # На маленькой таблице планировщик может предпочесть просмотр,
+        # INDEXED BY проверяет, что условие обслуживается индексом.
+        table = connection.ops.quote_name('users_user')
+        sql = sql.replace(f'FROM {table}',
+                          f'FROM {table} INDEXED BY user_username_lower', 1)
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            plan = ' '.join(str(row) for row in cursor.fetchall())
+        assert 'SEARCH' in plan and 'user_username_lower' in plan, (
+            'Проверьте, что поиск пользователей использует индекс '
+            f'по lower(username): {plan}'
+        )
+
+    def test_05_migration_normalizes_email(self, django_user_model, user,
+                                           admin):
+        from django.apps import apps
+
+        migration = import_module(
+            'users.migrations.0004_lower_email_username')
+        django_user_model.objects.filter(pk=user.pk).update(
+            email='Mixed.Case@YamDB.fake')
+        django_user_model.objects.filter(pk=admin.pk).update(
+            email='Admin@ÄÖ.com')
+        migration.normalize_emails(apps, None)
+        user.refresh_from_db()
+        admin.refresh_from_db()
+        assert (user.email, admin.email) == (
+            'mixed.case@yamdb.fake', 'admin@äö.com'), (
+            'Проверьте, что миграция приводит почту к нижнему регистру '
+            'так же, как `User.save()`.'
+        )
+
+        django_user_model.objects.filter(pk=admin.pk).update(
+            email='MIXED.case@yamdb.fake')
+        with pytest.raises(ValueError, match='mixed.case@yamdb.fake'):
+            migration.normalize_emails(apps, None)
+        admin.refresh_from_db()
+        assert admin.email == 'MIXED.case@yamdb.fake', (
+            'Проверьте, что миграция сообщает о повторах почты до '
+            'изменения данных.'
+        )
+
+    def test_06_indexes_match_migration_state(self):
+        from django.db.models import CharField
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name, sql FROM sqlite_master WHERE type = 'index' "
+                "AND sql LIKE '%lower(%'")
+            indexes = dict(cursor.fetchall())
+        assert list(indexes) == ['user_username_lower']
+        assert 'UNIQUE' not in indexes['user_username_lower'], (
+            'Проверьте, что индексы по lower() в базе совпадают '
+            'с Meta.indexes и не уникальные.'
+        )
+        assert 'lower' not in CharField.get_lookups(), (
+            'Проверьте, что lookup `lower` не регистрируется для всех '
+            '`CharField`.'
+        )
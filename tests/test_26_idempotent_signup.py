@@ -0,0 +1,86 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+WRITES = ('INSERT', 'UPDATE', 'DELETE')
+
+
+def signup(client, username='newuser', email='newuser@yamdb.fake'):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.post('/api/v1/auth/signup/',
+                               data={'username': username, 'email': email})
+    writes = [
+        query['sql'] for query in queries.captured_queries
+        if query['sql'].startswith(WRITES)
+    ]
+    return response, writes
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26IdempotentSignup:
+
+    def test_01_retries_do_not_write(self, client, django_user_model):
+        from users.models import OutgoingEmail
+
+        response, writes = signup(client)
+        assert response.status_code == HTTPStatus.OK
+        assert writes
+        for _ in range(3):
+            response, writes = signup(client)
+            assert response.status_code == HTTPStatus.OK, (
+                'Проверьте, что повторная регистрация с теми же данными '
+                'возвращает ответ со статусом 200.'
+            )
+            assert not writes, (
+                'Проверьте, что повторная регистрация в пределах '
+                '`SIGNUP_EMAIL_WINDOW` ничего не пишет в базу.'
+            )
+        assert django_user_model.objects.count() == 1
+        assert OutgoingEmail.objects.count() == 1, (
+            'Проверьте, что повторная регистрация не ставит в очередь '
+            'еще одно письмо с кодом.'
+        )
+
+    def test_02_resend_after_window(self, client, settings):
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        from users.models import OutgoingEmail
+
+        settings.SIGNUP_EMAIL_WINDOW = timedelta(minutes=1)
+        signup(client)
+        OutgoingEmail.objects.update(
+            created=timezone.now() - timedelta(minutes=2))
+        response, _ = signup(client, email='NewUser@yamdb.fake')
+        assert response.status_code == HTTPStatus.OK
+        assert OutgoingEmail.objects.count() == 2, (
+            'Проверьте, что после `SIGNUP_EMAIL_WINDOW` письмо с кодом '
+            'отправляется повторно.'
+        )
+        assert len({email.key for email in OutgoingEmail.objects.all()}) == 1
+
+    def test_03_conflict(self, client, django_user_model):
+        from users.models import OutgoingEmail
+
+        signup(client)
+        for username, email in (('newuser', 'other@yamdb.fake'),
+                                ('other', 'NewUser@yamdb.fake')):
+            response, _ = signup(client, username, email)
+            assert response.status_code == HTTPStatus.BAD_REQUEST, (
+                'Проверьте, что имя или почта другого пользователя '
+                'возвращают ответ со статусом 400.'
+            )
+        assert django_user_model.objects.count() == 1
+        assert OutgoingEmail.objects.count() == 1
+
+    def test_04_non_ascii_email(self, client, django_user_model):
+        for _ in range(2):
+            response, _ = signup(client, email='user@ÄÖ.com')
+            assert response.status_code == HTTPStatus.OK, (
+                'Проверьте, что регистрация с почтой в домене не из ASCII '
+                'возвращает ответ со статусом 200.'
+            )
+        assert django_user_model.objects.get().email == 'user@äö.com'
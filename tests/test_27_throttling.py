@@ -0,0 +1,106 @@
+from http import HTTPStatus
+
+import pytest
+
+
+def set_rates(settings, **rates):
+    settings.REST_FRAMEWORK = {
+        **settings.REST_FRAMEWORK,
+        'DEFAULT_THROTTLE_RATES': rates,
+    }
+
+
+def signup(client, index, address='127.0.0.1', **headers):
+    return client.post('/api/v1/auth/signup/', data={
+        'username': f'user{index}', 'email': f'user{index}@yamdb.fake',
+    }, REMOTE_ADDR=address, **headers)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test27Throttling:
+
+    def test_01_signup_per_ip(self, client, settings):
+        set_rates(settings, signup='3/hour')
+        for index in range(3):
+            assert signup(client, index).status_code == HTTPStatus.OK
+        response = signup(client, 3)
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            'Проверьте, что `/api/v1/auth/signup/` ограничивает частоту '
+            'запросов с одного IP.'
+        )
+        assert 1190 <= int(response['Retry-After']) <= 1200, (
+            'Проверьте, что ответ 429 содержит заголовок `Retry-After`.'
+        )
+        assert signup(client, 3, address='10.0.0.2').status_code == (
+            HTTPStatus.OK), (
+            'Проверьте, что ограничение не затрагивает другие IP.'
+        )
+
+    def test_02_review_writes_per_user(self, settings, admin, user,
+                                       claims_client):
+        from reviews.models import Category, Title
+
+        set_rates(settings, reviews='2/min')
+        category = Category.objects.create(name='Фильм', slug='movie')
+        titles = [
+            Title.objects.create(name=f'Фильм {index}', year=2000,
+                                 category=category)
+            for index in range(3)
+        ]
+        client, _ = claims_client(user)
+        for title in titles[:2]:
+            response = client.post(f'/api/v1/titles/{title.id}/reviews/',
+                                   data={'text': 'Хорошо', 'score': 8})
+            assert response.status_code == HTTPStatus.CREATED
+        url = f'/api/v1/titles/{titles[2].id}/reviews/'
+        response = client.post(url, data={'text': 'Хорошо', 'score': 8})
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            'Проверьте, что создание отзывов ограничено для пользователя.'
+        )
+        assert 'Retry-After' in response
+        assert client.get(url).status_code == HTTPStatus.OK, (
+            'Проверьте, что чтение не ограничивается.'
+        )
+        other, _ = claims_client(admin)
+        response = other.post(url, data={'text': 'Хорошо', 'score': 8})
+        assert response.status_code == HTTPStatus.CREATED, (
+            'Проверьте, что у каждого пользователя свой счетчик.'
+        )
+
+    @pytest.mark.parametrize('backend', ('memory', 'sqlite'))
+    def test_03_token_bucket(self, tmp_path, backend):
+        from api.v1.throttling import (MemoryBucketStore, SQLiteBucketStore,
+                                       parse_rate)
+
+        if backend == 'memory':
+            store = other = MemoryBucketStore()
+        else:
+            # Два процесса с общим файлом счетчиков.
+            store = SQLiteBucketStore(tmp_path / 'throttle.sqlite3')
+            other = SQLiteBucketStore(tmp_path / 'throttle.sqlite3')
+        capacity, per_second = parse_rate('3/min')
+        assert (capacity, per_second) == (3, 3 / 60)
+        for _ in range(capacity):
+            assert store.take('key', capacity, per_second, 0) == 0
+        wait = other.take('key', capacity, per_second, 0)
+        assert wait == pytest.approx(20), (
+            'Проверьте, что после исчерпания бакета ожидание равно '
+            'времени до следующего токена.'
+        )
+        assert store.take('other', capacity, per_second, 0) == 0
+        assert store.take('key', capacity, per_second, 20) == 0
+        assert other.take('key', capacity, per_second, 20) > 0
+        store.clear()
+        assert other.take('key', capacity, per_second, 20) == 0
+
+    def test_04_forwarded_for_ignored(self, client, settings):
+        set_rates(settings, signup='3/hour')
+        statuses = [
+            signup(client, index,
+                   HTTP_X_FORWARDED_FOR=f'10.0.0.{index}').status_code
+            for index in range(6)
+        ]
+        assert statuses.count(HTTPStatus.TOO_MANY_REQUESTS) == 3, (
+            'Проверьте, что заголовок `X-Forwarded-For` от клиента не '
+            'обходит ограничение частоты по IP.'
+        )
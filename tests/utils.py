@@ -1,4 +1,9 @@
 from http import HTTPStatus
+from urllib.parse import urlsplit
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, resolve
 
 check_name_and_slug_patterns = (
     (
@@ -304,3 +309,43 @@ def check_fields(obj_type, url_pattern, obj, expected_data, detail=False):
         f'данные {obj_types[obj_type]}{results_in_msg}. Поле `id` не '
         'найдено или не является целым числом.'
     )
+
+
+def api_routes(patterns=None):
+    """Имена всех маршрутов из api/urls.py"""
+    if patterns is None:
+        from api.urls import urlpatterns
+        patterns = urlpatterns
+    names = set()
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            names |= api_routes(pattern.url_patterns)
+        elif pattern.name:
+            names.add(pattern.name)
+    return names
+
+
+def check_query_budget(client, method, url, **kwargs):
+    """Запрос к url не выходит за бюджет max_queries представления"""
+    from api.v1.queries import get_query_budget
+
+    budget = get_query_budget(resolve(urlsplit(url).path).func)
+    assert budget is not None, (
+        f'Проверьте, что для `{url}` задан бюджет запросов `max_queries`.'
+    )
+    with CaptureQueriesContext(connection) as queries:
+        response = getattr(client, method)(url, **kwargs)
+    assert len(queries) <= budget, (
+        f'Проверьте, что {method.upper()}-запрос к `{url}` выполняет '
+        f'не больше {budget} запросов к базе, сейчас {len(queries)}.'
+    )
+    return response
+
+
+def user_queries(queries):
+    """Запросы к таблице пользователей из CaptureQueriesContext"""
+    table = connection.ops.quote_name('users_user')
+    return [
+        query['sql'] for query in queries.captured_queries
+        if f'FROM {table}' in query['sql']
+    ]